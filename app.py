@@ -1,6 +1,6 @@
-from flask import Flask, render_template, jsonify, session
-import FinanceDataReader as fdr
+from flask import Flask, render_template, jsonify, session, request
 import pandas as pd
+import numpy as np
 from pytz import timezone
 from datetime import datetime, timedelta
 import os
@@ -11,15 +11,21 @@ import requests
 from bs4 import BeautifulSoup
 import traceback
 from urllib.parse import urljoin
-from readability import Document
-import pickle
 import re
 import sys
 from run import EnhancedStockPredictor
 
 
 
-from transformers import AutoTokenizer, pipeline
+from blueprints.sentiment import SentimentService, is_warmup_enabled
+from blueprints.news_cache import news_cache, article_key
+from blueprints.article_fetcher import fetch_bodies
+from blueprints.company_matcher import load_company_matcher
+from blueprints.finance_keywords import finance_matcher, prefilter_by_title
+from blueprints.news_dedup import news_deduplicator, signature as news_signature, is_near_duplicate
+from blueprints.news_store import news_store, stock_source, parse_published_at, SOURCE_MARKET_KR, SOURCE_MARKET_INTL
+from blueprints.price_store import get_ohlcv
+from blueprints.singleflight import coalesced
 from blueprints.analysis import analysis_bp
 from blueprints.tables import tables_bp
 from blueprints.data import data_bp
@@ -27,7 +33,14 @@ from blueprints.auth import auth_bp
 from blueprints import askfin
 from blueprints.askfin import askfin_bp, initialize_global_data, GLOBAL_TICKER_NAME_MAP
 from blueprints.search import search_bp
+from blueprints.quant_report_store import load_quant_report, save_quant_report, get_report_age, format_report_age
+from blueprints.market_panel import get_market_panel, update_market_panel
+from blueprints.theme_index import get_theme_index, update_theme_index
+from blueprints.market_snapshot import get_market_snapshot, OHLCV_COLUMNS
+from blueprints.dart_corp_index import get_corp_index, update_corp_index
+from blueprints.ecos_client import get_key_statistics
 from dotenv import load_dotenv
+from flask_apscheduler import APScheduler
 
 # from db.extensions import db # 이 줄은 제거하거나 주석 처리해야 합니다.
 load_dotenv()
@@ -35,32 +48,20 @@ load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.urandom(24)
 
-# ── 금융 키워드 세트 (data-files/finance.csv) ─────────────────────────
-finance_df = pd.read_csv(
-    os.path.join(os.path.dirname(__file__), "data_files", "finance.csv"),
-    encoding="utf-8-sig"
-)
-# CSV에 'keyword' 컬럼이 있다고 가정
-FINANCE_KEYWORDS = set(
-    finance_df['keyword']
-    .dropna()
-    .astype(str)
-    .str.lower()
-    .str.strip()
-)
-
-# ── Sentiment model & pipelines 로딩 ─────────────────────────
+KST = timezone('Asia/Seoul')
+QUANT_REPORT_MAX_AGE = timedelta(hours=24)
+scheduler = APScheduler()
+scheduler.init_app(app)
+
+
+# ── Sentiment model 지연 로딩 ─────────────────────────
+# import 시점에 모델을 만들지 않고, 백그라운드 warm-up 또는 첫 사용 시 로딩합니다.
 SAVED_MODEL_DIR = os.path.join(os.path.dirname(__file__), "data_files", "saved_model")
-tokenizer = AutoTokenizer.from_pretrained(
-    SAVED_MODEL_DIR, use_fast=True, trust_remote_code=True
-)
-sentiment_pipeline = pipeline(
-    'sentiment-analysis',
-    model=SAVED_MODEL_DIR,
-    tokenizer=SAVED_MODEL_DIR,
-    return_all_scores=False,
-    device=-1
-)
+# scripts/export_sentiment_model.py 로 만든 int8 양자화 모델이 있으면 우선 사용합니다.
+QUANTIZED_MODEL_DIR = os.path.join(os.path.dirname(__file__), "data_files", "saved_model_int8")
+sentiment_service = SentimentService(SAVED_MODEL_DIR, QUANTIZED_MODEL_DIR)
+if is_warmup_enabled():
+    sentiment_service.warm_up()
 
 # 불용 문자/토큰 제거용 (필요시 더 추가)
 STOP_CHARS_PATTERN = re.compile(r"[.,·()\[\]{}!?;:“”\"'`…]")
@@ -73,16 +74,7 @@ def clean_for_sentiment(text: str) -> str:
 
 
 # ── 기업명 추출기 로딩 ────────────────────────────────────
-with open(os.path.join(os.path.dirname(__file__), 'data_files', 'keyword_processor.pkl'), 'rb') as f:
-    keyword_processor = pickle.load(f)
-corp_df = pd.read_csv(
-    os.path.join(os.path.dirname(__file__), 'data_files', 'corp_names.csv'),
-    encoding='utf-8-sig'
-)
-COMPANY_SET = set(corp_df['corp_name'].astype(str))
-STOPWORDS = {"ETF", "ETN", "신탁", "SPAC", "펀드", "리츠"}
-
-BOUNDARY = r"[가-힣A-Za-z0-9]"   # 단어로 취급할 문자들
+company_matcher = load_company_matcher()
 
 
 def check_and_update_market_cache():
@@ -116,7 +108,7 @@ def check_and_update_market_cache():
 
         for i in range(5): # 최대 5일 전까지 시도
             try:
-                target_date_str = stock.get_nearest_business_day_in_a_week((datetime.now() - timedelta(days=i)).strftime('%Y%m%d'))
+                target_date_str = coalesced(stock.get_nearest_business_day_in_a_week, (datetime.now() - timedelta(days=i)).strftime('%Y%m%d'))
                 kospi_all, kosdaq_all = get_market_rank_data(target_date_str)
                 if kospi_all and kosdaq_all:
                     print(f"✅ 데이터 조회 성공 (날짜: {target_date_str})")
@@ -151,50 +143,77 @@ def check_and_update_market_cache():
     except Exception as e:
         print(f"❌ 캐시 업데이트 작업 중 심각한 오류 발생: {e}")
 
-def is_standalone(word: str, text: str) -> bool:
+def extract_companies(text: str) -> list[str]:
+    """본문에서 양옆이 다른 문자에 붙지 않은 기업명을 등장 순서대로 반환합니다. (STOPWORDS 제외)"""
+    return company_matcher.extract(text)
+
+# ── 기사 분석(캐시) 헬퍼 ─────────────────────────────────────
+def analyze_articles(items):
     """
-    text 안에서 word가 양옆이 문자/숫자에 붙어있지 않은 '독립된' 형태로 존재하는지 검사
+    기사 목록의 본문 기반 분석 결과를 [(key, record), ...] 로 반환합니다. (items와 같은 순서)
+    record: 본문 유효 여부(body_ok), 금융 키워드 포함 여부(finance), 기업명(companies), 감성 분석용 문장(target_text)
+    news_cache에 있는 기사는 본문을 다시 받거나 파싱하지 않고, 나머지 기사의 본문은 한 번에 동시 수집합니다.
     """
-    pattern = rf"(?<!{BOUNDARY}){re.escape(word)}(?!{BOUNDARY})"
-    return re.search(pattern, text) is not None
-
-def extract_companies(text: str) -> list[str]:
-    cleaned = re.sub(r'ⓒ.*', '', text)
-    candidates = keyword_processor.extract_keywords(cleaned)
-
-    uniq = dict.fromkeys(candidates)  # 순서 유지한 중복 제거
-    filtered = []
-    for w in uniq:
-        # 1) 기본 필터
-        if w in STOPWORDS:
-            continue
-        if w not in COMPANY_SET:
-            continue
-        # 2) 단독 단어인지 확인 (부분 문자열 방지)
-        if not is_standalone(w, cleaned):
-            continue
-        filtered.append(w)
-    return filtered
-
-# ── 본문(fetch) 헬퍼 ─────────────────────────────────────────
-def fetch_body(url: str) -> str:
+    # 이전에 본 기사의 전재본이면(item['canonical']) 처음 본 기사의 분석 결과를 그대로 씁니다.
+    sources = [item.get("canonical") or item for item in items]
+    keys = [article_key(source["url"], source["title"]) for source in sources]
+    records = [news_cache.get(key) for key in keys]
+    bodies = fetch_bodies([source["url"] for source, record in zip(sources, records) if record is None])
+
+    results = []
+    for item, source, key, record in zip(items, sources, keys, records):
+        if record is None:
+            body = bodies.get(source["url"], "")
+            record = _build_article_record({**item, **source}, body)
+            # 본문을 받지 못한 경우(일시적 네트워크 오류 등)는 저장하지 않고 다음에 다시 시도합니다.
+            if body:
+                news_cache.put(key, source["url"], record)
+        results.append((key, record))
+    return results
+
+
+def _build_article_record(item, body):
+    title_clean = clean_for_sentiment(item["title"])
+    target_text = title_clean if title_clean.strip() else clean_for_sentiment(body)[:256]
     try:
-        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"}, timeout=5)
-        resp.raise_for_status()
-        html = resp.text
-        doc = Document(html)
-        content_html = doc.summary()
-        soup = BeautifulSoup(content_html, "html.parser")
-        for tag in soup(["script", "style"]):
-            tag.decompose()
-        paragraphs = [
-            p.get_text(strip=True)
-            for p in soup.find_all("p")
-            if len(p.get_text(strip=True)) > 20
-        ]
-        return "\n".join(paragraphs)
-    except Exception:
-        return ""
+        companies = extract_companies(body)
+    except Exception as company_e:
+        print(f"DEBUG: 기업명 추출 오류: {company_e}")
+        companies = []
+
+    combined = item["title"] + " " + (item.get("press") or "") + " " + body
+    body_sig = news_signature(body)
+    return {
+        "body_ok": bool(body and len(body.strip()) > 50),
+        "body_signature": body_sig.tolist() if body_sig is not None else None,
+        "finance": finance_matcher.matches(combined),
+        "companies": companies,
+        "target_text": target_text[:256],
+        "sentiment": None,
+        "model_version": None,
+    }
+
+
+def score_article_sentiments(entries):
+    """
+    entries: [(item, key, record, 감성 분석할 문장), ...] → 라벨 리스트 (모델 미준비 시 None)
+    현재 모델 버전으로 캐시된 라벨은 그대로 쓰고, 나머지만 한 번의 배치로 추론해 캐시에 저장합니다.
+    """
+    version = sentiment_service.model_version
+    labels = [record.get("sentiment") if record.get("model_version") == version else None
+              for _, _, record, _ in entries]
+    missing = [i for i, label in enumerate(labels) if label is None]
+    if not missing:
+        return labels
+
+    new_labels = sentiment_service.predict_batch([entries[i][3] for i in missing])
+    for i, label in zip(missing, new_labels):
+        labels[i] = label
+        if label is not None:
+            item, key, record, _ = entries[i]
+            record["sentiment"], record["model_version"] = label, version
+            news_cache.put(key, item["url"], record)
+    return labels
 
 # ── Jinja2 필터 정의 ────────────────────────────────────────
 
@@ -237,7 +256,7 @@ def get_latest_business_day():
     [개선] KRX 데이터 조회 실패 시에도 안정적으로 최신 영업일을 반환하는 함수.
     """
     try:
-        latest_bday = stock.get_nearest_business_day_in_a_week()
+        latest_bday = coalesced(stock.get_nearest_business_day_in_a_week)
         print(f"✅ pykrx를 통해 최신 영업일 조회 성공: {latest_bday}")
         return latest_bday
     except IndexError:
@@ -255,8 +274,11 @@ def get_latest_business_day():
         return bday_str
 
 def get_market_rank_data(date_str):
-    kospi_df = stock.get_market_ohlcv(date_str, market="KOSPI").reset_index()
-    kosdaq_df = stock.get_market_ohlcv(date_str, market="KOSDAQ").reset_index()
+    snapshot = get_market_snapshot(date_str)
+    if snapshot.empty:
+        return [], []
+    kospi_df = snapshot[snapshot['Market'] == 'KOSPI'][OHLCV_COLUMNS].reset_index()
+    kosdaq_df = snapshot[snapshot['Market'] == 'KOSDAQ'][OHLCV_COLUMNS].reset_index()
     for df in [kospi_df, kosdaq_df]:
         tickers = df['티커']
         if askfin.GLOBAL_TICKER_NAME_MAP is None:
@@ -268,9 +290,11 @@ def get_market_rank_data(date_str):
             df[col] = df[col].fillna(0)
     return kospi_df.to_dict('records'), kosdaq_df.to_dict('records')
 
+def _fetch_yf_history(symbol, period):
+    return yf.Ticker(symbol).history(period=period)
+
 def get_wti_data(days=60):
-    ticker = yf.Ticker("CL=F")
-    df = ticker.history(period=f"{days}d")
+    df = coalesced(_fetch_yf_history, "CL=F", f"{days}d")
     return df.reset_index()[['Date', 'Close']].dropna()
 
 def calculate_change_info(df, name):
@@ -289,139 +313,179 @@ def calculate_change_info(df, name):
     change_pct = (change / previous['Close']) * 100 if previous['Close'] != 0 else 0
     return {'name': name, 'value': f"{value:,.2f}", 'change': f"{change:,.2f}", 'change_pct': f"{change_pct:+.2f}%", 'raw_change': change}
 
+def _close_by_interval(df, interval):
+    """일봉 DataFrame을 요청 interval('1d'/'1wk'/'1mo')의 Date/Close 두 컬럼으로 변환합니다."""
+    close = pd.to_numeric(df['Close'], errors='coerce')
+    if interval != '1d':
+        rule = {'1wk': 'W', '1mo': 'M'}.get(interval)
+        if not rule:
+            return pd.DataFrame()
+        close = close.resample(rule).last()
+    close = close.dropna()
+    result = close.reset_index()
+    result.columns = ['Date', 'Close']
+    return result
+
 def get_fdr_or_yf_data(ticker, start, end, interval='1d'):
+    """
+    [개선] 로컬 일봉 저장소(blueprints/price_store)에서 읽고, 마지막 저장일 이후 구간만 네트워크로 받습니다.
+    주봉/월봉은 저장된 일봉을 리샘플링해서 만듭니다.
+    """
     yf_ticker_map = {'USD/KRW': 'KRW=X', 'KS11': '^KS11', 'KQ11': '^KQ11', 'CL=F': 'CL=F'}
     actual_yf_ticker = yf_ticker_map.get(ticker, ticker)
     if ticker.endswith(('.KS', '.KQ')):
         actual_yf_ticker = ticker
 
-    # Method 1: yfinance with specified interval (generally most reliable)
+    # Method 1: yfinance daily bars via the local price store (generally most reliable)
     try:
-        print(f"Method 1: Attempting yfinance fetch for '{actual_yf_ticker}' with interval '{interval}'...")
-        df = yf.download(actual_yf_ticker, start=start, end=end, interval=interval, auto_adjust=True, progress=False)
-        if not df.empty:
-            print("yfinance fetch successful.")
-            df = df.reset_index()
-            date_col = next((col for col in ['Date', 'Datetime', 'index'] if col in df.columns), None)
-            if date_col:
-                df.rename(columns={date_col: 'Date'}, inplace=True)
-            return df[['Date', 'Close']].copy()
+        print(f"Method 1: Reading yfinance daily bars for '{actual_yf_ticker}' (interval '{interval}') from price store...")
+        df = get_ohlcv(actual_yf_ticker, start, end, source='yf_adj')
+        if not df.empty and 'Close' in df.columns:
+            result = _close_by_interval(df, interval)
+            if not result.empty:
+                print("yfinance (price store) read successful.")
+                return result
     except Exception as e:
         print(f"Method 1 failed: {e}")
 
-    # Method 2: fdr (daily) fetch as a primary source for daily requests
+    # Method 2: fdr daily bars via the local price store
     try:
-        print(f"Method 2: Attempting fdr (daily) fetch for '{ticker}'...")
-        df = fdr.DataReader(ticker, start, end)
-        if not df.empty:
-            # If a non-daily interval was requested, resample the daily data
-            if interval != '1d':
-                print(f"Resampling daily FDR data to interval '{interval}'...")
-                df.index.name = 'Date'
-                rule = {'1wk': 'W', '1mo': 'M'}.get(interval)
-                if rule:
-                    resampled_df = df['Close'].resample(rule).last().reset_index()
-                    resampled_df.dropna(inplace=True)
-                    if not resampled_df.empty:
-                        print(f"FDR+resample to '{rule}' successful.")
-                        return resampled_df[['Date', 'Close']].copy()
-            else: # For daily requests
-                print("FDR (daily) fetch successful.")
-                df = df.reset_index()
-                if 'index' in df.columns:
-                    df.rename(columns={'index': 'Date'}, inplace=True)
-                return df[['Date', 'Close']].copy()
+        print(f"Method 2: Reading fdr daily bars for '{ticker}' from price store...")
+        df = get_ohlcv(ticker, start, end, source='fdr')
+        if not df.empty and 'Close' in df.columns:
+            result = _close_by_interval(df, interval)
+            if not result.empty:
+                print("FDR (price store) read successful.")
+                return result
     except Exception as e:
         print(f"Method 2 failed: {e}")
         
     print(f"All methods failed for ticker '{ticker}' with interval '{interval}'. Returning empty DataFrame.")
     return pd.DataFrame()
 
+STOCK_NEWS_RECHECK_SECONDS = 300   # 같은 종목 뉴스 API를 다시 확인하는 최소 간격
+STOCK_NEWS_PAGE_SIZE = 5
+
+
+def _fetch_stock_news_items(stock_code_6_digit):
+    """네이버 모바일 API의 종목 뉴스 목록 (제목/언론사/일시/URL/articleId)."""
+    formatted_news = []
+    url = f"https://m.stock.naver.com/api/news/stock/{stock_code_6_digit}?pageSize=10&page=1"
+    headers = {"User-Agent": "Mozilla/5.0"}
+    response = requests.get(url, headers=headers, timeout=5)
+    response.raise_for_status()
+    raw_data = response.json()
+
+    if isinstance(raw_data, list):
+        for data_group in raw_data:
+            if isinstance(data_group, dict) and 'items' in data_group:
+                for item in data_group.get('items', []):
+                    if isinstance(item, dict):
+                        office_id, article_id = item.get('officeId'), item.get('articleId')
+                        if office_id and article_id:
+                            raw_dt = item.get('datetime', '')
+                            f_date = f"{raw_dt[0:4]}-{raw_dt[4:6]}-{raw_dt[6:8]} {raw_dt[8:10]}:{raw_dt[10:12]}" if len(raw_dt) >= 12 else raw_dt
+                            formatted_news.append({
+                                'title': item.get('title'),
+                                'press': item.get('officeName'),
+                                'date': f_date,
+                                'url': f"https://n.news.naver.com/mnews/article/{office_id}/{article_id}",
+                                'published_at': parse_published_at(raw_dt),
+                                'article_id': f"{office_id}/{article_id}",
+                            })
+    return formatted_news
+
+
+def ingest_stock_news(stock_code_6_digit):
+    """
+    [증분 수집] 종목 뉴스 중 워터마크 이후의 새 기사만 분석(감성/기업명)해 저장소에 추가합니다.
+    최근 STOCK_NEWS_RECHECK_SECONDS 안에 확인했으면 API를 다시 부르지 않습니다.
+    """
+    source = stock_source(stock_code_6_digit)
+    elapsed = news_store.seconds_since_checked(source)
+    if elapsed is not None and elapsed < STOCK_NEWS_RECHECK_SECONDS:
+        return 0
+
+    fetched = _fetch_stock_news_items(stock_code_6_digit)
+    new_items = news_store.filter_new(source, fetched)
+
+    processed_news = []
+    sentiment_entries = []  # 감성 분석 대상 (item, key, record, 문장)
+    sentiment_indexes = []  # 해당 기사의 processed_news 인덱스
+    for news_item, (key, record) in zip(new_items, analyze_articles(new_items)):
+        companies = []
+
+        if record["body_ok"]:
+            target_text = record["target_text"]
+            if target_text.strip():
+                sentiment_entries.append((news_item, key, record, target_text))
+                sentiment_indexes.append(len(processed_news))
+            companies = record["companies"]
+
+        processed_news.append({**news_item, 'sentiment': "없음", 'companies': companies})
+
+    # 기사별로 모델을 부르지 않고, 캐시에 없는 제목만 모아 한 번의 배치로 감성 분석합니다.
+    if sentiment_entries:
+        try:
+            labels = score_article_sentiments(sentiment_entries)
+        except Exception as sentiment_e:
+            print(f"DEBUG: 감성 분석 오류: {sentiment_e}")
+            labels = [None] * len(sentiment_entries)
+        # 라벨이 없으면(모델 warm-up 중/오류) NULL로 저장해 두고 backfill_news_sentiments에서 채웁니다.
+        for index, entry, label in zip(sentiment_indexes, sentiment_entries, labels):
+            processed_news[index]['sentiment'] = label
+            processed_news[index]['sentiment_text'] = entry[3]
+
+    added = news_store.add_articles(source, processed_news, seen_items=fetched)
+    print(f"DEBUG: '{stock_code_6_digit}' 종목 뉴스 {len(fetched)}개 중 새 기사 {added}개 저장.")
+    return added
+
+
 @app.route('/news/<string:code>')
 def get_news(code):
     """
-    특정 종목 코드에 대한 뉴스를 가져옵니다.
+    특정 종목 코드에 대한 뉴스를 가져옵니다. (저장소 최신순, ?page=N 페이지 단위)
     code는 '005930.KS'와 같은 yfinance 형식일 수 있습니다.
     """
-    formatted_news = []
     stock_code_6_digit = code.split('.')[0]
-    print(f"DEBUG: '{code}' (6자리: {stock_code_6_digit}) 종목 코드에 대해 네이버 모바일 API에서 뉴스 가져오기 시도.")
-    try:
-        url = f"https://m.stock.naver.com/api/news/stock/{stock_code_6_digit}?pageSize=10&page=1"
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        raw_data = response.json()
-
-        if isinstance(raw_data, list):
-            for data_group in raw_data:
-                if isinstance(data_group, dict) and 'items' in data_group:
-                    for item in data_group.get('items', []):
-                        if isinstance(item, dict):
-                            office_id, article_id = item.get('officeId'), item.get('articleId')
-                            if office_id and article_id:
-                                raw_dt = item.get('datetime', '')
-                                f_date = f"{raw_dt[0:4]}-{raw_dt[4:6]}-{raw_dt[6:8]} {raw_dt[8:10]}:{raw_dt[10:12]}" if len(raw_dt) >= 12 else raw_dt
-                                formatted_news.append({
-                                    'title': item.get('title'),
-                                    'press': item.get('officeName'),
-                                    'date': f_date,
-                                    'url': f"https://n.news.naver.com/mnews/article/{office_id}/{article_id}"
-                                })
-
-        if not formatted_news:
-            print(f"DEBUG: '{code}'에 대한 뉴스를 API에서 가져왔으나 항목이 0개입니다.")
-            return jsonify({"error": "관련 뉴스가 없습니다. (API 결과 없음)"}), 200
-        
-        processed_news = []
-        for news_item in formatted_news[:5]:
-            body = fetch_body(news_item["url"])
-            sentiment = "없음"
-            companies = []
-
-            if body and len(body.strip()) > 50:
-                title_clean = clean_for_sentiment(news_item["title"])
-                target_text = title_clean if title_clean.strip() else clean_for_sentiment(body)[:256]
-
-                if target_text.strip():
-                    try:
-                        sentiment_result = sentiment_pipeline(target_text)[0]["label"]
-                        sentiment = sentiment_result if sentiment_result else "없음"
-                    except Exception as sentiment_e:
-                        print(f"DEBUG: 감성 분석 오류: {sentiment_e}")
-                        sentiment = "오류"
-
-                try:
-                    companies = extract_companies(body)
-                except Exception as company_e:
-                    print(f"DEBUG: 기업명 추출 오류: {company_e}")
-                    companies = []
-            
-            processed_news.append({
-                'title': news_item['title'],
-                'press': news_item['press'],
-                'date': news_item['date'],
-                'url': news_item['url'],
-                'sentiment': sentiment,
-                'companies': companies
-            })
-
-        print(f"DEBUG: '{code}'에 대한 뉴스 {len(processed_news)}개 성공적으로 가져옴 (감성 분석 포함).")
-        return jsonify(processed_news)
+    page = request.args.get('page', 1, type=int)
+    source = stock_source(stock_code_6_digit)
+    print(f"DEBUG: '{code}' (6자리: {stock_code_6_digit}) 종목 뉴스 조회 (page={page}).")
 
+    fetch_error = None
+    try:
+        ingest_stock_news(stock_code_6_digit)
     except requests.exceptions.Timeout:
         print(f"DEBUG: 뉴스 API 요청 타임아웃 발생 (종목코드: {code})")
-        return jsonify({"error": "뉴스 요청 시간 초과 (API 호출 실패)"}), 500
+        fetch_error = ({"error": "뉴스 요청 시간 초과 (API 호출 실패)"}, 500)
     except requests.exceptions.RequestException as e:
         print(f"DEBUG: 뉴스 API 요청 오류 (종목코드: {code}): {e}")
-        return jsonify({"error": f"뉴스 API 호출 실패: {str(e)}"}), 500
+        fetch_error = ({"error": f"뉴스 API 호출 실패: {str(e)}"}, 500)
     except json.JSONDecodeError:
         print(f"DEBUG: 뉴스 API 응답이 유효한 JSON이 아님 (종목코드: {code})")
-        return jsonify({"error": "뉴스 API 응답 파싱 실패"}), 500
+        fetch_error = ({"error": "뉴스 API 응답 파싱 실패"}, 500)
     except Exception as e:
         print(f"DEBUG: 뉴스 API 처리 중 알 수 없는 오류 발생 (종목코드: {code}): {e}")
         traceback.print_exc()
-        return jsonify({"error": f"뉴스 API 처리 중 알 수 없는 오류: {str(e)}"}), 500
+        fetch_error = ({"error": f"뉴스 API 처리 중 알 수 없는 오류: {str(e)}"}, 500)
+
+    try:
+        articles, total = news_store.get_articles(source, page=page, page_size=STOCK_NEWS_PAGE_SIZE)
+    except Exception as e:
+        print(f"DEBUG: 뉴스 저장소 조회 오류 (종목코드: {code}): {e}")
+        traceback.print_exc()
+        articles, total = [], 0
+
+    if not articles:
+        # 저장된 기사가 없을 때만 API 오류를 그대로 알립니다.
+        if fetch_error:
+            return jsonify(fetch_error[0]), fetch_error[1]
+        print(f"DEBUG: '{code}'에 대한 뉴스를 API에서 가져왔으나 항목이 0개입니다.")
+        return jsonify({"error": "관련 뉴스가 없습니다. (API 결과 없음)"}), 200
+
+    response = jsonify(articles)
+    response.headers['X-Total-Count'] = str(total)
+    return response
 
 
 def _get_news_from_naver_scraping():
@@ -452,7 +516,8 @@ def _get_news_from_naver_scraping():
                 'title': title,
                 'press': press,
                 'date': date_time,
-                'url': link
+                'url': link,
+                'published_at': parse_published_at(date_time)
             })
         print(f"DEBUG: Naver general news scraping successful. Found {len(news_list)} news items.")
     except Exception as e:
@@ -462,55 +527,21 @@ def _get_news_from_naver_scraping():
     return news_list
 
 def get_key_statistic_current_data():
-    ecos_api_key = os.getenv("ECOS_API_KEY")
-    if not ecos_api_key:
+    if not os.getenv("ECOS_API_KEY"):
         print("ECOS API 키가 설정되지 않아 주요 통계 현황 데이터를 가져올 수 없습니다.")
         return []
 
-    api_url = f"https://ecos.bok.or.kr/api/KeyStatisticList/{ecos_api_key}/xml/kr/1/100/"
-
-    key_statistics_current_data = []
-    print(f"DEBUG: ECOS 주요 통계 현황 API 호출 시도: {api_url}")
-    try:
-        response = requests.get(api_url, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'xml')
-        items = soup.find_all('row')
-
-        if not items:
-            print("ECOS 주요 통계 현황 API에서 데이터를 찾을 수 없습니다.")
-            return []
-
-        for item in items:
-            class_name = item.find('CLASS_NAME').get_text() if item.find('CLASS_NAME') else 'N/A'
-            keystat_name = item.find('KEYSTAT_NAME').get_text() if item.find('KEYSTAT_NAME') else 'N/A'
-            data_value = item.find('DATA_VALUE').get_text() if item.find('DATA_VALUE') else 'N/A'
-            cycle = item.find('CYCLE').get_text() if item.find('CYCLE') else 'N/A'
-            unit_name = item.find('UNIT_NAME').get_text() if item.find('UNIT_NAME') else 'N/A'
-
-            key_statistics_current_data.append({
-                "CLASS_NAME": class_name,
-                "KEYSTAT_NAME": keystat_name,
-                "DATA_VALUE": data_value,
-                "CYCLE": cycle,
-                "UNIT_NAME": unit_name
-            })
-        print(f"DEBUG: ECOS 주요 통계 현황 데이터 {len(key_statistics_current_data)}개 항목 성공적으로 가져옴.")
-        return key_statistics_current_data
-
-    except requests.exceptions.Timeout:
-        print("ECOS 주요 통계 현황 API 요청 시간 초과.")
-    except requests.exceptions.RequestException as e:
-        print(f"ECOS 주요 통계 현황 API 요청 오류: {e}")
-        traceback.print_exc()
-    except Exception as e:
-        print(f"ECOS 주요 통계 현황 데이터 처리 중 오류: {e}")
-        traceback.print_exc()
-    return []
+    # [성능 최적화] 주요 통계 현황은 ecos_client가 KEY_STATISTICS_TTL 동안 로컬에 보관합니다.
+    key_statistics_current_data = get_key_statistics()
+    if not key_statistics_current_data:
+        print("ECOS 주요 통계 현황 API에서 데이터를 찾을 수 없습니다.")
+        return []
+    print(f"DEBUG: ECOS 주요 통계 현황 데이터 {len(key_statistics_current_data)}개 항목 사용.")
+    return key_statistics_current_data
 
 
-def get_general_market_news():
+def _fetch_general_market_items():
+    """NewsAPI(키가 없거나 실패하면 네이버 금융 주요뉴스 스크래핑)의 국내 시장 기사 목록."""
     news_api_key = os.getenv("NEWS_API_KEY")
     raw_list = []
 
@@ -537,6 +568,7 @@ def get_general_market_news():
                         "press": art.get("source", {}).get("name", "N/A"),
                         "date": art.get("publishedAt", "")[:10],
                         "url": art.get("url", "#"),
+                        "published_at": parse_published_at(art.get("publishedAt")),
                     })
             else:
                 raw_list = _get_news_from_naver_scraping()
@@ -546,50 +578,106 @@ def get_general_market_news():
             raw_list = _get_news_from_naver_scraping()
     else:
         raw_list = _get_news_from_naver_scraping()
+    return raw_list
+
 
+def _process_general_market_items(raw_list):
+    """
+    금융 기사 선별 → 중복 제거 → 본문 분석 → 감성 분석을 거친 최대 news_count_limit개 기사.
+    (processed, 확인을 마친 기사 목록 - 저장/탈락 모두 포함, 개수 제한으로 보지 못한 기사는 빠짐)을 반환합니다.
+    """
     processed = []
+    sentiment_entries = []
     news_count_limit = 10
-    for item in raw_list:
+    # [1단계] 제목/언론사명으로 금융 기사 후보만 남기고, [2단계] 후보만 본문을 받아 최종 확인합니다.
+    candidates = prefilter_by_title(raw_list)
+    # 본문 수집/감성 분석 전에 제목 기준 유사 중복(전재 기사)을 걸러냅니다.
+    candidates = news_deduplicator.collapse(candidates)
+    # 이전 갱신에서 이미 저장한 기사의 전재본(canonical)은 같은 기사를 두 번 싣지 않도록 뺍니다. (확인한 기사로는 셈)
+    canonical_urls = news_store.stored_urls(
+        SOURCE_MARKET_KR, [item["canonical"]["url"] for item in candidates if item.get("canonical")]
+    )
+    candidates = [item for item in candidates
+                  if not (item.get("canonical") and item["canonical"]["url"] in canonical_urls)]
+    # 제목 단계에서 탈락한 기사(비금융/중복)는 확인을 마친 것으로 봅니다.
+    candidate_urls = {item["url"] for item in candidates}
+    examined = [item for item in raw_list if item["url"] not in candidate_urls]
+    accepted_body_sigs = []
+    # 필요한 만큼만 받도록 news_count_limit개씩 나눠 본문을 동시 수집합니다.
+    for i in range(0, len(candidates), news_count_limit):
         if len(processed) >= news_count_limit:
             break
-        body = fetch_body(item["url"])
+        chunk = candidates[i:i + news_count_limit]
+        for item, (key, record) in zip(chunk, analyze_articles(chunk)):
+            if len(processed) >= news_count_limit:
+                break
+            examined.append(item)
+            if not record["finance"]:
+                continue
+            # 제목은 달라도 본문이 사실상 같은 기사는 한 번만 싣습니다.
+            body_sig = record.get("body_signature")
+            if body_sig is not None:
+                body_sig = np.array(body_sig, dtype=np.uint64)
+                if is_near_duplicate(body_sig, accepted_body_sigs):
+                    continue
+                accepted_body_sigs.append(body_sig)
+
+            target_text = record["target_text"] or "내용없음"
+            processed.append({
+                "title":     item["title"],
+                "press":     item["press"],
+                "date":      item["date"],
+                "url":       item["url"],
+                "published_at": item.get("published_at", ""),
+                "sentiment": "없음",
+                "companies": record["companies"]
+            })
+            sentiment_entries.append((item, key, record, target_text))
 
-        combined = (item["title"] + " " + item["press"] + " " + body).lower()
-        if not any(kw in combined for kw in FINANCE_KEYWORDS):
-            continue
+    # 페이지에 실릴 기사 중 캐시에 라벨이 없는 제목만 모아 한 번의 배치로 감성 분석합니다.
+    if processed:
+        if not sentiment_service.is_ready:
+            print("DEBUG: 감성 분석 모델이 아직 준비되지 않았습니다. (warm-up 중, 캐시된 라벨만 사용)")
+        try:
+            labels = score_article_sentiments(sentiment_entries)
+        except Exception as sentiment_e:
+            print(f"DEBUG: 감성 분석 파이프라인 호출 오류: {sentiment_e}")
+            labels = [None] * len(processed)
+        # 라벨이 없으면(모델 warm-up 중/오류) NULL로 저장해 두고 backfill_news_sentiments에서 채웁니다.
+        for item, entry, label in zip(processed, sentiment_entries, labels):
+            item["sentiment"] = label
+            item["sentiment_text"] = entry[3]
 
-        title_clean = clean_for_sentiment(item["title"])
-        if not title_clean.strip():
-            backup_text = clean_for_sentiment(body)[:256]
-            target_text = backup_text if backup_text else "내용없음"
-        else:
-            target_text = title_clean
+    return processed, examined
 
-        sentiment = "없음"
-        if 'sentiment_pipeline' in globals() and sentiment_pipeline is not None:
-            try:
-                sentiment = sentiment_pipeline(target_text[:256])[0]["label"]
-            except Exception as sentiment_e:
-                print(f"DEBUG: 감성 분석 파이프라인 호출 오류: {sentiment_e}")
-                sentiment = "오류"
-        else:
-            print("DEBUG: sentiment_pipeline이 로드되지 않았습니다.")
 
+MARKET_NEWS_PAGE_SIZE = 10
 
-        companies = extract_companies(body)
 
-        processed.append({
-            "title":     item["title"],
-            "press":     item["press"],
-            "date":      item["date"],
-            "url":       item["url"],
-            "sentiment": sentiment,
-            "companies": companies
-        })
+def ingest_general_market_news():
+    """[증분 수집] 워터마크 이후의 새 국내 시장 기사만 분석해 저장소에 추가합니다."""
+    raw_list = _fetch_general_market_items()
+    new_items = news_store.filter_new(SOURCE_MARKET_KR, raw_list)
+    processed, examined = _process_general_market_items(new_items) if new_items else ([], [])
+    # 개수 제한으로 이번에 보지 못한 새 기사는 다음 수집에서 다시 확인하도록 워터마크가 넘지 않게 합니다.
+    examined_urls = {item["url"] for item in examined}
+    pending = [item for item in new_items if item["url"] not in examined_urls]
+    added = news_store.add_articles(SOURCE_MARKET_KR, processed, seen_items=examined, pending_items=pending)
+    print(f"DEBUG: 국내 시장 뉴스 {len(raw_list)}개 중 새 기사 {len(new_items)}개 확인, {added}개 저장.")
+    return added
+
 
-    return processed
+def get_general_market_news(page=1):
+    """새 기사를 반영한 뒤 저장소에서 국내 시장 뉴스를 최신순으로 읽습니다."""
+    try:
+        ingest_general_market_news()
+    except Exception as e:
+        print(f"DEBUG: 국내 시장 뉴스 수집 오류 (저장된 기사로 응답): {e}")
+        traceback.print_exc()
+    articles, _ = news_store.get_articles(SOURCE_MARKET_KR, page=page, page_size=MARKET_NEWS_PAGE_SIZE)
+    return articles
 
-def get_international_market_news():
+def _fetch_international_market_items():
     news_api_key = os.getenv("NEWS_API_KEY")
     if not news_api_key:
         print("DEBUG: NEWS_API_KEY 없음. 해외 뉴스 가져오기 건너뜜니다.")
@@ -603,7 +691,7 @@ def get_international_market_news():
         data = response.json()
         if data.get('status') == 'ok' and data.get('articles'):
             print(f"DEBUG: NewsAPI.org에서 해외 시장 뉴스 {len(data['articles'])}개 성공적으로 가져옴.")
-            return [{'title': a.get('title', '제목 없음'), 'press': a.get('source', {}).get('name', 'N/A'), 'date': a.get('publishedAt', '')[:10], 'url': a.get('url', '#')} for a in data['articles']]
+            return [{'title': a.get('title', '제목 없음'), 'press': a.get('source', {}).get('name', 'N/A'), 'date': a.get('publishedAt', '')[:10], 'url': a.get('url', '#'), 'published_at': parse_published_at(a.get('publishedAt'))} for a in data['articles']]
         else:
             print("DEBUG: NewsAPI.org 응답 상태 'ok' 아님 또는 기사 없음. 해외 뉴스 가져오기 실패.")
             return []
@@ -612,8 +700,68 @@ def get_international_market_news():
         traceback.print_exc()
         return []
 
+def ingest_international_market_news():
+    """[증분 수집] 워터마크 이후의 새 해외 시장 기사만 저장소에 추가합니다."""
+    raw_list = _fetch_international_market_items()
+    new_items = news_store.filter_new(SOURCE_MARKET_INTL, raw_list)
+    return news_store.add_articles(SOURCE_MARKET_INTL, new_items, seen_items=raw_list)
+
+
+def get_international_market_news(page=1):
+    """새 기사를 반영한 뒤 저장소에서 해외 시장 뉴스를 최신순으로 읽습니다."""
+    try:
+        ingest_international_market_news()
+    except Exception as e:
+        print(f"DEBUG: 해외 시장 뉴스 수집 오류 (저장된 기사로 응답): {e}")
+    articles, _ = news_store.get_articles(SOURCE_MARKET_INTL, page=page, page_size=MARKET_NEWS_PAGE_SIZE)
+    return articles
+
+
+NEWS_SENTIMENT_BACKFILL_LIMIT = 200
+
+
+def backfill_news_sentiments():
+    """모델 warm-up 중/추론 오류로 라벨 없이 저장된 기사에 감성 라벨을 채웁니다. (모델이 준비된 뒤에만 동작)"""
+    if not sentiment_service.is_ready:
+        return 0
+    pending = news_store.pending_sentiments(NEWS_SENTIMENT_BACKFILL_LIMIT)
+    if not pending:
+        return 0
+    labels = sentiment_service.predict_batch([text for _, _, text in pending])
+    filled = [(source, url, label) for (source, url, _), label in zip(pending, labels) if label is not None]
+    news_store.set_sentiments(filled)
+    print(f"✅ 뉴스 감성 라벨 backfill: {len(filled)}/{len(pending)}개")
+    return len(filled)
+
+
+def ingest_market_news_job():
+    """[스케줄러 작업] 국내/해외 시장 뉴스를 증분 수집하고, 라벨 없이 저장된 기사의 감성을 채웁니다."""
+    for ingest in (ingest_general_market_news, ingest_international_market_news, backfill_news_sentiments):
+        try:
+            ingest()
+        except Exception as e:
+            print(f"⚠️ 시장 뉴스 수집 실패 ({ingest.__name__}): {e}")
+
+
+MARKET_NEWS_SOURCES = {'korean': SOURCE_MARKET_KR, 'international': SOURCE_MARKET_INTL}
+
+
+@app.route('/api/market-news/<string:kind>')
+def market_news_page(kind):
+    """저장소의 시장 뉴스 페이지 조회 (?page=N). kind: korean | international"""
+    source = MARKET_NEWS_SOURCES.get(kind)
+    if source is None:
+        return jsonify({"error": f"알 수 없는 뉴스 종류: {kind}"}), 404
+    page = request.args.get('page', 1, type=int)
+    articles, total = news_store.get_articles(source, page=page, page_size=MARKET_NEWS_PAGE_SIZE)
+    total_pages = (total + MARKET_NEWS_PAGE_SIZE - 1) // MARKET_NEWS_PAGE_SIZE
+    return jsonify({
+        "result": articles,
+        "pagination": {"current_page": page, "total_pages": total_pages, "total_items": total},
+    })
+
 def run_and_cache_quant_report():
-    print("🚀 최초 퀀트 리포트 생성 및 캐싱 시작...")
+    print("🚀 퀀트 리포트 생성 시작...")
     try:
         predictor = EnhancedStockPredictor(start_date='2015-01-01')
         
@@ -656,10 +804,10 @@ def run_and_cache_quant_report():
             "risk_history": risk_history_data,
             "monitoring_indicators": monitoring_indicators
         }
-        print(" 최초 퀀트 리포트 캐싱 완료.")
+        print(" 퀀트 리포트 생성 완료.")
         return report_data
     except Exception as e:
-        print(f" 최초 퀀트 리포트 생성 실패: {e}")
+        print(f" 퀀트 리포트 생성 실패: {e}")
         traceback.print_exc()
         return None
 
@@ -737,6 +885,15 @@ def index():
         **cache
     }
 
+    # 뉴스는 증분 수집 저장소의 최신 페이지를 우선 사용합니다. (저장소가 비어 있으면 캐시 파일 내용)
+    for context_key, source in [('korean_market_news', SOURCE_MARKET_KR), ('international_market_news', SOURCE_MARKET_INTL)]:
+        try:
+            articles, _ = news_store.get_articles(source, page=1, page_size=MARKET_NEWS_PAGE_SIZE)
+            if articles:
+                context[context_key] = articles
+        except Exception as e:
+            print(f"⚠️ 뉴스 저장소 조회 실패 ({source}): {e}")
+
     # ... (이하 차트 데이터 로드 부분은 기존과 동일) ...
     days_to_fetch = 60
     start_date, end_date = datetime.now() - timedelta(days=days_to_fetch), datetime.now()
@@ -809,16 +966,101 @@ app.register_blueprint(askfin_bp)
 app.register_blueprint(search_bp)
 
 
+def refresh_quant_report_job():
+    """[스케줄러 작업] 퀀트 리포트를 새로 생성하고, 성공한 경우에만 디스크 결과물을 교체합니다."""
+    report_data = run_and_cache_quant_report()
+    if report_data:
+        save_quant_report(report_data)
+        print("✅ 퀀트 리포트 결과물 저장 완료.")
+    else:
+        print("⚠️ 퀀트 리포트 생성 실패. 마지막 정상 결과물을 유지합니다.")
+
+
+def update_market_data_job():
+    """[스케줄러 작업] 시장 패널에 당일 데이터를 덧붙인 뒤, 그 패널로 전 테마 지수를 다시 계산합니다. 당일 시장 스냅샷도 장 마감 데이터로 새로 만듭니다."""
+    update_market_panel()
+    update_theme_index()
+    try:
+        get_market_snapshot(coalesced(stock.get_nearest_business_day_in_a_week), force=True)
+    except Exception as e:
+        print(f"❌ 시장 스냅샷 생성 실패: {e}")
+
+
+def start_scheduler():
+    """
+    Flask-APScheduler로 주기 작업을 등록합니다.
+    - 퀀트 리포트: 매일 07:30(KST) 재생성. 결과물이 없거나 오래됐으면 부팅 직후 백그라운드로 1회 실행.
+    - KRX 종목 스냅샷: 평일 08:10(KST)에 영업일이 바뀌었는지 확인 후 필요 시 갱신.
+    - 시장 뉴스: 30분마다 새 기사만 증분 수집.
+    - 시장 패널/테마 지수: 평일 18:00(KST)에 당일 전 종목 시가/종가를 덧붙이고 테마 지수를 재계산. 패널이 없거나 오래됐으면 부팅 직후 1회 실행.
+    - DART 고유번호 색인: 매일 06:30(KST) 재생성. 없거나 오늘 만든 것이 아니면 부팅 직후 1회 실행.
+    """
+    scheduler.add_job(
+        id='refresh_krx_snapshot', func=askfin.refresh_global_data_if_stale,
+        trigger='cron', day_of_week='mon-fri', hour=8, minute=10, timezone=KST,
+        replace_existing=True, max_instances=1, coalesce=True
+    )
+    scheduler.add_job(
+        id='refresh_quant_report', func=refresh_quant_report_job,
+        trigger='cron', hour=7, minute=30, timezone=KST,
+        replace_existing=True, max_instances=1, coalesce=True
+    )
+
+    artifact = load_quant_report()
+    if artifact is None or get_report_age(artifact) > QUANT_REPORT_MAX_AGE:
+        print("🔄 퀀트 리포트 결과물이 없거나 오래되어 백그라운드 생성을 예약합니다.")
+        scheduler.add_job(
+            id='refresh_quant_report_boot', func=refresh_quant_report_job,
+            trigger='date', run_date=datetime.now(KST), replace_existing=True
+        )
+    else:
+        print(f"✅ 퀀트 리포트 결과물 로드 완료. ({format_report_age(artifact)} 생성)")
+
+    scheduler.add_job(
+        id='ingest_market_news', func=ingest_market_news_job,
+        trigger='interval', minutes=30, timezone=KST,
+        replace_existing=True, max_instances=1, coalesce=True
+    )
+    scheduler.add_job(
+        id='update_market_data', func=update_market_data_job,
+        trigger='cron', day_of_week='mon-fri', hour=18, minute=0, timezone=KST,
+        replace_existing=True, max_instances=1, coalesce=True
+    )
+    panel = get_market_panel()
+    if panel is None or not panel.is_fresh() or get_theme_index() is None:
+        print("🔄 시장 패널/테마 지수가 없거나 오래되어 백그라운드 갱신을 예약합니다.")
+        scheduler.add_job(
+            id='update_market_data_boot', func=update_market_data_job,
+            trigger='date', run_date=datetime.now(KST), replace_existing=True
+        )
+
+    scheduler.add_job(
+        id='update_dart_corp_index', func=update_corp_index,
+        trigger='cron', hour=6, minute=30, timezone=KST,
+        replace_existing=True, max_instances=1, coalesce=True
+    )
+    corp_index = get_corp_index()
+    if corp_index is None or not corp_index.is_fresh():
+        print("🔄 DART 고유번호 색인이 없거나 오래되어 백그라운드 갱신을 예약합니다.")
+        scheduler.add_job(
+            id='update_dart_corp_index_boot', func=update_corp_index,
+            trigger='date', run_date=datetime.now(KST), replace_existing=True
+        )
+
+    scheduler.start()
+
+
 with app.app_context():
     try:
         initialize_global_data()
         check_and_update_market_cache() 
-        app.config['QUANT_REPORT_CACHE'] = run_and_cache_quant_report()
         print("--- 모든 초기 데이터 로딩 완료 ---", flush=True)
     except Exception as e:
-        print(f"CRITICAL ERROR during app initialization: {e}", file=sys.stderr, flush=True)
+        # 초기 데이터가 일부 없더라도 서버는 기동하고, 각 기능이 캐시/스냅샷으로 대체합니다.
+        print(f"ERROR during app initialization: {e}", file=sys.stderr, flush=True)
         traceback.print_exc(file=sys.stderr)
-        sys.exit(1)
+
+start_scheduler()
 
 @app.context_processor
 def inject_current_year():
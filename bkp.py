@@ -1,23 +1,7 @@
 # build_keyword_processor.py
-#기업명 추출용 pickle 생성기
-import os
-import pandas as pd
-import pickle
-from flashtext import KeywordProcessor
+#기업명 추출용 매처(cache/company_matcher.pkl) 미리 생성기
+# 서버도 첫 기동 시 corp_names.csv가 바뀌었으면 자동으로 다시 만들지만, 배포 전에 미리 만들어 둘 수 있습니다.
+from blueprints.company_matcher import load_company_matcher, COMPANY_MATCHER_PATH
 
-# 1) 기업명 리스트 로드
-corp_df = pd.read_csv('data_files/corp_names.csv', encoding='utf-8-sig')
-names   = corp_df['corp_name'].astype(str).tolist()
-
-# 2) KeywordProcessor에 등록
-kp = KeywordProcessor(case_sensitive=False)
-for name in names:
-    if len(name) >= 2:
-        kp.add_keyword(name)
-
-# 3) pickle로 저장
-os.makedirs('data_files', exist_ok=True)
-with open('data_files/keyword_processor.pkl', 'wb') as f:
-    pickle.dump(kp, f)
-
-print(f"✅ keyword_processor.pkl 생성 완료: 총 {len(names)}개 키워드 등록")
+matcher = load_company_matcher()
+print(f"✅ {COMPANY_MATCHER_PATH} 준비 완료: 총 {matcher.size}개 키워드 등록")
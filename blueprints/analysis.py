@@ -1,15 +1,15 @@
 # blueprints/analysis.py
 
-from flask import Blueprint, render_template, request, current_app
+from flask import Blueprint, render_template, request
 import FinanceDataReader as fdr
 import pandas as pd
 from datetime import datetime, timedelta
-import os
 from dotenv import load_dotenv
-import requests
-import json # JSON 출력을 위해 추가
 import traceback
 from run import EnhancedStockPredictor
+from blueprints.price_store import get_ohlcv
+from blueprints.quant_report_store import load_quant_report, format_report_age
+from blueprints.ecos_client import get_series as get_ecos_series
 
 # .env 파일에서 환경 변수 로드
 load_dotenv()
@@ -24,7 +24,7 @@ def get_stock_data(codes, period_days=365):
     all_data = pd.DataFrame()
     for code in codes:
         try:
-            df = fdr.DataReader(code, start_date, end_date)
+            df = get_ohlcv(code, start_date, end_date)
             price_col = 'Adj Close' if 'Adj Close' in df.columns else 'Close'
             all_data[code] = df[price_col]
         except Exception as e:
@@ -35,14 +35,19 @@ def get_stock_data(codes, period_days=365):
 
 @analysis_bp.route('/quant-report')
 def quant_report():
-    """캐시된 퀀트 리포트 데이터를 사용하여 페이지를 렌더링합니다."""
+    """[개선] 스케줄러가 저장한 마지막 정상 퀀트 리포트를 생성 시각/경과 시간과 함께 렌더링합니다."""
     try:
-        report_data = current_app.config.get('QUANT_REPORT_CACHE')
+        artifact = load_quant_report()
 
-        if not report_data:
-            return render_template('error.html', error_message="퀀트 리포트 데이터가 아직 준비되지 않았습니다. 서버 로그를 확인해주세요.")
+        if not artifact:
+            return render_template('error.html', error_message="퀀트 리포트 데이터가 아직 준비되지 않았습니다. 잠시 후 다시 시도해주세요.")
 
-        return render_template('quant_report.html', report=report_data, now=datetime.now())
+        return render_template(
+            'quant_report.html',
+            report=artifact['report'],
+            now=artifact['generated_at'],
+            report_age=format_report_age(artifact)
+        )
 
     except Exception as e:
         print(f"퀀트 리포트 페이지 렌더링 중 오류: {e}")
@@ -85,41 +90,15 @@ def analysis_page():
 
     cpi_available = False
     try:
-        api_key = os.getenv("ECOS_API_KEY")
-        
         end_date = datetime.now()
         start_date = end_date - timedelta(days=365)
-        start_str = start_date.strftime('%Y%m')
-        end_str = end_date.strftime('%Y%m')
-        
-        url = (f"http://ecos.bok.or.kr/api/StatisticSearch/{api_key}/json/kr/1/100/"
-               f"901Y001/M/{start_str}/{end_str}/0")
+        # [성능 최적화] 지난 달 CPI는 ecos_client 로컬 저장소에서 읽어 페이지마다 ECOS를 호출하지 않습니다.
+        cpi_series = get_ecos_series("901Y001", "0", "M", start_date, end_date)
 
-        response = requests.get(url)
-        response.raise_for_status()
-        
-        data = response.json()
-        
-        # --- ▼▼▼ 디버깅 코드 추가 ▼▼▼ ---
-        # API 서버가 보낸 응답 전체를 예쁘게 출력해서 확인합니다.
-        print("\n--- ECOS API 전체 응답 ---")
-        print(json.dumps(data, indent=4, ensure_ascii=False))
-        # --- ▲▲▲ 디버깅 코드 추가 ▲▲▲ ---
-
-        # 응답 구조를 확인하고 데이터 추출
-        if 'StatisticSearch' in data and 'row' in data['StatisticSearch']:
-            cpi_data_raw = data['StatisticSearch']['row']
-        else:
-            # 에러 응답일 경우 빈 리스트로 초기화
-            cpi_data_raw = []
-
-        if cpi_data_raw:
-            cpi_df = pd.DataFrame(cpi_data_raw)
-            cpi_df = cpi_df[['TIME', 'DATA_VALUE']]
-            cpi_df.rename(columns={'TIME': 'Date', 'DATA_VALUE': 'CPI'}, inplace=True)
-            cpi_df['Date'] = pd.to_datetime(cpi_df['Date'], format='%Y%m')
-            cpi_df.set_index('Date', inplace=True)
-            cpi_df['CPI'] = cpi_df['CPI'].astype(float)
+        if not cpi_series.empty:
+            cpi_df = cpi_series.rename('CPI').to_frame()
+            cpi_df.index = pd.to_datetime(cpi_df.index, format='%Y%m')
+            cpi_df.index.name = 'Date'
 
             cpi_daily = cpi_df.reindex(price_data.index).bfill().ffill()
 
@@ -129,13 +108,10 @@ def analysis_page():
         else:
             print("ECOS API에서 CPI 데이터를 가져오지 못했습니다. (row 리스트가 비어있거나 없음)")
 
-    except requests.exceptions.RequestException as e:
-        print(f"API 요청 실패: {e}")
-        cpi_available = False
     except Exception as e:
         print(f"CPI 데이터 처리 중 오류 발생: {e}")
         cpi_available = False
-    # ▲▲▲▲▲ requests 처리 완료 ▲▲▲▲▲
+    # ▲▲▲▲▲ CPI 처리 완료 ▲▲▲▲▲
 
     # ... (이하 코드 동일) ...
     normalized_price = price_data / price_data.iloc[0]
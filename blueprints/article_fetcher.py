@@ -0,0 +1,132 @@
+# blueprints/article_fetcher.py
+# 기사 본문 수집기 - 공용 커넥션 풀 + 제한된 동시 요청 + URL별 본문 디스크 캐시(SQLite)
+import concurrent.futures
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import requests
+from bs4 import BeautifulSoup
+from readability import Document
+from requests.adapters import HTTPAdapter
+
+# 저장 형식(본문 추출 방식)이 바뀌면 버전을 올려 기존 본문을 무시하도록 합니다.
+BODY_CACHE_VERSION = 1
+BODY_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'article_bodies.sqlite3')
+BODY_CACHE_RETENTION_DAYS = 30
+
+# 동시에 받을 최대 기사 수 (프로세스 전체 공용, 요청마다 스레드 풀을 새로 만들지 않음)
+FETCH_WORKERS = int(os.getenv("ARTICLE_FETCH_WORKERS", "8"))
+FETCH_TIMEOUT = 5
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+_session = requests.Session()
+_session.headers.update(HEADERS)
+_session.mount("https://", HTTPAdapter(pool_connections=16, pool_maxsize=FETCH_WORKERS * 2))
+_session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=FETCH_WORKERS * 2))
+
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="article-fetch")
+
+_db_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(BODY_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(BODY_CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS bodies ("
+            " url TEXT PRIMARY KEY, version INTEGER, body TEXT, fetched_at TEXT)"
+        )
+        cutoff = (datetime.now() - timedelta(days=BODY_CACHE_RETENTION_DAYS)).isoformat(timespec='seconds')
+        conn.execute("DELETE FROM bodies WHERE fetched_at < ? OR version != ?", (cutoff, BODY_CACHE_VERSION))
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _load_cached(urls):
+    """{url: body} 중 캐시에 있는 것만 반환합니다."""
+    if not urls:
+        return {}
+    try:
+        with _db_lock:
+            conn = _connect()
+            found = {}
+            # SQLite 바인딩 변수 개수 제한을 넘지 않도록 나눠서 조회합니다.
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT url, body FROM bodies WHERE version = ? AND url IN ({placeholders})",
+                    [BODY_CACHE_VERSION, *chunk]
+                ).fetchall()
+                found.update(rows)
+        return found
+    except Exception as e:
+        print(f"⚠️ 기사 본문 캐시 조회 실패: {e}")
+        return {}
+
+
+def _store(bodies):
+    if not bodies:
+        return
+    now = datetime.now().isoformat(timespec='seconds')
+    try:
+        with _db_lock:
+            conn = _connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO bodies (url, version, body, fetched_at) VALUES (?, ?, ?, ?)",
+                [(url, BODY_CACHE_VERSION, body, now) for url, body in bodies.items()]
+            )
+            conn.commit()
+    except Exception as e:
+        print(f"⚠️ 기사 본문 캐시 저장 실패: {e}")
+
+
+def extract_paragraphs(html):
+    """readability로 본문 영역을 고른 뒤, 20자 넘는 문단만 줄바꿈으로 이어 붙입니다."""
+    content_html = Document(html).summary()
+    soup = BeautifulSoup(content_html, "html.parser")
+    for tag in soup(["script", "style"]):
+        tag.decompose()
+    paragraphs = [
+        p.get_text(strip=True)
+        for p in soup.find_all("p")
+        if len(p.get_text(strip=True)) > 20
+    ]
+    return "\n".join(paragraphs)
+
+
+def _download(url):
+    try:
+        resp = _session.get(url, timeout=FETCH_TIMEOUT)
+        resp.raise_for_status()
+        return extract_paragraphs(resp.text)
+    except Exception:
+        return ""
+
+
+def fetch_bodies(urls):
+    """
+    여러 기사의 본문을 {url: 본문}으로 반환합니다. (실패한 기사는 빈 문자열)
+    캐시에 있는 기사는 네트워크 호출 없이 읽고, 나머지만 공용 스레드 풀(FETCH_WORKERS)로 동시에 받습니다.
+    빈 본문은 일시적 실패일 수 있으므로 캐시하지 않습니다.
+    """
+    urls = [url for url in dict.fromkeys(urls) if url and url != "#"]
+    bodies = _load_cached(urls)
+    missing = [url for url in urls if url not in bodies]
+    if missing:
+        fetched = dict(zip(missing, _executor.map(_download, missing)))
+        _store({url: body for url, body in fetched.items() if body})
+        bodies.update(fetched)
+    return bodies
+
+
+def fetch_body(url):
+    """기사 하나의 본문. (fetch_bodies와 같은 캐시 사용)"""
+    return fetch_bodies([url]).get(url, "")
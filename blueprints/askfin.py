@@ -1,5 +1,4 @@
 import dart_fss as dart
-import time
 
 import os
 import json
@@ -10,10 +9,12 @@ import FinanceDataReader as fdr
 import pandas as pd
 import numpy as np
 import statistics
-from flask import Blueprint, render_template, request, jsonify, session
+from flask import Blueprint, render_template, request, jsonify, session, Response
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
 import concurrent.futures
+import queue
+import threading
 
 from pykrx import stock
 import re
@@ -21,14 +22,30 @@ from bs4 import BeautifulSoup
 
 from fuzzywuzzy import fuzz, process
 
+from blueprints.krx_snapshot import load_krx_snapshot, build_krx_snapshot, refresh_krx_snapshot_async, add_full_code
+from blueprints.price_store import get_ohlcv, get_ohlcv_many
+from blueprints.singleflight import coalesced
+from blueprints.market_panel import get_market_panel
+from blueprints.theme_index import get_theme_index
+from blueprints.market_snapshot import get_market_snapshot, get_market_snapshot_row
+from blueprints.screener import get_screener, is_screen_condition
+from blueprints.dart_financials import fetch_key_accounts, fetch_recent_filings
+from blueprints.dart_corp_index import lookup_corp_code
+from blueprints.ecos_client import get_series as get_ecos_series
+from blueprints.result_cache import analysis_cache, stock_detail_cache, stable_key
+from blueprints.intent_cache import intent_cache, prompt_version
+from blueprints.intent_router import (classify_locally, intent_stats,
+                                      INTENT_SOURCE_LOCAL, INTENT_SOURCE_CACHE, INTENT_SOURCE_LLM)
+
 # --- Global Caches for Initial Loading ---
 GLOBAL_KRX_LISTING = None
 GLOBAL_TICKER_NAME_MAP = None 
 GLOBAL_NAME_TICKER_MAP = None
-ANALYSIS_CACHE = {} 
+KRX_SNAPSHOT_DATE = None
 GLOBAL_SECTOR_MASTER_DF = None 
 GLOBAL_STOCK_SECTOR_MAP = None 
-STOCK_DETAIL_CACHE = {} 
+# /analyze/stream 처리 중인 스레드의 이벤트 콜백 (중간 결과 전송용)
+_stream_state = threading.local()
 # --- Environment Variable Loading and API Key Setup ---
 load_dotenv()
 
@@ -47,7 +64,8 @@ try:
     API_KEY = os.getenv("GOOGLE_AI_API_KEY")
     if not API_KEY: raise ValueError("API 키가 없습니다.")
     genai.configure(api_key=API_KEY)
-    model = genai.GenerativeModel('gemini-1.5-flash')
+    GEMINI_MODEL_NAME = 'gemini-1.5-flash'
+    model = genai.GenerativeModel(GEMINI_MODEL_NAME)
 
     PROMPT_TEMPLATE = """
 You are a financial analyst. Your primary task is to analyze a user's query and convert it into a structured JSON object.
@@ -151,6 +169,11 @@ You are a financial analyst. Your primary task is to analyze a user's query and
     ```json
     {{"query_type": "theme_ranking", "period": null, "condition": null, "target": "테마", "action": "가장 많이 오른 테마"}}
     ```
+17. User Query: "PER 10 이하이면서 배당수익률 높은 은행주"
+    JSON Output:
+    ```json
+    {{"query_type": "stock_analysis", "period": null, "condition": {{"and": [{{"type": "fundamental", "indicator": "PER", "operator": "<=", "value": 10}}, {{"type": "fundamental", "indicator": "dividend_yield", "operator": ">", "value": "high"}}]}}, "target": "은행주", "action": "찾아줘"}}
+    ```
 
 ## Example (Plain Text Output):
 
@@ -170,6 +193,7 @@ You are a financial analyst. Your primary task is to analyze a user's query and
 User Query: "{user_query}"
 Your Output:
 """
+    INTENT_PROMPT_VERSION = prompt_version(PROMPT_TEMPLATE, GEMINI_MODEL_NAME)
 
 except Exception as e:
     print(f"AskFin Blueprint: 모델 초기화 실패 - {e}")
@@ -178,29 +202,19 @@ except Exception as e:
 def initialize_global_data():
     """
     서버 시작 시 한 번만 호출되어 전역으로 사용될 주식 기본 데이터를 로드하고 캐시합니다.
+    [개선] 디스크 스냅샷을 먼저 읽어 즉시 사용하고, 영업일이 바뀐 경우에만 백그라운드에서 갱신합니다.
     """
-    global GLOBAL_KRX_LISTING, GLOBAL_TICKER_NAME_MAP, GLOBAL_NAME_TICKER_MAP
-
     print("[애플리케이션 초기화] 필수 주식 데이터 로딩 시작...")
     try:
-        print("  - KOSPI 및 KOSDAQ 종목 목록 (FDR) 로딩 중...")
-        GLOBAL_KRX_LISTING = fdr.StockListing('KRX')
-        print(f"  - 종목 목록 로딩 완료. 총 {len(GLOBAL_KRX_LISTING)}개 종목.")
-        print(f"  - GLOBAL_KRX_LISTING 컬럼: {GLOBAL_KRX_LISTING.columns.tolist()}")
-
-        GLOBAL_KRX_LISTING['FullCode'] = GLOBAL_KRX_LISTING.apply(
-            lambda row: f"{row['Code']}.KQ" if row['Market'] == 'KOSDAQ' else f"{row['Code']}.KS", axis=1
-        )
-        print(f"  - GLOBAL_KRX_LISTING에 'FullCode' 컬럼 추가 완료.")
-
-        # 2. 종목 코드 <-> 이름 매핑 로딩 (pykrx)
-        print("  - 종목 코드/이름 매핑 (pykrx) 로딩 중...")
-        all_tickers = stock.get_market_ticker_list(market="ALL")
-        GLOBAL_TICKER_NAME_MAP = {ticker: stock.get_market_ticker_name(ticker) for ticker in all_tickers}
-        GLOBAL_NAME_TICKER_MAP = {name: ticker for ticker, name in GLOBAL_TICKER_NAME_MAP.items()}
-        print(f"  - 종목 코드/이름 매핑 생성 완료. 총 {len(GLOBAL_NAME_TICKER_MAP)}개 매핑.")
-
+        snapshot = load_krx_snapshot()
+        if snapshot is None:
+            # 최초 부팅처럼 스냅샷이 없을 때만 동기적으로 생성합니다.
+            snapshot = build_krx_snapshot()
+        else:
+            print(f"  - KRX 종목 스냅샷 로드 완료. (기준일: {snapshot['business_date']})")
+        _apply_krx_snapshot(snapshot)
 
+        refresh_krx_snapshot_async(snapshot['business_date'], _apply_krx_snapshot)
         print("[애플리케이션 초기화] 모든 필수 주식 데이터 로딩 완료.")
 
     except Exception as e:
@@ -208,6 +222,24 @@ def initialize_global_data():
         traceback.print_exc()
 
 
+def refresh_global_data_if_stale():
+    """[스케줄러 작업] 장기 실행 중 영업일이 바뀌었으면 KRX 종목 스냅샷을 백그라운드에서 갱신합니다."""
+    if KRX_SNAPSHOT_DATE is None:
+        initialize_global_data()
+        return
+    refresh_krx_snapshot_async(KRX_SNAPSHOT_DATE, _apply_krx_snapshot)
+
+
+def _apply_krx_snapshot(snapshot):
+    """스냅샷의 목록/매핑을 전역 변수에 한 번에 교체합니다."""
+    global GLOBAL_KRX_LISTING, GLOBAL_TICKER_NAME_MAP, GLOBAL_NAME_TICKER_MAP, KRX_SNAPSHOT_DATE
+    GLOBAL_KRX_LISTING = snapshot['listing']
+    GLOBAL_TICKER_NAME_MAP = snapshot['ticker_name_map']
+    GLOBAL_NAME_TICKER_MAP = snapshot['name_ticker_map']
+    KRX_SNAPSHOT_DATE = snapshot['business_date']
+    print(f"  - 종목 목록 {len(GLOBAL_KRX_LISTING)}개, 코드/이름 매핑 {len(GLOBAL_NAME_TICKER_MAP)}개 적용. (기준일: {KRX_SNAPSHOT_DATE})")
+
+
 def _load_ticker_maps():
     """
     종목 정보 맵을 전역 변수에서 가져오도록 변경.
@@ -224,8 +256,8 @@ def analyze_institutional_buying(start_date, end_date):
     """
     print(f"DEBUG: {start_date} ~ {end_date} 기간의 기관 순매수 분석을 시작합니다.")
     try:
-        df_kospi = stock.get_market_trading_value_by_date(start_date, end_date, "KOSPI")
-        df_kosdaq = stock.get_market_trading_value_by_date(start_date, end_date, "KOSDAQ")
+        df_kospi = coalesced(stock.get_market_trading_value_by_date, start_date, end_date, "KOSPI")
+        df_kosdaq = coalesced(stock.get_market_trading_value_by_date, start_date, end_date, "KOSDAQ")
         
         df_all = pd.concat([df_kospi, df_kosdaq]).reset_index()
 
@@ -275,7 +307,7 @@ def _get_fdr_indicator(indicator_info, intent_json):
         query_start_date = req_end_date - timedelta(days=90) 
         query_end_date = req_end_date 
         
-        data = fdr.DataReader(code, query_start_date, query_end_date) 
+        data = coalesced(fdr.DataReader, code, query_start_date, query_end_date) 
         
         if data.empty:
             return {"error": f"{name} 데이터 조회에 실패했습니다."}
@@ -315,24 +347,19 @@ def _get_bok_indicator(indicator_info, intent_json):
         bok_api_key = os.getenv("ECOS_API_KEY")
         if not bok_api_key: return {"error": "한국은행 API 키가 설정되지 않았습니다."}
 
-        end_date = datetime.now().strftime('%Y%m')
-        start_date = (datetime.now() - timedelta(days=120)).strftime('%Y%m')
-        url = (f"https://ecos.bok.or.kr/api/StatisticSearch/{bok_api_key}/json/kr/1/10/"
-               f"{indicator_info['stats_code']}/MM/{start_date}/{end_date}/{indicator_info['item_code']}")
+        # [성능 최적화] 지난 달 값은 로컬 저장소에서 읽고, 마지막 달만 주기적으로 다시 받습니다.
+        series = get_ecos_series(indicator_info['stats_code'], indicator_info['item_code'], 'M',
+                                 datetime.now() - timedelta(days=120), datetime.now())
 
-        response = requests.get(url, timeout=10).json()
-        rows = response.get("StatisticSearch", {}).get("row", [])
-        
-        if len(rows) < 2:
+        if len(series) < 2:
             return {"error": f"최근 {name} 데이터를 비교할 만큼 충분히 조회할 수 없습니다."}
-            
-        latest = rows[-1]
-        previous = rows[-2]
-        latest_date = f"{latest['TIME'][:4]}년 {latest['TIME'][4:]}월"
-        change = float(latest['DATA_VALUE']) - float(previous['DATA_VALUE'])
+
+        latest_time, latest_value = series.index[-1], series.iloc[-1]
+        latest_date = f"{latest_time[:4]}년 {latest_time[4:]}월"
+        change = latest_value - series.iloc[-2]
         change_str = f"{abs(change):.2f} 상승" if change > 0 else f"{abs(change):.2f} 하락" if change < 0 else "변동 없음"
 
-        result_sentence = (f"가장 최근({latest_date}) {name}는(은) {latest['DATA_VALUE']}이며, 전월 대비 {change_str}했습니다.")
+        result_sentence = (f"가장 최근({latest_date}) {name}는(은) {latest_value:g}이며, 전월 대비 {change_str}했습니다.")
         
         return {
             "query_intent": intent_json,
@@ -359,12 +386,24 @@ def execute_comparison_analysis(intent_json):
         
         comparison_results = []
 
+        theme_index = get_theme_index()
+        if theme_index is not None and not theme_index.covers(start_date, end_date):
+            theme_index = None
+
         for theme in targets:
+            # [성능 최적화] 테마 지수에 있는 테마는 지수 시계열로 바로 계산합니다.
+            matched_theme = match_theme_name(theme, theme_index.themes) if theme_index is not None else None
+            if matched_theme:
+                theme_returns = theme_index.period_returns(start_date, end_date, themes=[matched_theme])
+                if not theme_returns.empty:
+                    comparison_results.append({"theme": theme, "average_return": float(theme_returns.iloc[0])})
+                    continue
+
             target_stocks, _, _ = get_target_stocks(theme)
             if target_stocks.empty:
                 continue
 
-            performance_data = analyze_top_performers(target_stocks, [(start_date, end_date)], (start_date, end_date))
+            performance_data = analyze_period_performance(target_stocks, [(start_date, end_date)], (start_date, end_date))
             if not performance_data:
                 continue
 
@@ -403,10 +442,11 @@ def execute_theme_ranking(intent_json, page, user_query, cache_key=None):
     [개선] 주요 테마 50개를 분석하고, 그 전체 결과에 대한 페이지네이션을 지원하는 함수.
     """
     try:
-        if cache_key and cache_key in ANALYSIS_CACHE and 'full_result' in ANALYSIS_CACHE[cache_key]:
-            sorted_results = ANALYSIS_CACHE[cache_key]['full_result']
-            analysis_subject = ANALYSIS_CACHE[cache_key]['analysis_subject']
-            description = ANALYSIS_CACHE[cache_key]['description']
+        cached = analysis_cache.get(cache_key)
+        if cached and 'full_result' in cached:
+            sorted_results = cached['full_result']
+            analysis_subject = cached['analysis_subject']
+            description = cached['description']
             print(f" CACHE HIT: 테마 랭킹 전체 결과 {len(sorted_results)}개를 사용합니다.")
         else:
             print(f" CACHE MISS: 새로운 상위/하위 테마 분석을 시작합니다.")
@@ -415,21 +455,31 @@ def execute_theme_ranking(intent_json, page, user_query, cache_key=None):
             start_date, end_date = parse_period(period_str if period_str else "최근 1개월")
             analysis_period_info = f"{start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}"
             
-            themes_from_file = {}
-            try:
-                themes_file_path = os.path.join(os.path.dirname(__file__), '..', 'cache', 'themes.json')
-                with open(themes_file_path, 'r', encoding='utf-8') as f:
-                    themes_from_file = json.load(f)
-            except Exception as e:
-                return {"error": f"테마 목록 파일 로드 실패: {e}"}
+            weighting = "cap" if any(keyword in action_str for keyword in ["시가총액", "시총"]) else "equal"
 
             all_themes_results = []
-            # 분석할 테마 수를 50개로 제한하여 속도 개선
+            # [성능 최적화] 테마 지수가 기간을 포함하면 전 테마를 한 번의 벡터 연산으로 계산합니다.
+            theme_index = get_theme_index()
+            if theme_index is not None and theme_index.covers(start_date, end_date):
+                theme_returns = theme_index.period_returns(start_date, end_date, weighting=weighting)
+                all_themes_results = [{"theme": theme, "average_return": float(value)} for theme, value in theme_returns.items()]
+                print(f"⚡ 테마 지수로 {len(all_themes_results)}개 테마 수익률 계산 완료.")
+
+            themes_from_file = {}
+            if not all_themes_results:
+                try:
+                    themes_file_path = os.path.join(os.path.dirname(__file__), '..', 'cache', 'themes.json')
+                    with open(themes_file_path, 'r', encoding='utf-8') as f:
+                        themes_from_file = json.load(f)
+                except Exception as e:
+                    return {"error": f"테마 목록 파일 로드 실패: {e}"}
+
+            # 테마 지수가 없을 때는 분석할 테마 수를 50개로 제한하여 속도 개선
             for theme in list(themes_from_file.keys())[:50]:
                 target_stocks, _, _ = get_target_stocks(theme)
                 if target_stocks.empty: continue
 
-                performance_data = analyze_top_performers(target_stocks, [(start_date, end_date)], (start_date, end_date))
+                performance_data = analyze_period_performance(target_stocks, [(start_date, end_date)], (start_date, end_date))
                 if not performance_data: continue
 
                 valid_returns = [item['value'] for item in performance_data if 'value' in item and pd.notna(item['value'])]
@@ -445,14 +495,16 @@ def execute_theme_ranking(intent_json, page, user_query, cache_key=None):
             
             analysis_subject = "상위/하위 테마 성과 순위"
             description = f"분석 기간: {analysis_period_info}"
+            if weighting == "cap":
+                description += " (시가총액 가중)"
             
-            if not cache_key: cache_key = str(hash(user_query + str(intent_json)))
-            ANALYSIS_CACHE[cache_key] = {
+            if not cache_key: cache_key = stable_key(user_query, intent_json)
+            analysis_cache.set(cache_key, {
                 'intent_json': intent_json, 
                 'analysis_subject': analysis_subject,
                 'description': description,
                 'full_result': sorted_results
-            }
+            })
 
         # --- [핵심] 페이지네이션 로직 수정 ---
         items_per_page = 20
@@ -477,37 +529,39 @@ def execute_theme_ranking(intent_json, page, user_query, cache_key=None):
         return {"error": f"테마 랭킹 분석 중 오류 발생: {e}"}    
             
 
+# 지표 조회 대상 (로컬 의도 분류기에서도 사용)
+FDR_INDICATOR_MAP = {
+    "환율": {"code": "USD/KRW", "name": "원/달러 환율"},
+    "원달러환율": {"code": "USD/KRW", "name": "원/달러 환율"},
+    "유가": {"code": "CL=F", "name": "WTI 국제 유가"},
+    "wti": {"code": "CL=F", "name": "WTI 국제 유가"},
+    "금값": {"code": "GC=F", "name": "금 선물"},
+    "금가격": {"code": "GC=F", "name": "금 선물"},
+    "미국채10년": {"code": "US10YT=X", "name": "미 10년물 국채 금리"},
+    "미국10년국채": {"code": "US10YT=X", "name": "미 10년물 국채 금리"},
+    "코스피": {"code": "KS11", "name": "코스피 지수"},
+    "코스닥": {"code": "KQ11", "name": "코스닥 지수"},
+}
+
+BOK_INDICATOR_MAP = {
+    "cpi": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"},
+    "소비자물가지수": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"},
+    "소비자물가": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"}, # 추가
+    "물가지수": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"}, # 추가
+    "물가": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"}, # 추가
+
+    "기준금리": {"stats_code": "722Y001", "item_code": "0001000", "name": "한국 기준금리"},
+    "한국기준금리": {"stats_code": "722Y001", "item_code": "0001000", "name": "한국 기준금리"},
+    "금리": {"stats_code": "722Y001", "item_code": "0001000", "name": "한국 기준금리"}, # 추가
+}
+
+
 def execute_indicator_lookup(intent_json):
     """
     [최종 수정] 여러 소스의 경제 지표를 조회하고 챗봇 답변을 생성하는 메인 함수
     """
     target_query = intent_json.get("target", "").lower() # 사용자 쿼리의 대상 지표 (소문자로 변환하여 비교 용이)
 
-    FDR_INDICATOR_MAP = {
-        "환율": {"code": "USD/KRW", "name": "원/달러 환율"},
-        "원달러환율": {"code": "USD/KRW", "name": "원/달러 환율"},
-        "유가": {"code": "CL=F", "name": "WTI 국제 유가"},
-        "wti": {"code": "CL=F", "name": "WTI 국제 유가"},
-        "금값": {"code": "GC=F", "name": "금 선물"},
-        "금가격": {"code": "GC=F", "name": "금 선물"},
-        "미국채10년": {"code": "US10YT=X", "name": "미 10년물 국채 금리"},
-        "미국10년국채": {"code": "US10YT=X", "name": "미 10년물 국채 금리"},
-        "코스피": {"code": "KS11", "name": "코스피 지수"},
-        "코스닥": {"code": "KQ11", "name": "코스닥 지수"},
-    }
-    
-    BOK_INDICATOR_MAP = {
-        "cpi": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"},
-        "소비자물가지수": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"},
-        "소비자물가": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"}, # 추가
-        "물가지수": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"}, # 추가
-        "물가": {"stats_code": "901Y001", "item_code": "0", "name": "소비자물가지수"}, # 추가
-
-        "기준금리": {"stats_code": "722Y001", "item_code": "0001000", "name": "한국 기준금리"},
-        "한국기준금리": {"stats_code": "722Y001", "item_code": "0001000", "name": "한국 기준금리"},
-        "금리": {"stats_code": "722Y001", "item_code": "0001000", "name": "한국 기준금리"}, # 추가
-    }
-
     for key, indicator_info in FDR_INDICATOR_MAP.items():
         if key in target_query or indicator_info['name'].lower() in target_query:
             result = _get_fdr_indicator(indicator_info, intent_json)
@@ -549,17 +603,17 @@ def get_stock_profile(code):
     """
     response_data = {}
     company_name = None
-    now = time.time()
-    #  12시간(43200초)이 지나지 않았으면 캐시된 데이터 사용
-    if code in STOCK_DETAIL_CACHE and (now - STOCK_DETAIL_CACHE[code]['timestamp'] < 43200):
+    #  12시간이 지나지 않았으면 캐시된 데이터 사용 (TTL은 stock_detail_cache에서 관리)
+    cached = stock_detail_cache.get(code)
+    if cached is not None:
         print(f"✅ CACHE HIT: 종목코드 '{code}'의 상세 정보를 캐시에서 반환합니다.")
-        return jsonify(STOCK_DETAIL_CACHE[code]['data'])
+        return jsonify(cached)
 
     print(f"🔥 CACHE MISS: 종목코드 '{code}'의 상세 정보를 API를 통해 새로 조회합니다.")
 
     try:
         profile_data = {}
-        latest_business_day = stock.get_nearest_business_day_in_a_week()
+        latest_business_day = coalesced(stock.get_nearest_business_day_in_a_week)
 
         if GLOBAL_KRX_LISTING is None:
             initialize_global_data()
@@ -578,13 +632,13 @@ def get_stock_profile(code):
         profile_data['업종'] = sector
         profile_data['주요제품'] = target_info.get('Industry', 'N/A')
 
-        df_ohlcv = stock.get_market_ohlcv(latest_business_day, market=market)
-        df_cap = stock.get_market_cap(latest_business_day, market=market)
-        df_funda = stock.get_market_fundamental(latest_business_day, market=market)
+        # [성능 최적화] 시장 전체를 세 번 받지 않고, 하루 한 번 만든 전 종목 스냅샷에서 한 행만 읽습니다.
+        funda = get_market_snapshot_row(latest_business_day, code)
+        if funda is None:
+            raise KeyError(f"{latest_business_day} 시장 스냅샷에 '{code}'가 없습니다.")
 
-        current_price = df_ohlcv.loc[code, '종가']
-        market_cap = df_cap.loc[code, '시가총액']
-        funda = df_funda.loc[code]
+        current_price = funda['종가']
+        market_cap = funda['시가총액']
 
         profile_data['현재가'] = f"{current_price:,} 원"
         profile_data['시가총액'] = f"{market_cap / 1_0000_0000_0000:.2f} 조원" if market_cap > 1_0000_0000_0000 else f"{market_cap / 1_0000_0000:.2f} 억원"
@@ -603,78 +657,21 @@ def get_stock_profile(code):
 
     if company_name:
         try:
-            corp_list = dart.get_corp_list()
-            
-            # --- START OF MODIFICATION ---
-            # Search for the corporation by name
-            found_corps = corp_list.find_by_corp_name(company_name, exactly=True)
-            
-            corp = None
-            if found_corps: # Check if the list is not empty
-                corp = found_corps[0] # Assign the first found corporation
-            
-            if not corp: # Explicitly check if corp is None after assignment
+            # [성능 최적화] 전체 기업 목록을 매번 읽지 않고, 하루 한 번 만든 고유번호 색인에서 바로 찾습니다.
+            corp_code = lookup_corp_code(stock_code=code, corp_name=company_name)
+            if not corp_code:
                 raise ValueError(f"DART에서 '{company_name}'을(를) 찾을 수 없습니다.")
-            # --- END OF MODIFICATION ---
 
-            reports = corp.search_filings(bgn_de=(datetime.now() - timedelta(days=365)).strftime('%Y%m%d'), last_reprt_at='Y')
+            reports = fetch_recent_filings(DART_API_KEY, corp_code, (datetime.now() - timedelta(days=365)).strftime('%Y%m%d'), count=15)
             response_data["report_list"] = [{
-                'report_nm': r.report_nm, 'flr_nm': r.flr_nm, 'rcept_dt': r.rcept_dt,
-                'url': f"http://dart.fss.or.kr/dsaf001/main.do?rcpNo={r.rcept_no}"
-            } for r in reports[:15]] if reports else []
-            
-            api_url = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
-            fs_data_list = [] 
+                'report_nm': r['report_nm'], 'flr_nm': r['flr_nm'], 'rcept_dt': r['rcept_dt'],
+                'url': f"http://dart.fss.or.kr/dsaf001/main.do?rcpNo={r['rcept_no']}"
+            } for r in reports]
             
+            # [성능 최적화] 4개 연도 × 3개 보고서를 동시에 조회하고, 제출된 재무제표는 디스크에 영구 보관합니다.
             current_year = datetime.now().year
             years_to_fetch = [str(year) for year in range(current_year, current_year - 4, -1)]
-
-            for year in years_to_fetch:
-                for reprt_code in ['11011', '11013', '11012']:
-                    params = {
-                        'crtfc_key': DART_API_KEY,
-                        'corp_code': corp.corp_code, # 'corp' is now guaranteed to be defined here
-                        'bsns_year': str(year),
-                        'reprt_code': reprt_code,
-                        'fs_div': 'CFS'
-                    }
-                    res = requests.get(api_url, params=params)
-                    data = res.json()
-
-                    if data.get('status') == '000' and data.get('list'):
-                        for item in data['list']:
-                            if 'thstrm_end_dt' in item and item['thstrm_end_dt']:
-                                item['report_date_key'] = item['thstrm_end_dt']
-                            elif 'thstrm_dt' in item and item['thstrm_dt']:
-                                date_range_str = item['thstrm_dt']
-                                match = re.search(r'(\d{4}\.\d{2}\.\d{2})$', date_range_str.strip())
-                                if match:
-                                    item['report_date_key'] = match.group(1)
-                                else:
-                                    item['report_date_key'] = date_range_str.strip()
-                            else:
-                                item['report_date_key'] = None
-                        fs_data_list.extend(data['list'])
-                        break
-                    elif params['fs_div'] == 'CFS':
-                        params['fs_div'] = 'OFS'
-                        res = requests.get(api_url, params=params)
-                        data = res.json()
-                        if data.get('status') == '000' and data.get('list'):
-                             for item in data['list']:
-                                if 'thstrm_end_dt' in item and item['thstrm_end_dt']:
-                                    item['report_date_key'] = item['thstrm_end_dt']
-                                elif 'thstrm_dt' in item and item['thstrm_dt']:
-                                    date_range_str = item['thstrm_dt']
-                                    match = re.search(r'(\d{4}\.\d{2}\.\d{2})$', date_range_str.strip())
-                                    if match:
-                                        item['report_date_key'] = match.group(1)
-                                    else:
-                                        item['report_date_key'] = date_range_str.strip()
-                                else:
-                                    item['report_date_key'] = None
-                             fs_data_list.extend(data['list'])
-                             break
+            fs_data_list = fetch_key_accounts(DART_API_KEY, corp_code, years_to_fetch)
 
             if fs_data_list:
                 df = pd.DataFrame(fs_data_list)
@@ -729,13 +726,29 @@ def get_stock_profile(code):
             traceback.print_exc()
             response_data["financials_error"] = f"재무제표를 불러오는 데 실패했습니다: {e}"
     if "error" not in response_data:
-        STOCK_DETAIL_CACHE[code] = {
-            'data': response_data,
-            'timestamp': now
-        }
+        stock_detail_cache.set(code, response_data)
         
     return jsonify(response_data)
 
+def _theme_keyword(target_str):
+    return target_str.replace(" 관련주", "").replace(" 테마주", "").replace(" 테마", "").replace("주", "").strip()
+
+
+def match_theme_name(target_str, theme_names):
+    """사용자 입력과 가장 유사한 테마명을 반환합니다. (유사도 85점 초과일 때만, 없으면 None)"""
+    best_match = process.extractOne(_theme_keyword(target_str), list(theme_names), scorer=fuzz.token_sort_ratio)
+    if best_match and best_match[1] > 85: # 유사도 기준 85점으로 상향
+        return best_match[0]
+    return None
+
+
+def _sector_map():
+    """종목코드 → 업종 (KRX 목록에 업종 컬럼이 있을 때만)."""
+    if GLOBAL_KRX_LISTING is None or 'Sector' not in GLOBAL_KRX_LISTING.columns:
+        return {}
+    return dict(zip(GLOBAL_KRX_LISTING['Code'].astype(str), GLOBAL_KRX_LISTING['Sector']))
+
+
 def get_target_stocks(target_str):
     """
     [개선] FuzzyWuzzy와 Sector(업종) 및 종목명 직접 검색 로직 강화
@@ -752,16 +765,15 @@ def get_target_stocks(target_str):
     if not target_str or target_str.strip() in GENERIC_TARGETS:
         return krx, analysis_subject, disambiguation_candidates
 
-    keyword = target_str.replace(" 관련주", "").replace(" 테마주", "").replace(" 테마", "").replace("주", "").strip()
+    keyword = _theme_keyword(target_str)
 
     # 1. 테마 파일에서 Fuzzy Matching
     try:
         themes_file_path = os.path.join(os.path.dirname(__file__), '..', 'cache', 'themes.json')
         with open(themes_file_path, 'r', encoding='utf-8') as f:
             themes_from_file = json.load(f)
-        best_match = process.extractOne(keyword, themes_from_file.keys(), scorer=fuzz.token_sort_ratio)
-        if best_match and best_match[1] > 85: # 유사도 기준 85점으로 상향
-            matched_theme_name = best_match[0]
+        matched_theme_name = match_theme_name(target_str, themes_from_file.keys())
+        if matched_theme_name:
             target_codes = [s.get('code') for s in themes_from_file[matched_theme_name] if s.get('code')]
             target_stocks = krx[krx['Code'].isin(target_codes)]
             if not target_stocks.empty:
@@ -848,28 +860,16 @@ def parse_period(period_str):
 
     return today - timedelta(days=365), today
 
-def get_interest_rate_hike_dates(api_key):
+def get_interest_rate_hike_dates():
     """한국은행 API로 기준금리 인상일을 가져오는 함수."""
     stats_code, item_code = "722Y001", "0001000"
-    end_date = datetime.now().strftime('%Y%m%d')
-    start_date = (datetime.now() - timedelta(days=5*365)).strftime('%Y%m%d')
-    url = f"https://ecos.bok.or.kr/api/StatisticSearch/{api_key}/json/kr/1/1000/{stats_code}/DD/{start_date}/{end_date}/{item_code}"
-    
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if "StatisticSearch" not in data or "row" not in data.get("StatisticSearch", {}):
+        series = get_ecos_series(stats_code, item_code, 'D', datetime.now() - timedelta(days=5*365), datetime.now())
+        if series.empty:
             return []
 
-        df = pd.DataFrame(data["StatisticSearch"]["row"])
-        df['TIME'] = pd.to_datetime(df['TIME'], format='%Y%m%d')
-        df['DATA_VALUE'] = pd.to_numeric(df['DATA_VALUE'])
-        df = df.sort_values(by='TIME').reset_index(drop=True)
-        df['PREV_VALUE'] = df['DATA_VALUE'].shift(1)
-        
-        hike_dates = df[df['DATA_VALUE'] > df['PREV_VALUE']]['TIME'].tolist()
+        series.index = pd.to_datetime(series.index, format='%Y%m%d')
+        hike_dates = series[series > series.shift(1)].index.tolist()
         return hike_dates
     except Exception as e:
         print(f"한국은행 API 처리 오류: {e}")
@@ -944,11 +944,11 @@ def execute_single_stock_price(intent_json):
                     "result": [f"'{target_name}'에 해당하는 종목을 찾을 수 없습니다. 종목명을 확인해주세요."]
                 }
 
-        latest_bday_dt = datetime.strptime(stock.get_nearest_business_day_in_a_week(), '%Y%m%d')
+        latest_bday_dt = datetime.strptime(coalesced(stock.get_nearest_business_day_in_a_week), '%Y%m%d')
         start_date_for_chart = (latest_bday_dt - timedelta(days=45)).strftime('%Y%m%d')
         latest_bday_str = latest_bday_dt.strftime('%Y%m%d')
 
-        df = stock.get_market_ohlcv_by_date(fromdate=start_date_for_chart, todate=latest_bday_str, ticker=ticker)
+        df = coalesced(stock.get_market_ohlcv_by_date, fromdate=start_date_for_chart, todate=latest_bday_str, ticker=ticker)
 
         if df.empty:
             return {
@@ -996,9 +996,10 @@ def execute_stock_analysis(intent_json, page, user_query, cache_key=None):
     try:
         action_str = intent_json.get("action", "")
         
-        if cache_key and cache_key in ANALYSIS_CACHE and 'full_result' in ANALYSIS_CACHE[cache_key]:
-            sorted_result = ANALYSIS_CACHE[cache_key]['full_result']
-            analysis_subject = ANALYSIS_CACHE[cache_key]['analysis_subject']
+        cached = analysis_cache.get(cache_key)
+        if cached and 'full_result' in cached:
+            sorted_result = cached['full_result']
+            analysis_subject = cached['analysis_subject']
             print(f" CACHE HIT: 캐시된 전체 결과 {len(sorted_result)}개를 사용합니다.")
         else:
             print(f" CACHE MISS: 새로운 분석을 시작합니다.")
@@ -1012,29 +1013,25 @@ def execute_stock_analysis(intent_json, page, user_query, cache_key=None):
             if target_stocks.empty:
                 return {"analysis_subject": analysis_subject, "result": [f"{analysis_subject}에 해당하는 종목을 찾을 수 없습니다."]}
 
-            if isinstance(condition_obj, dict) and condition_obj.get("type") == "fundamental":
-                today_str = stock.get_nearest_business_day_in_a_week()
-                funda_df = stock.get_market_fundamental(today_str, market="ALL")
-                target_stocks = pd.merge(target_stocks, funda_df, left_on='Code', right_index=True, how='inner')
-                if not target_stocks.empty:
-                    indicator = condition_obj.get("indicator", "").upper()
-                    operator = condition_obj.get("operator")
-                    value = float(condition_obj.get("value"))
-                    if indicator in target_stocks.columns:
-                        if operator == "<": target_stocks = target_stocks[target_stocks[indicator] < value]
-                        elif operator == ">": target_stocks = target_stocks[target_stocks[indicator] > value]
-                        analysis_subject += f" ({indicator} {operator} {value})"
+            if is_screen_condition(condition_obj):
+                # [성능 최적화] 일별 스냅샷으로 만든 스크리너에서 조건 트리를 마스크 연산으로 한 번에 평가합니다.
+                today_str = coalesced(stock.get_nearest_business_day_in_a_week)
+                screener = get_screener(today_str, _sector_map())
+                passed_codes = screener.screen(condition_obj)
+                target_stocks = target_stocks[target_stocks['Code'].astype(str).isin(passed_codes)]
+                analysis_subject += f" ({screener.describe(condition_obj)})"
 
             if target_stocks.empty: return {"analysis_subject": analysis_subject, "result": ["조건을 만족하는 종목이 없습니다."]}
 
             start_date, end_date = parse_period(intent_json.get("period"))
             
-            result_data = analyze_top_performers(target_stocks, [(start_date, end_date)], (start_date, end_date))
+            result_data = analyze_period_performance(target_stocks, [(start_date, end_date)], (start_date, end_date),
+                                                     on_partial=_emit_partial_rows)
             reverse_sort = False if "내린" in action_str else True
             sorted_result = sorted(result_data, key=lambda x: x.get('value', -99999), reverse=reverse_sort)
             
-            if not cache_key: cache_key = str(hash(user_query + str(intent_json)))
-            ANALYSIS_CACHE[cache_key] = {'intent_json': intent_json, 'analysis_subject': analysis_subject, 'full_result': sorted_result}
+            if not cache_key: cache_key = stable_key(user_query, intent_json)
+            analysis_cache.set(cache_key, {'intent_json': intent_json, 'analysis_subject': analysis_subject, 'full_result': sorted_result})
             print(f"새로운 분석 결과 {len(sorted_result)}개를 캐시에 저장했습니다. (키: {cache_key})")
         
         items_per_page = 20
@@ -1083,10 +1080,10 @@ def handle_season_condition(period_tuple, season):
     # Remove duplicates and sort the periods
     return sorted(list(set(event_periods)))
 
-def handle_interest_rate_condition(api_key, period_tuple):
+def handle_interest_rate_condition(period_tuple):
     """금리 인상 조건에 맞는 날짜 구간 리스트를 반환하는 함수"""
     start_date, end_date = period_tuple
-    hike_dates = get_interest_rate_hike_dates(api_key)
+    hike_dates = get_interest_rate_hike_dates()
     
     event_periods = []
     for hike_date in hike_dates:
@@ -1099,157 +1096,180 @@ def handle_interest_rate_condition(api_key, period_tuple):
             
     return event_periods
 
-def _fetch_and_analyze_single_stock(stock_code, stock_name, overall_start, overall_end, event_periods):
-    """
-    단일 종목의 전체 기간 데이터를 조회하고, 그 안에서 이벤트 기간 수익률을 분석하는 헬퍼 함수 (병렬 처리를 위함)
-    """
-    try:
-        print(f"       데이터 조회 시작: {stock_name}({stock_code})")
-        overall_prices = fdr.DataReader(stock_code, overall_start, overall_end)
-
-        if overall_prices.empty:
-            print(f"       -> [분석 실패] {stock_name}({stock_code}): fdr.DataReader가 빈 데이터를 반환했습니다.")
-            return None
-
-        print(f"       -> [데이터 확인] {stock_name}({stock_code}): 전체 기간({overall_start.strftime('%Y-%m-%d')}~{overall_end.strftime('%Y-%m-%d')}) 데이터 {len(overall_prices)}개 로드 성공.")
-        print(f"       -> [이벤트 기간 확인] 분석할 이벤트 기간 수: {len(event_periods)}개, 첫 기간: {event_periods[0] if event_periods else 'N/A'}")
-
-        start_price = int(overall_prices['Open'].iloc[0])
-        end_price = int(overall_prices['Close'].iloc[-1])
-
-        period_returns = []
-        for i, (start, end) in enumerate(event_periods):
-            start_ts = pd.to_datetime(start)
-            end_ts = pd.to_datetime(end)
-
-            prices_in_period = overall_prices.loc[start_ts:end_ts]
-            print(f"       -> 이벤트 기간 {i+1} ({start_ts.date()}~{end_ts.date()}) 데이터 슬라이싱 결과: {len(prices_in_period)}개")
-
-            if len(prices_in_period) > 1:
-                event_start_price = prices_in_period['Open'].iloc[0]
-                event_end_price = prices_in_period['Close'].iloc[-1]
-                if event_start_price > 0:
-                    period_returns.append((event_end_price / event_start_price) - 1)
-
-        if not period_returns:
-            print(f"       -> [분석 실패] {stock_name}({stock_code}): 유효한 수익률을 계산할 수 있는 이벤트 기간이 없습니다.")
-            return None
+# 일괄 조회에서 빠진 종목을 FDR로 개별 조회할 때의 동시 요청 수
+FALLBACK_FETCH_WORKERS = 30
 
-        average_return = statistics.mean(period_returns)
-        if pd.notna(average_return):
-            return {
-                "code": stock_code, "name": stock_name,
-                "value": round(average_return * 100, 2), "label": "평균 수익률(%)",
-                "start_price": start_price,
-                "end_price": end_price,
-            }
-    except Exception as e:
-        print(f"       -> [분석 실패] {stock_name}({stock_code}) 분석 중 예외 발생: {e}")
 
-    return None
+def fetch_aligned_prices(stocks, start_date, end_date, on_frames=None):
+    """
+    [성능 최적화] 여러 종목의 일봉을 yfinance 다종목 일괄 조회(FullCode)로 받아,
+    날짜로 정렬된 시가/종가 DataFrame(컬럼: 종목코드) 두 개로 반환합니다.
+    일괄 조회에서 빠진 종목만 FDR 개별 조회로 보완합니다.
+    on_frames: 일괄 조회 직후, 그리고 개별 조회가 하나 끝날 때마다 새로 받은 {종목코드: 일봉}으로 호출됩니다.
+    """
+    if 'FullCode' not in stocks.columns:
+        stocks = add_full_code(stocks.copy())
+    code_by_full = dict(zip(stocks['FullCode'].astype(str), stocks['Code'].astype(str)))
 
-def analyze_top_performers(target_stocks, event_periods, overall_period):
+    frames = {
+        code_by_full[full_code]: df
+        for full_code, df in get_ohlcv_many(list(code_by_full), start_date, end_date, source='yf').items()
+    }
+    if on_frames and frames:
+        on_frames(dict(frames))
+    misses = [code for code in code_by_full.values() if code not in frames]
+    if misses:
+        print(f"   - 일괄 조회에서 빠진 {len(misses)}개 종목은 개별 조회합니다.")
+        # 전 종목 조회에서는 빠진 종목(KOSDAQ/상장폐지 등)이 수백 개일 수 있어 개별 조회도 병렬로 처리합니다.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=FALLBACK_FETCH_WORKERS) as executor:
+            future_to_code = {executor.submit(get_ohlcv, code, start_date, end_date): code for code in misses}
+            for future in concurrent.futures.as_completed(future_to_code):
+                code = future_to_code[future]
+                try:
+                    df = future.result()
+                except Exception as e:
+                    print(f"   - {code} 개별 조회 실패: {e}")
+                    continue
+                if not df.empty:
+                    frames[code] = df
+                    if on_frames:
+                        on_frames({code: df})
+
+    return _align_frames(frames)
+
+
+def _align_frames(frames):
+    """{종목코드: 일봉} → 날짜로 정렬된 (시가, 종가) DataFrame."""
+    frames = {code: df for code, df in frames.items() if {'Open', 'Close'} <= set(df.columns)}
+    if not frames:
+        return pd.DataFrame(), pd.DataFrame()
+    opens = pd.DataFrame({code: df['Open'] for code, df in frames.items()}).sort_index()
+    closes = pd.DataFrame({code: df['Close'] for code, df in frames.items()}).sort_index()
+    # 거래가 없던 날(종가 없음)의 시가는 무시합니다.
+    return opens.where(closes.notna()), closes
+
+
+def _period_return_columns(opens, closes, start, end):
+    """종목(컬럼)별 (기간 마지막 종가 / 기간 첫 시가 - 1). 기간 내 거래일이 2일 미만이면 NaN."""
+    start_ts, end_ts = pd.to_datetime(start), pd.to_datetime(end)
+    window_close = closes.loc[start_ts:end_ts]
+    if window_close.empty:
+        return pd.Series(np.nan, index=closes.columns)
+    first_open = opens.loc[start_ts:end_ts].bfill().iloc[0]
+    last_close = window_close.ffill().iloc[-1]
+    returns = last_close / first_open - 1
+    return returns.where((window_close.notna().sum() > 1) & (first_open > 0))
+
+
+def _performance_rows(opens, closes, event_periods, names):
+    """이벤트 기간 평균 수익률을 종목(컬럼) 단위 벡터 연산으로 계산해 결과 행 목록으로 반환합니다."""
+    if closes.empty or not event_periods:
+        return []
+    period_returns = pd.concat(
+        [_period_return_columns(opens, closes, start, end) for start, end in event_periods], axis=1
+    )
+    average_returns = period_returns.mean(axis=1, skipna=True)
+    start_prices = opens.bfill().iloc[0]
+    end_prices = closes.ffill().iloc[-1]
+
+    rows = []
+    for code, average_return in average_returns.dropna().items():
+        if pd.isna(start_prices[code]) or pd.isna(end_prices[code]):
+            continue
+        rows.append({
+            "code": code, "name": names.get(code, code),
+            "value": round(float(average_return) * 100, 2), "label": "평균 수익률(%)",
+            "start_price": int(start_prices[code]),
+            "end_price": int(end_prices[code]),
+        })
+    return rows
+
+
+def analyze_top_performers(target_stocks, event_periods, overall_period, on_partial=None):
     """
-    [성능 최적화] 전체 기간 데이터를 한 번에 조회 후, 메모리에서 조건 기간을 슬라이싱하여 분석 속도를 개선합니다.
-    또한, 여러 종목의 데이터 조회를 병렬로 처리합니다.
+    [성능 최적화] 시가총액 상위 50개 종목의 전체 기간 데이터를 일괄 조회한 뒤,
+    이벤트 기간 수익률을 종목(컬럼) 단위 벡터 연산으로 한 번에 계산합니다.
+    on_partial: 일봉을 받는 대로 해당 종목들의 결과 행으로 호출됩니다. (스트리밍 응답용, 정렬 전)
     """
-    analysis_results = []
-    
     try:
-        print("DEBUG: nlargest 실행 전, target_stocks 정보:")
-        target_stocks.info() 
-        
         top_stocks = target_stocks.nlargest(min(len(target_stocks), 50), 'Marcap').reset_index(drop=True)
-
     except Exception as e:
-
-        print(target_stocks)
-        return [] 
+        print(f"⚠️ 수익률 분석 대상 선정 실패: {e}")
+        return []
 
     print(f"시가총액 상위 {len(top_stocks)}개 종목에 대한 수익률 분석을 시작합니다...")
     overall_start, overall_end = overall_period
+    names = dict(zip(top_stocks['Code'].astype(str), top_stocks['Name']))
 
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor:
-        future_to_stock = {
-            executor.submit(_fetch_and_analyze_single_stock, stock['Code'], stock['Name'], overall_start, overall_end, event_periods): stock
-            for index, stock in top_stocks.iterrows()
-        }
+    def send_partial(frames):
+        # 종목별 수익률은 서로 독립이므로, 새로 받은 종목만 따로 계산해 먼저 보냅니다.
+        on_partial(_performance_rows(*_align_frames(frames), event_periods, names))
 
-        for i, future in enumerate(concurrent.futures.as_completed(future_to_stock)):
-            stock_info = future_to_stock[future]
-            stock_code, stock_name = stock_info['Code'], stock_info['Name']
-            try:
-                result = future.result()
-                if result:
-                    analysis_results.append(result)
-                print(f"   ({i + 1}/{len(top_stocks)}) {stock_name}({stock_code}) 분석 완료.")
-            except Exception as exc:
-                print(f"   - {stock_name}({stock_code}) 분석 중 예외 발생: {exc}")
-    
+    opens, closes = fetch_aligned_prices(top_stocks, overall_start, overall_end,
+                                         on_frames=send_partial if on_partial else None)
+
+    analysis_results = _performance_rows(opens, closes, event_periods, names)
+    print(f"수익률 분석 완료: {len(analysis_results)}/{len(top_stocks)}개 종목.")
     return analysis_results
 
+def analyze_period_performance(target_stocks, event_periods, overall_period, on_partial=None):
+    """
+    [성능 최적화] 시장 패널이 해당 기간을 포함하면 대상 전 종목의 수익률을 행렬 연산으로 한 번에 계산합니다.
+    패널이 없거나 기간이 패널 범위를 벗어나면 analyze_top_performers(시총 상위 50개 일괄 조회)로 대체합니다.
+    """
+    panel = get_market_panel()
+    if panel is not None and panel.covers(*overall_period):
+        codes = target_stocks['Code'].astype(str).tolist()
+        returns_df = panel.period_returns(codes, event_periods, overall_period)
+        if not returns_df.empty:
+            names = dict(zip(codes, target_stocks['Name']))
+            print(f"⚡ 시장 패널로 {len(returns_df)}/{len(codes)}개 종목 수익률 계산 완료.")
+            return [
+                {
+                    "code": code, "name": names.get(code, code),
+                    "value": float(row['value']), "label": "평균 수익률(%)",
+                    "start_price": int(row['start_price']),
+                    "end_price": int(row['end_price']),
+                }
+                for code, row in returns_df.iterrows()
+            ]
+    return analyze_top_performers(target_stocks, event_periods, overall_period, on_partial=on_partial)
+
 def analyze_volatility(target_stocks, period_tuple):
-    """변동성 분석 함수 (딜레이 제거)"""
-    analysis_results = []
+    """변동성 분석 함수 - 시가총액 상위 50개 종목을 일괄 조회한 뒤 일간 수익률 표준편차를 컬럼 단위로 계산합니다."""
     start_date, end_date = period_tuple
     top_stocks = target_stocks.nlargest(min(len(target_stocks), 50), 'Marcap').reset_index(drop=True)
     print(f"시가총액 상위 {len(top_stocks)}개 종목에 대한 변동성 분석을 시작합니다...")
 
-    # ThreadPoolExecutor를 사용하여 변동성 분석을 위한 데이터 조회를 병렬로 처리
-    with concurrent.futures.ThreadPoolExecutor(max_workers=30) as executor: # 20에서 30으로 증가
-        future_to_stock = {
-            executor.submit(
-                lambda code, name, s_date, e_date: _fetch_and_calculate_volatility(code, name, s_date, e_date),
-                stock_info['Code'], stock_info['Name'], start_date, end_date
-            ): stock_info
-            for index, stock_info in top_stocks.iterrows()
-        }
+    opens, closes = fetch_aligned_prices(top_stocks, start_date, end_date)
+    if closes.empty:
+        return []
 
-        for i, future in enumerate(concurrent.futures.as_completed(future_to_stock)):
-            stock_info = future_to_stock[future]
-            code, name = stock_info['Code'], stock_info['Name']
-            try:
-                result = future.result()
-                if result:
-                    analysis_results.append(result)
-                print(f"   ({i + 1}/{len(top_stocks)}) {name}({code}) 변동성 분석 완료.")
-            except Exception as exc:
-                print(f"   - {name}({code}) 변동성 분석 중 예외 발생: {exc}")
-    
-    return analysis_results
+    volatility = closes.apply(lambda column: column.dropna().pct_change().dropna().std())
+    start_prices = opens.bfill().iloc[0]
+    end_prices = closes.ffill().iloc[-1]
 
-def _fetch_and_calculate_volatility(code, name, start_date, end_date):
-    """
-    단일 종목의 데이터를 조회하고 변동성을 계산하는 헬퍼 함수 (병렬 처리를 위함)
-    """
-    try:
-        print(f"      변동성 데이터 조회 시작: {name}({code}) - {start_date.strftime('%Y-%m-%d')} ~ {end_date.strftime('%Y-%m-%d')}")
-        overall_prices = fdr.DataReader(code, start_date, end_date)
-        print(f"      변동성 데이터 조회 완료: {name}({code})")
+    names = dict(zip(top_stocks['Code'].astype(str), top_stocks['Name']))
+    analysis_results = []
+    for code, value in volatility.dropna().items():
+        if pd.isna(start_prices[code]) or pd.isna(end_prices[code]):
+            continue
+        analysis_results.append({
+            "code": code, "name": names.get(code, code),
+            "value": round(float(value) * 100, 2), "label": "변동성(%)",
+            "start_price": int(start_prices[code]),
+            "end_price": int(end_prices[code])
+        })
+    return analysis_results
 
-        if overall_prices.empty:
-            return None
-        
-        daily_returns = overall_prices['Close'].pct_change().dropna()
-        volatility = daily_returns.std()
-        if pd.notna(volatility):
-            return {
-                "code": code, "name": name,
-                "value": round(volatility * 100, 2), "label": "변동성(%)",
-                "start_price": int(overall_prices['Open'].iloc[0]),
-                "end_price": int(overall_prices['Close'].iloc[-1])
-            }
-    except Exception as e:
-        print(f"   - {name}({code}) 변동성 분석 중 오류 발생: {e}")
-    return None
 def analyze_top_volume_stocks(date_str):
     """
     주어진 날짜의 거래량 상위 종목을 분석하여 반환합니다.
     """
     print(f"DEBUG: {date_str} 기준 거래량 상위 종목 분석을 시작합니다.")
     try:
-        # KOSPI와 KOSDAQ 시장의 전체 시세 정보를 가져옵니다.
-        df_all = stock.get_market_ohlcv(date_str, market="ALL")
+        # KOSPI와 KOSDAQ 시장의 전체 시세 정보를 일별 스냅샷에서 가져옵니다.
+        df_all = get_market_snapshot(date_str)
 
         if '거래량' not in df_all.columns:
             print("DEBUG: OHLCV 데이터에 '거래량' 컬럼이 없습니다.")
@@ -1283,8 +1303,7 @@ def analyze_top_volume_stocks(date_str):
 
 def handle_indicator_condition(condition_obj, period_tuple):
     """CPI, 금리 등 지표 조건을 만족하는 날짜 구간을 반환"""
-    bok_api_key = os.getenv("ECOS_API_KEY")
-    if not bok_api_key: return []
+    if not os.getenv("ECOS_API_KEY"): return []
     INDICATOR_MAP = {
         "CPI": {"stats_code": "901Y001", "item_code": "0"},
         "기준금리": {"stats_code": "722Y001", "item_code": "0001000"},
@@ -1294,7 +1313,7 @@ def handle_indicator_condition(condition_obj, period_tuple):
     if indicator_name not in INDICATOR_MAP: return []
 
     indicator_info = INDICATOR_MAP[indicator_name]
-    data_series = get_bok_data(bok_api_key, indicator_info['stats_code'], indicator_info['item_code'], period_tuple[0], period_tuple[1])
+    data_series = get_bok_data(indicator_info['stats_code'], indicator_info['item_code'], period_tuple[0], period_tuple[1])
 
     if data_series is None: return []
 
@@ -1307,40 +1326,21 @@ def handle_indicator_condition(condition_obj, period_tuple):
 
     return [(d.replace(day=1), (d.replace(day=1) + timedelta(days=32)).replace(day=1) - timedelta(days=1)) for d in matching_series.index]
 
-def get_bok_data(bok_api_key, stats_code, item_code, start_date, end_date):
+def get_bok_data(stats_code, item_code, start_date, end_date):
     """
-    한국은행 ECOS API를 통해 특정 지표의 시계열 데이터를 가져와 Pandas Series로 반환.
+    한국은행 ECOS 월별 시계열을 Pandas Series(월초 날짜 인덱스)로 반환. (ecos_client 로컬 저장소 사용)
     """
-    start_str = start_date.strftime('%Y%m')
-    end_str = end_date.strftime('%Y%m')
-    
-    url = f"https://ecos.bok.or.kr/api/StatisticSearch/{bok_api_key}/json/kr/1/1000/{stats_code}/MM/{start_str}/{end_str}/{item_code}"
-    
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # HTTP 오류 발생 시 예외 발생
-        data = response.json()
-
-        if "StatisticSearch" not in data or "row" not in data.get("StatisticSearch", {}):
+        series = get_ecos_series(stats_code, item_code, 'M', start_date, end_date)
+        if series.empty:
             print("BOK API 응답에 데이터가 없습니다.")
             return None
 
-        rows = data["StatisticSearch"]["row"]
-        if not rows:
-            return None
-
-        df = pd.DataFrame(rows)
-        df['TIME'] = pd.to_datetime(df['TIME'], format='%Y%m') 
-        df['DATA_VALUE'] = pd.to_numeric(df['DATA_VALUE']) 
-        df = df.set_index('TIME')                             
-        
-        return df['DATA_VALUE'].sort_index()
+        series.index = pd.to_datetime(series.index, format='%Y%m')
+        return series.sort_index()
 
-    except requests.exceptions.RequestException as e:
-        print(f"한국은행 API 요청 오류: {e}")
-        return None
     except Exception as e:
-        print(f"데이터 처리 중 오류: {e}")
+        print(f"한국은행 지표 조회 중 오류: {e}")
         return None
 
 QUERY_HANDLERS = {
@@ -1357,9 +1357,6 @@ def askfin_page():
 
 @askfin_bp.route('/analyze', methods=['POST'])
 def analyze_query():
-    if not model:
-        return jsonify({"error": "모델이 초기화되지 않았습니다. API 키를 확인하세요."}), 500
-    
     data = request.get_json()
     user_query = data.get('query')
     page = data.get('page', 1)
@@ -1368,29 +1365,105 @@ def analyze_query():
     if not user_query:
         return jsonify({"error": "잘못된 요청입니다."}), 400
 
+    result, status = run_analysis(user_query, page, cache_key)
+    return jsonify(result), status
+
+
+@askfin_bp.route('/analyze/stream', methods=['POST'])
+def analyze_query_stream():
+    """
+    [성능 개선] /analyze 의 스트리밍 버전 (NDJSON, 한 줄에 이벤트 하나).
+    intent(의도 분석 직후) → partial(종목 수익률이 계산되는 대로, 0회 이상) → result(정렬된 최종 페이지) 순으로 보냅니다.
+    """
+    data = request.get_json()
+    user_query = data.get('query')
+    page = data.get('page', 1)
+    cache_key = data.get('cache_key')
+
+    if not user_query:
+        return jsonify({"error": "잘못된 요청입니다."}), 400
+
+    events = queue.Queue()
+
+    def worker():
+        _stream_state.on_event = events.put
+        try:
+            result, _ = run_analysis(user_query, page, cache_key, on_event=events.put)
+            events.put({"type": "result", **result})
+        except Exception as e:
+            traceback.print_exc()
+            events.put({"type": "result", "error": f"분석 중 심각한 오류 발생: {str(e)}"})
+        finally:
+            _stream_state.on_event = None
+            events.put(None)
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    def generate():
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield json.dumps(event, ensure_ascii=False, default=str) + "\n"
+
+    return Response(generate(), mimetype='application/x-ndjson', headers={'X-Accel-Buffering': 'no'})
+
+
+def _emit_partial_rows(rows):
+    """스트리밍 요청을 처리 중인 스레드라면 중간 결과(정렬 전 종목 행)를 내보냅니다."""
+    on_event = getattr(_stream_state, 'on_event', None)
+    if on_event and rows:
+        on_event({"type": "partial", "rows": rows})
+
+
+def run_analysis(user_query, page=1, cache_key=None, on_event=None):
+    """
+    질의 의도를 분석하고 처리기를 실행합니다. (응답 dict, HTTP 상태 코드)
+    on_event: 의도가 정해지는 즉시 {'type': 'intent', ...} 이벤트를 받을 콜백 (스트리밍용)
+    """
     raw_text = ""
     try:
-        if cache_key and cache_key in ANALYSIS_CACHE:
+        cached = analysis_cache.get(cache_key)
+        if cached:
             print(f"✅ CACHE HIT: 캐시된 분석 결과를 사용합니다. (키: {cache_key})")
-            intent_json = ANALYSIS_CACHE[cache_key]['intent_json']
+            intent_json = cached['intent_json']
             query_type = intent_json.get("query_type") # 캐시에서 query_type 가져오기
             handler = QUERY_HANDLERS.get(query_type)
             if handler:
                  # 캐시를 사용할 때는 페이지 정보만 넘겨서 재계산
-                 return jsonify(handler(intent_json, page, user_query, cache_key))
+                 return handler(intent_json, page, user_query, cache_key), 200
         
-        print(f"🔥 CACHE MISS: '{user_query}'에 대해 Gemini API 분석을 요청합니다.")
-        prompt = PROMPT_TEMPLATE.format(user_query=user_query)
-        response = model.generate_content(prompt)
-        raw_text = response.text.strip()
-        try:
-            start = raw_text.find('{')
-            end = raw_text.rfind('}') + 1
-            cleaned_response = raw_text[start:end]
-            intent_json = json.loads(cleaned_response)
-        except (json.JSONDecodeError, IndexError):
-            print("DEBUG: JSON 파싱 실패. 일반 텍스트로 처리합니다.")
-            return jsonify({"analysis_subject": "일반 답변", "result": [raw_text.replace('\n', '<br>')]} )
+        # [성능 최적화] 정형화된 질문은 로컬 규칙으로, 같은(정규화 기준) 질문은 캐시로 처리해 Gemini 호출을 건너뜁니다.
+        if GLOBAL_NAME_TICKER_MAP is None:
+            _load_ticker_maps()
+        intent_json = classify_locally(user_query, GLOBAL_NAME_TICKER_MAP,
+                                       [*FDR_INDICATOR_MAP.keys(), *BOK_INDICATOR_MAP.keys()])
+        intent_source = INTENT_SOURCE_LOCAL
+        if intent_json is not None:
+            print(f"⚡ LOCAL INTENT: '{user_query}' → {intent_json.get('query_type')}")
+        elif not model:
+            return {"error": "모델이 초기화되지 않았습니다. API 키를 확인하세요."}, 500
+        else:
+            intent_json = intent_cache.get(user_query, INTENT_PROMPT_VERSION)
+            intent_source = INTENT_SOURCE_CACHE
+        if intent_json is not None:
+            if intent_source == INTENT_SOURCE_CACHE:
+                print(f"✅ INTENT CACHE HIT: '{user_query}'의 의도 분석 결과를 재사용합니다.")
+        else:
+            intent_source = INTENT_SOURCE_LLM
+            intent_stats.record(intent_source)
+            print(f"🔥 CACHE MISS: '{user_query}'에 대해 Gemini API 분석을 요청합니다.")
+            prompt = PROMPT_TEMPLATE.format(user_query=user_query)
+            response = model.generate_content(prompt)
+            raw_text = response.text.strip()
+            try:
+                start = raw_text.find('{')
+                end = raw_text.rfind('}') + 1
+                cleaned_response = raw_text[start:end]
+                intent_json = json.loads(cleaned_response)
+            except (json.JSONDecodeError, IndexError):
+                print("DEBUG: JSON 파싱 실패. 일반 텍스트로 처리합니다.")
+                return {"analysis_subject": "일반 답변", "result": [raw_text.replace('\n', '<br>')]}, 200
 
         query_type = intent_json.get("query_type")
         
@@ -1399,6 +1472,14 @@ def analyze_query():
             intent_json["query_type"] = query_type
         
         handler = QUERY_HANDLERS.get(query_type)
+        if intent_source != INTENT_SOURCE_LLM:
+            intent_stats.record(intent_source)
+        if handler and raw_text:
+            # 처리기가 있는 구조화된 의도만 저장합니다. (일반 답변은 원문이 필요하므로 제외)
+            intent_cache.put(user_query, INTENT_PROMPT_VERSION, intent_json)
+
+        if on_event:
+            on_event({"type": "intent", "query_intent": intent_json, "intent_source": intent_source})
 
         if handler:
             if query_type in ["stock_analysis", "theme_ranking"]:
@@ -1407,14 +1488,22 @@ def analyze_query():
                 final_result = handler(intent_json)
         else:
             final_result = {"analysis_subject": "일반 답변", "result": [raw_text.replace('\n', '<br>')]}
+        if isinstance(final_result, dict):
+            final_result["intent_source"] = intent_source
         
-        return jsonify(final_result)
+        return final_result, 200
 
     except Exception as e:
         traceback.print_exc()
-        return jsonify({"error": f"분석 중 심각한 오류 발생: {str(e)}"}), 500
+        return {"error": f"분석 중 심각한 오류 발생: {str(e)}"}, 500
     
             
+@askfin_bp.route('/intent_stats')
+def get_intent_stats():
+    """의도 분석 경로별(local/cache/llm) 처리 건수와 LLM 호출을 피한 비율."""
+    return jsonify(intent_stats.snapshot())
+
+
 @askfin_bp.route('/new_chat', methods=['POST'])
 def new_chat():
     """대화 기록(세션)을 초기화합니다."""
@@ -0,0 +1,88 @@
+# blueprints/company_matcher.py
+# 기사 본문 기업명 추출기 - 전체 기업명으로 만든 하나의 트라이(FlashText)로 본문을 한 번만 훑습니다.
+import os
+import pickle
+import re
+
+import pandas as pd
+from flashtext import KeywordProcessor
+
+# 매처 구성 방식이 바뀌면 버전을 올려 저장된 매처를 다시 만들도록 합니다.
+COMPANY_MATCHER_VERSION = 1
+COMPANY_MATCHER_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'company_matcher.pkl')
+CORP_NAMES_PATH = os.path.join(os.path.dirname(__file__), '..', 'data_files', 'corp_names.csv')
+
+STOPWORDS = {"ETF", "ETN", "신탁", "SPAC", "펀드", "리츠"}
+
+# 단어로 취급할 문자들 (한글 음절, 영문, 숫자). 기업명 양옆에 이 문자가 붙어 있으면 다른 단어의 일부로 봅니다.
+BOUNDARY_CHARS = (
+    {chr(c) for c in range(ord('가'), ord('힣') + 1)}
+    | {chr(c) for c in range(ord('A'), ord('Z') + 1)}
+    | {chr(c) for c in range(ord('a'), ord('z') + 1)}
+    | {chr(c) for c in range(ord('0'), ord('9') + 1)}
+)
+
+COPYRIGHT_PATTERN = re.compile(r'ⓒ.*')
+
+
+class CompanyMatcher:
+    """
+    기업명 목록으로 만든 FlashText 트라이 하나로 본문에서 '독립된' 기업명을 찾습니다.
+
+    BOUNDARY_CHARS를 트라이의 단어 문자(non_word_boundaries)로 지정하므로,
+    양옆이 한글/영문/숫자에 붙은 부분 문자열은 탐색 단계에서 바로 걸러집니다.
+    (후보마다 정규식을 만들어 본문을 다시 훑지 않으므로 본문 길이에 선형)
+    """
+
+    def __init__(self, names):
+        processor = KeywordProcessor(case_sensitive=True)
+        processor.set_non_word_boundaries(BOUNDARY_CHARS)
+        count = 0
+        for name in names:
+            name = str(name).strip()
+            if len(name) < 2 or name in STOPWORDS:
+                continue
+            processor.add_keyword(name)
+            count += 1
+        self._processor = processor
+        self.size = count
+
+    def extract(self, text):
+        """본문에 나온 기업명을 등장 순서대로 중복 없이 반환합니다."""
+        if not text:
+            return []
+        cleaned = COPYRIGHT_PATTERN.sub('', text)
+        return list(dict.fromkeys(self._processor.extract_keywords(cleaned)))
+
+
+def _source_signature(path):
+    stat = os.stat(path)
+    return (COMPANY_MATCHER_VERSION, stat.st_size, stat.st_mtime_ns)
+
+
+def load_company_matcher(corp_names_path=CORP_NAMES_PATH):
+    """
+    저장된 매처가 corp_names.csv와 같은 버전이면 그대로 읽고, 아니면 CSV로 새로 만들어 저장합니다.
+    """
+    signature = _source_signature(corp_names_path)
+    if os.path.exists(COMPANY_MATCHER_PATH):
+        try:
+            with open(COMPANY_MATCHER_PATH, 'rb') as f:
+                saved = pickle.load(f)
+            if saved.get('signature') == signature:
+                return saved['matcher']
+        except Exception as e:
+            print(f"⚠️ 저장된 기업명 매처를 읽을 수 없습니다: {e}")
+
+    corp_df = pd.read_csv(corp_names_path, encoding='utf-8-sig')
+    matcher = CompanyMatcher(corp_df['corp_name'].astype(str))
+    try:
+        os.makedirs(os.path.dirname(COMPANY_MATCHER_PATH), exist_ok=True)
+        tmp_path = f"{COMPANY_MATCHER_PATH}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'signature': signature, 'matcher': matcher}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, COMPANY_MATCHER_PATH)
+    except Exception as e:
+        print(f"⚠️ 기업명 매처 저장 실패: {e}")
+    print(f"✅ 기업명 매처 생성 완료: 총 {matcher.size}개 기업명 등록")
+    return matcher
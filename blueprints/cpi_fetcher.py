@@ -1,20 +1,16 @@
-import os
-import requests
+from datetime import datetime
+
 from dotenv import load_dotenv
 
+from blueprints.ecos_client import get_series
+
 load_dotenv()
 
 def get_cpi_data_from_bok():
-    api_key = os.getenv("ECOS_API_KEY")
-    if not api_key:
-        raise ValueError("ECOS_API_KEY가 .env에서 로드되지 않았습니다.")
-
-    url = f"http://ecos.bok.or.kr/api/StatisticSearch/{api_key}/json/kr/1/100/901Y014/2020/2025/0000001/M"
-    response = requests.get(url)
-    data = response.json()
-    rows = data['StatisticSearch']['row']
+    # 2020년부터 이번 달까지의 CPI를 ecos_client 로컬 저장소에서 읽습니다. (마지막 달만 주기적으로 다시 받음)
+    series = get_series("901Y014", "0000001", "M", "202001", datetime.now())
 
-    cpi_dates = [f"{r['TIME'][:4]}-{r['TIME'][4:]}" for r in rows]
-    cpi_values = [float(r['DATA_VALUE']) for r in rows]
+    cpi_dates = [f"{time[:4]}-{time[4:]}" for time in series.index]
+    cpi_values = series.tolist()
 
     return cpi_dates[-12:], cpi_values[-12:]
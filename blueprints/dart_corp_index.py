@@ -0,0 +1,145 @@
+# blueprints/dart_corp_index.py
+# DART 고유번호(corp_code) 색인 - corpCode.xml을 하루 한 번 받아 종목코드/회사명 → corp_code 딕셔너리로 디스크에 보관합니다.
+import io
+import os
+import pickle
+import threading
+import xml.etree.ElementTree as ET
+import zipfile
+from datetime import datetime
+
+import requests
+
+# 색인 구조가 바뀌면 버전을 올려 디스크 파일을 다시 만들도록 합니다.
+DART_CORP_INDEX_VERSION = 1
+DART_CORP_INDEX_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'dart_corp_index.pkl')
+CORP_CODE_URL = "https://opendart.fss.or.kr/api/corpCode.xml"
+DOWNLOAD_TIMEOUT = 60
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+_update_lock = threading.Lock()
+
+
+class DartCorpIndex:
+    """
+    by_stock_code: 6자리 종목코드 → corp_code (상장사만)
+    by_name: 회사명 → corp_code (같은 이름이 여럿이면 상장사, 그다음 최근 변경된 회사를 우선)
+    """
+
+    def __init__(self, by_stock_code, by_name, built_at):
+        self.by_stock_code = by_stock_code
+        self.by_name = by_name
+        self.built_at = built_at
+
+    def is_fresh(self):
+        return self.built_at.date() == datetime.now().date()
+
+    def lookup(self, stock_code=None, corp_name=None):
+        """종목코드를 우선 사용하고, 없으면 회사명(정확히 일치)으로 찾습니다. 없으면 None."""
+        if stock_code and stock_code in self.by_stock_code:
+            return self.by_stock_code[stock_code]
+        if corp_name:
+            return self.by_name.get(str(corp_name).strip())
+        return None
+
+
+def _download_corp_codes(api_key):
+    """corpCode.xml(zip)을 받아 (corp_code, corp_name, stock_code, modify_date) 목록으로 반환합니다."""
+    res = requests.get(CORP_CODE_URL, params={'crtfc_key': api_key}, timeout=DOWNLOAD_TIMEOUT)
+    res.raise_for_status()
+    with zipfile.ZipFile(io.BytesIO(res.content)) as zf:
+        xml_bytes = zf.read(zf.namelist()[0])
+    rows = []
+    for node in ET.fromstring(xml_bytes).iter('list'):
+        rows.append((
+            (node.findtext('corp_code') or '').strip(),
+            (node.findtext('corp_name') or '').strip(),
+            (node.findtext('stock_code') or '').strip(),
+            (node.findtext('modify_date') or '').strip(),
+        ))
+    return rows
+
+
+def build_corp_index(api_key):
+    rows = _download_corp_codes(api_key)
+    by_stock_code = {stock_code: corp_code for corp_code, _, stock_code, _ in rows if stock_code}
+    by_name = {}
+    # 상장사 → 최근 변경일 순으로 정렬한 뒤 먼저 나온 것을 남깁니다.
+    for corp_code, corp_name, stock_code, _ in sorted(rows, key=lambda r: (bool(r[2]), r[3]), reverse=True):
+        if corp_name:
+            by_name.setdefault(corp_name, corp_code)
+    return DartCorpIndex(by_stock_code, by_name, datetime.now())
+
+
+def _save_index(index):
+    os.makedirs(os.path.dirname(DART_CORP_INDEX_PATH), exist_ok=True)
+    tmp_path = f"{DART_CORP_INDEX_PATH}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': DART_CORP_INDEX_VERSION, 'index': index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, DART_CORP_INDEX_PATH)
+
+
+def _load_index_from_disk():
+    if not os.path.exists(DART_CORP_INDEX_PATH):
+        return None
+    try:
+        with open(DART_CORP_INDEX_PATH, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') == DART_CORP_INDEX_VERSION:
+            return saved['index']
+    except Exception as e:
+        print(f"⚠️ DART 고유번호 색인을 읽을 수 없습니다: {e}")
+    return None
+
+
+def get_corp_index():
+    """메모리 색인을 반환합니다. 최초 호출 시 디스크에서 읽고, 없으면 None."""
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            _index = _load_index_from_disk()
+            _index_loaded = True
+    return _index
+
+
+def update_corp_index():
+    """
+    색인이 없거나 오늘 만든 것이 아니면 새로 받아 교체합니다. (스케줄러 작업)
+    이미 다른 스레드가 갱신 중이면 기다리지 않고 현재 색인을 반환합니다.
+    """
+    global _index, _index_loaded
+    current = get_corp_index()
+    if current is not None and current.is_fresh():
+        return current
+    if not _update_lock.acquire(blocking=False):
+        print("ℹ️ DART 고유번호 색인 갱신이 이미 진행 중입니다.")
+        return current
+    try:
+        api_key = os.getenv("DART_API_KEY")
+        if not api_key:
+            print("⚠️ DART API 키가 없어 고유번호 색인을 만들 수 없습니다.")
+            return current
+        index = build_corp_index(api_key)
+        _save_index(index)
+        with _index_lock:
+            _index = index
+            _index_loaded = True
+        print(f"✅ DART 고유번호 색인 갱신 완료: 상장사 {len(index.by_stock_code)}개, 회사명 {len(index.by_name)}개")
+        return index
+    except Exception as e:
+        print(f"❌ DART 고유번호 색인 갱신 실패: {e}")
+        return current
+    finally:
+        _update_lock.release()
+
+
+def lookup_corp_code(stock_code=None, corp_name=None):
+    """종목코드/회사명 → DART corp_code. 색인이 아직 없으면 한 번 동기적으로 만듭니다."""
+    index = get_corp_index() or update_corp_index()
+    if index is None:
+        return None
+    return index.lookup(stock_code=stock_code, corp_name=corp_name)
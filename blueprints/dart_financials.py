@@ -0,0 +1,202 @@
+# blueprints/dart_financials.py
+# DART 단일회사 주요계정(fnlttSinglAcnt)/공시목록 클라이언트 - 공용 커넥션 풀로 연도×보고서 조합을 동시에 받고,
+# 응답을 (corp_code, bsns_year, reprt_code, fs_div) 단위로 디스크(SQLite)에 보관합니다.
+import concurrent.futures
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 저장 형식이 바뀌면 버전을 올려 기존 응답을 무시하도록 합니다.
+DART_FS_CACHE_VERSION = 1
+DART_FS_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'dart_financials.sqlite3')
+DART_FS_URL = "https://opendart.fss.or.kr/api/fnlttSinglAcnt.json"
+DART_LIST_URL = "https://opendart.fss.or.kr/api/list.json"
+
+FETCH_WORKERS = int(os.getenv("DART_FETCH_WORKERS", "6"))
+FETCH_TIMEOUT = 10
+# 아직 공시될 수 있는 기간의 '데이터 없음' 응답은 이 시간이 지나면 다시 조회합니다.
+PENDING_RECHECK_HOURS = 12
+
+# 보고서 코드: 사업보고서, 1분기, 반기, 3분기
+REPORT_ANNUAL = '11011'
+REPORT_Q1 = '11013'
+REPORT_HALF = '11012'
+REPORT_Q3 = '11014'
+
+STATUS_OK = '000'
+STATUS_NO_DATA = '013'
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=FETCH_WORKERS * 2))
+
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="dart-fs")
+
+_db_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(DART_FS_CACHE_PATH), exist_ok=True)
+        conn = sqlite3.connect(DART_FS_CACHE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS statements ("
+            " corp_code TEXT, bsns_year TEXT, reprt_code TEXT, fs_div TEXT, version INTEGER,"
+            " status TEXT, items TEXT, final INTEGER, fetched_at TEXT,"
+            " PRIMARY KEY (corp_code, bsns_year, reprt_code, fs_div))"
+        )
+        conn.execute("DELETE FROM statements WHERE version != ?", (DART_FS_CACHE_VERSION,))
+        conn.commit()
+        _conn = conn
+    return _conn
+
+
+def _filing_deadline(bsns_year, reprt_code):
+    """보고서 제출 기한(여유 포함). 이 날이 지나면 '데이터 없음'도 더 바뀌지 않는다고 봅니다."""
+    year = int(bsns_year)
+    return {
+        REPORT_ANNUAL: date(year + 1, 4, 30),
+        REPORT_Q1: date(year, 6, 30),
+        REPORT_HALF: date(year, 9, 30),
+        REPORT_Q3: date(year, 12, 31),
+    }.get(reprt_code, date(year + 1, 4, 30))
+
+
+def _is_final(status, bsns_year, reprt_code):
+    # 제출된 재무제표는 바뀌지 않으므로 영구 보관하고, '데이터 없음'은 제출 기한이 지난 뒤에만 확정합니다.
+    if status == STATUS_OK:
+        return True
+    return date.today() > _filing_deadline(bsns_year, reprt_code)
+
+
+def _load_cached(keys):
+    """{key: (status, items)} 중 아직 유효한 것만 반환합니다. key = (corp_code, bsns_year, reprt_code, fs_div)"""
+    if not keys:
+        return {}
+    recheck_cutoff = (datetime.now() - timedelta(hours=PENDING_RECHECK_HOURS)).isoformat(timespec='seconds')
+    found = {}
+    try:
+        with _db_lock:
+            conn = _connect()
+            for key in keys:
+                row = conn.execute(
+                    "SELECT status, items, final, fetched_at FROM statements"
+                    " WHERE corp_code = ? AND bsns_year = ? AND reprt_code = ? AND fs_div = ?", key
+                ).fetchone()
+                if row is None:
+                    continue
+                status, items, final, fetched_at = row
+                if final or fetched_at >= recheck_cutoff:
+                    found[key] = (status, json.loads(items) if items else [])
+    except Exception as e:
+        print(f"⚠️ DART 재무제표 캐시 조회 실패: {e}")
+    return found
+
+
+def _store(results):
+    if not results:
+        return
+    now = datetime.now().isoformat(timespec='seconds')
+    rows = [
+        (*key, DART_FS_CACHE_VERSION, status, json.dumps(items, ensure_ascii=False),
+         int(_is_final(status, key[1], key[2])), now)
+        for key, (status, items) in results.items()
+    ]
+    try:
+        with _db_lock:
+            conn = _connect()
+            conn.executemany(
+                "INSERT OR REPLACE INTO statements (corp_code, bsns_year, reprt_code, fs_div, version,"
+                " status, items, final, fetched_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            conn.commit()
+    except Exception as e:
+        print(f"⚠️ DART 재무제표 캐시 저장 실패: {e}")
+
+
+def _request(api_key, key):
+    corp_code, bsns_year, reprt_code, fs_div = key
+    params = {'crtfc_key': api_key, 'corp_code': corp_code, 'bsns_year': bsns_year,
+              'reprt_code': reprt_code, 'fs_div': fs_div}
+    data = _session.get(DART_FS_URL, params=params, timeout=FETCH_TIMEOUT).json()
+    return data.get('status'), data.get('list') or []
+
+
+def fetch_statements(api_key, keys):
+    """
+    여러 (corp_code, bsns_year, reprt_code, fs_div) 응답을 {key: (status, items)}로 반환합니다.
+    캐시에 없는 조합만 동시에 요청하며, 정상/데이터 없음 응답만 저장합니다. (요청 실패한 조합은 결과에서 빠짐)
+    """
+    keys = list(dict.fromkeys(keys))
+    results = _load_cached(keys)
+    missing = [key for key in keys if key not in results]
+    if not missing:
+        return results
+
+    fetched = {}
+    futures = {_executor.submit(_request, api_key, key): key for key in missing}
+    for future in concurrent.futures.as_completed(futures):
+        key = futures[future]
+        try:
+            status, items = future.result()
+        except Exception as e:
+            print(f"⚠️ DART 재무제표 조회 실패 {key}: {e}")
+            continue
+        if status in (STATUS_OK, STATUS_NO_DATA):
+            fetched[key] = (status, items)
+        else:
+            print(f"⚠️ DART 재무제표 응답 오류 {key}: status={status}")
+    _store(fetched)
+    results.update(fetched)
+    return results
+
+
+def _report_date_key(item):
+    if item.get('thstrm_end_dt'):
+        return item['thstrm_end_dt']
+    if item.get('thstrm_dt'):
+        date_range_str = item['thstrm_dt'].strip()
+        match = re.search(r'(\d{4}\.\d{2}\.\d{2})$', date_range_str)
+        return match.group(1) if match else date_range_str
+    return None
+
+
+def fetch_key_accounts(api_key, corp_code, years, reprt_codes=(REPORT_ANNUAL, REPORT_Q1, REPORT_HALF)):
+    """
+    연도마다 reprt_codes 순서대로 처음 데이터가 있는 보고서의 주요계정을 모아 반환합니다.
+    (보고서마다 연결(CFS)을 우선하고, 없으면 별도(OFS)를 사용) 각 항목에는 report_date_key가 붙습니다.
+    """
+    grid = [(corp_code, str(year), reprt_code) for year in years for reprt_code in reprt_codes]
+    results = fetch_statements(api_key, [(*cell, 'CFS') for cell in grid])
+    # 연결재무제표가 없는 조합만 별도재무제표로 한 번 더 (동시에) 조회합니다.
+    ofs_keys = [(*cell, 'OFS') for cell in grid if not results.get((*cell, 'CFS'), (None, []))[1]]
+    if ofs_keys:
+        results.update(fetch_statements(api_key, ofs_keys))
+
+    items = []
+    for year in years:
+        for reprt_code in reprt_codes:
+            cell = (corp_code, str(year), reprt_code)
+            found = results.get((*cell, 'CFS'), (None, []))[1] or results.get((*cell, 'OFS'), (None, []))[1]
+            if found:
+                items.extend({**item, 'report_date_key': _report_date_key(item)} for item in found)
+                break
+    return items
+
+
+def fetch_recent_filings(api_key, corp_code, bgn_de, count=15):
+    """최근 공시 목록(최종 보고서만, 최신순). 최근 공시는 계속 바뀌므로 디스크에 저장하지 않습니다."""
+    params = {'crtfc_key': api_key, 'corp_code': corp_code, 'bgn_de': bgn_de,
+              'last_reprt_at': 'Y', 'page_no': 1, 'page_count': count}
+    data = _session.get(DART_LIST_URL, params=params, timeout=FETCH_TIMEOUT).json()
+    if data.get('status') not in (STATUS_OK, STATUS_NO_DATA):
+        raise ValueError(f"DART 공시 목록 조회 실패: {data.get('message', data.get('status'))}")
+    return data.get('list') or []
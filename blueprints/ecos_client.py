@@ -0,0 +1,219 @@
+# blueprints/ecos_client.py
+# 한국은행 ECOS 클라이언트 - (통계표, 항목, 주기)별 시계열을 로컬 저장소(SQLite)에 누적하고,
+# 이미 지난 기간은 다시 받지 않고 마지막 기간 이후만 주기적으로 새로 받습니다.
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from blueprints.singleflight import coalesced
+
+# 저장 형식이 바뀌면 버전을 올려 저장된 시계열을 새로 받도록 합니다.
+ECOS_STORE_VERSION = 1
+ECOS_STORE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'ecos_series.sqlite3')
+ECOS_BASE_URL = "https://ecos.bok.or.kr/api"
+FETCH_TIMEOUT = 10
+MAX_ROWS = 10000
+
+# 마지막 기간(아직 바뀔 수 있는 구간)을 다시 확인하는 간격
+REFRESH_INTERVALS = {
+    'D': timedelta(hours=1),
+    'M': timedelta(hours=6),
+    'Q': timedelta(hours=12),
+    'A': timedelta(days=1),
+}
+KEY_STATISTICS_TTL = timedelta(hours=1)
+
+# 예전 ECOS 주기 코드 → 현재 코드
+_CYCLE_ALIASES = {'DD': 'D', 'MM': 'M', 'QQ': 'Q', 'YY': 'A'}
+
+_session = requests.Session()
+_session.mount("https://", HTTPAdapter(pool_connections=2, pool_maxsize=8))
+
+_db_lock = threading.Lock()
+_conn = None
+
+
+def _connect():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(ECOS_STORE_PATH), exist_ok=True)
+        conn = sqlite3.connect(ECOS_STORE_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        if conn.execute("PRAGMA user_version").fetchone()[0] != ECOS_STORE_VERSION:
+            conn.executescript(
+                "DROP TABLE IF EXISTS observations; DROP TABLE IF EXISTS series; DROP TABLE IF EXISTS key_statistics;"
+                "CREATE TABLE observations ("
+                " stats_code TEXT, item_code TEXT, cycle TEXT, time TEXT, value REAL,"
+                " PRIMARY KEY (stats_code, item_code, cycle, time));"
+                "CREATE TABLE series ("
+                " stats_code TEXT, item_code TEXT, cycle TEXT, covered_from TEXT, covered_to TEXT, refreshed_at TEXT,"
+                " PRIMARY KEY (stats_code, item_code, cycle));"
+                "CREATE TABLE key_statistics (id INTEGER PRIMARY KEY, items TEXT, fetched_at TEXT);"
+                f"PRAGMA user_version = {ECOS_STORE_VERSION};"
+            )
+        _conn = conn
+    return _conn
+
+
+class EcosApiKeyError(ValueError):
+    """ECOS_API_KEY가 없어 조회할 수 없음. (저장된 값으로 대신하지 않고 호출 측에 알립니다)"""
+
+
+def _api_key():
+    api_key = os.getenv("ECOS_API_KEY")
+    if not api_key:
+        raise EcosApiKeyError("ECOS_API_KEY가 설정되지 않았습니다.")
+    return api_key
+
+
+def normalize_cycle(cycle):
+    cycle = str(cycle).upper()
+    return _CYCLE_ALIASES.get(cycle, cycle)
+
+
+def period_str(value, cycle):
+    """datetime(또는 문자열)을 ECOS 주기별 기간 문자열로 바꿉니다. (D: YYYYMMDD, M: YYYYMM, Q: YYYYQn, A: YYYY)"""
+    if isinstance(value, str):
+        return value
+    cycle = normalize_cycle(cycle)
+    if cycle == 'D':
+        return value.strftime('%Y%m%d')
+    if cycle == 'M':
+        return value.strftime('%Y%m')
+    if cycle == 'Q':
+        return f"{value.year}Q{(value.month - 1) // 3 + 1}"
+    return value.strftime('%Y')
+
+
+def _fetch_rows(stats_code, item_code, cycle, start, end):
+    """StatisticSearch 원본 행 목록. '데이터 없음' 응답은 빈 목록."""
+    url = (f"{ECOS_BASE_URL}/StatisticSearch/{_api_key()}/json/kr/1/{MAX_ROWS}/"
+           f"{stats_code}/{cycle}/{start}/{end}/{item_code}")
+    data = _session.get(url, timeout=FETCH_TIMEOUT).json()
+    if 'StatisticSearch' in data:
+        return data['StatisticSearch'].get('row', [])
+    result = data.get('RESULT', {})
+    if result.get('CODE') == 'INFO-200':  # 해당하는 데이터가 없음
+        return []
+    raise ValueError(f"ECOS 응답 오류: {result.get('CODE')} {result.get('MESSAGE')}")
+
+
+def _store_rows(key, rows):
+    values = []
+    for row in rows:
+        try:
+            values.append((*key, row['TIME'], float(row['DATA_VALUE'])))
+        except (KeyError, TypeError, ValueError):
+            continue
+    if values:
+        _connect().executemany(
+            "INSERT OR REPLACE INTO observations (stats_code, item_code, cycle, time, value) VALUES (?, ?, ?, ?, ?)",
+            values
+        )
+
+
+def _refresh_series(stats_code, item_code, cycle, start, end):
+    """
+    저장소가 [start, end]를 덮도록 필요한 구간만 받습니다.
+    - 저장된 범위보다 앞선 구간: 한 번 받으면 끝 (지난 기간은 바뀌지 않는다고 봄)
+    - 마지막 저장 기간 이후: 범위를 넘는 요청이 오거나 REFRESH_INTERVALS가 지났을 때만 다시 받음
+    """
+    key = (stats_code, item_code, cycle)
+    now = datetime.now()
+    with _db_lock:
+        conn = _connect()
+        meta = conn.execute(
+            "SELECT covered_from, covered_to, refreshed_at FROM series WHERE stats_code = ? AND item_code = ? AND cycle = ?",
+            key
+        ).fetchone()
+        last_time = conn.execute(
+            "SELECT MAX(time) FROM observations WHERE stats_code = ? AND item_code = ? AND cycle = ?", key
+        ).fetchone()[0]
+
+    ranges = []
+    if meta is None:
+        ranges.append((start, end))
+        covered_from, covered_to, refreshed_at = start, end, now
+    else:
+        covered_from, covered_to, refreshed_at = meta[0], meta[1], datetime.fromisoformat(meta[2])
+        if start < covered_from:
+            ranges.append((start, covered_from))
+            covered_from = start
+        stale = now - refreshed_at > REFRESH_INTERVALS.get(cycle, timedelta(hours=6))
+        if end > covered_to or stale:
+            ranges.append((min(last_time or covered_from, end), max(end, covered_to)))
+            covered_to = max(end, covered_to)
+            refreshed_at = now
+    if not ranges:
+        return
+
+    fetched = [_fetch_rows(stats_code, item_code, cycle, s, e) for s, e in ranges]
+    with _db_lock:
+        conn = _connect()
+        for rows in fetched:
+            _store_rows(key, rows)
+        conn.execute(
+            "INSERT OR REPLACE INTO series (stats_code, item_code, cycle, covered_from, covered_to, refreshed_at)"
+            " VALUES (?, ?, ?, ?, ?, ?)", (*key, covered_from, covered_to, refreshed_at.isoformat(timespec='seconds'))
+        )
+        conn.commit()
+    print(f"DEBUG: ECOS {stats_code}/{item_code}/{cycle} 구간 {ranges} 갱신 ({sum(len(r) for r in fetched)}행)")
+
+
+def get_series(stats_code, item_code, cycle, start, end):
+    """
+    ECOS 시계열을 pd.Series(인덱스: 기간 문자열 'TIME', 값: float)로 반환합니다.
+    start/end는 datetime 또는 주기에 맞는 기간 문자열. 조회/응답 오류(요청 한도 초과 등) 시 저장된 값만으로 응답합니다.
+    """
+    cycle = normalize_cycle(cycle)
+    start, end = period_str(start, cycle), period_str(end, cycle)
+    try:
+        coalesced(_refresh_series, stats_code, item_code, cycle, start, end)
+    except EcosApiKeyError:
+        raise
+    except Exception as e:
+        print(f"⚠️ ECOS 조회 실패({stats_code}/{item_code}/{cycle}), 저장된 값을 사용합니다: {e}")
+    with _db_lock:
+        rows = _connect().execute(
+            "SELECT time, value FROM observations WHERE stats_code = ? AND item_code = ? AND cycle = ?"
+            " AND time >= ? AND time <= ? ORDER BY time",
+            (stats_code, item_code, cycle, start, end)
+        ).fetchall()
+    return pd.Series([value for _, value in rows], index=[time for time, _ in rows], dtype=float, name='DATA_VALUE')
+
+
+def _fetch_key_statistics():
+    url = f"{ECOS_BASE_URL}/KeyStatisticList/{_api_key()}/json/kr/1/100/"
+    data = _session.get(url, timeout=FETCH_TIMEOUT).json()
+    rows = data.get('KeyStatisticList', {}).get('row', [])
+    return [
+        {name: (row.get(name) if row.get(name) not in (None, '') else 'N/A')
+         for name in ("CLASS_NAME", "KEYSTAT_NAME", "DATA_VALUE", "CYCLE", "UNIT_NAME")}
+        for row in rows
+    ]
+
+
+def get_key_statistics():
+    """ECOS 100대 주요 통계 현재값 목록. KEY_STATISTICS_TTL 동안은 저장된 목록을 사용합니다."""
+    with _db_lock:
+        row = _connect().execute("SELECT items, fetched_at FROM key_statistics WHERE id = 1").fetchone()
+    if row and datetime.now() - datetime.fromisoformat(row[1]) < KEY_STATISTICS_TTL:
+        return json.loads(row[0])
+    try:
+        items = coalesced(_fetch_key_statistics)
+    except Exception as e:
+        print(f"⚠️ ECOS 주요 통계 조회 실패: {e}")
+        return json.loads(row[0]) if row else []
+    if items:
+        with _db_lock:
+            conn = _connect()
+            conn.execute("INSERT OR REPLACE INTO key_statistics (id, items, fetched_at) VALUES (1, ?, ?)",
+                         (json.dumps(items, ensure_ascii=False), datetime.now().isoformat(timespec='seconds')))
+            conn.commit()
+    return items
@@ -0,0 +1,69 @@
+# blueprints/finance_keywords.py
+# 금융 키워드(data_files/finance.csv) 다중 패턴 매처와 제목 우선 기사 선별
+import os
+import re
+
+import pandas as pd
+
+FINANCE_CSV_PATH = os.path.join(os.path.dirname(__file__), '..', 'data_files', 'finance.csv')
+
+# 제목이 이 길이(공백 제외)보다 짧으면 제목만으로 판단하기 어렵다고 보고 본문까지 확인합니다.
+AMBIGUOUS_TITLE_LENGTH = 12
+
+TITLE_PASS = "pass"
+TITLE_AMBIGUOUS = "ambiguous"
+TITLE_REJECT = "reject"
+
+
+class KeywordMatcher:
+    """
+    키워드 전체를 하나의 정규식(긴 키워드 우선 alternation)으로 컴파일해, 텍스트를 한 번만 훑어 찾습니다.
+    (대소문자 무시)
+    """
+
+    def __init__(self, keywords):
+        self.keywords = {str(k).lower().strip() for k in keywords if str(k).strip()}
+        alternation = "|".join(re.escape(k) for k in sorted(self.keywords, key=len, reverse=True))
+        self._pattern = re.compile(alternation, re.IGNORECASE) if alternation else None
+
+    def matches(self, text):
+        """키워드가 하나라도 있으면 True."""
+        return bool(text) and self._pattern is not None and self._pattern.search(text) is not None
+
+    def hits(self, text):
+        """텍스트에 등장한 서로 다른 키워드 집합."""
+        if not text or self._pattern is None:
+            return set()
+        return {m.group(0).lower() for m in self._pattern.finditer(text)}
+
+
+def _load_finance_keywords():
+    finance_df = pd.read_csv(FINANCE_CSV_PATH, encoding="utf-8-sig")
+    # CSV에 'keyword' 컬럼이 있다고 가정
+    return set(finance_df['keyword'].dropna().astype(str).str.lower().str.strip())
+
+
+FINANCE_KEYWORDS = _load_finance_keywords()
+finance_matcher = KeywordMatcher(FINANCE_KEYWORDS)
+
+
+def classify_title(item):
+    """
+    [1단계] 제목과 언론사명만으로 기사를 분류합니다.
+    - pass: 금융 키워드가 있음 → 본문은 기업명/감성 분석용으로만 받음
+    - ambiguous: 키워드는 없지만 제목이 너무 짧아 판단 보류 → 본문까지 확인
+    - reject: 충분히 긴 제목에 키워드가 없음 → 본문을 받지 않고 제외
+    """
+    title = item.get("title") or ""
+    if finance_matcher.matches(f"{title} {item.get('press') or ''}"):
+        return TITLE_PASS
+    if len(re.sub(r"\s+", "", title)) < AMBIGUOUS_TITLE_LENGTH:
+        return TITLE_AMBIGUOUS
+    return TITLE_REJECT
+
+
+def prefilter_by_title(items):
+    """본문을 받을 후보(pass/ambiguous)만 원래 순서대로 남깁니다."""
+    candidates = [item for item in items if classify_title(item) != TITLE_REJECT]
+    print(f"DEBUG: 제목 1차 선별: {len(items)}개 중 {len(candidates)}개 기사만 본문 확인")
+    return candidates
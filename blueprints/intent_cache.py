@@ -0,0 +1,129 @@
+# blueprints/intent_cache.py
+# AskFin 질의 의도(intent_json) 디스크 캐시 - 정규화한 질문을 키로 Gemini 분석 결과를 재사용합니다.
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# 저장 형식이 바뀌면 버전을 올려 기존 레코드를 무시하도록 합니다.
+INTENT_CACHE_VERSION = 1
+INTENT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'intent_cache.sqlite3')
+INTENT_CACHE_TTL_HOURS = int(os.getenv("INTENT_CACHE_TTL_HOURS", "24"))
+INTENT_CACHE_MAX_ENTRIES = int(os.getenv("INTENT_CACHE_MAX_ENTRIES", "5000"))
+
+# 어절 끝에서 떼어 낼 조사/종결어미 (긴 것부터 검사)
+PARTICLES = sorted(
+    ["은", "는", "이", "가", "을", "를", "의", "에", "에서", "에게", "으로", "로", "와", "과", "도", "만",
+     "요", "야", "이야", "이요", "인가요", "인가", "나요"],
+    key=len, reverse=True,
+)
+# 문장부호 제거. 단, 숫자 앞의 '.'/'-' (1.5, -3%)와 '%'는 의미가 있으므로 남깁니다.
+_PUNCT_PATTERN = re.compile(r"[^\w\s.%\-]|[.\-](?!\d)")
+
+
+def _strip_particle(token):
+    for particle in PARTICLES:
+        # 조사를 뗀 뒤에도 두 글자 이상 남을 때만 뗍니다. ('주가', '시가' 같은 단어 보호)
+        if token.endswith(particle) and len(token) - len(particle) >= 2:
+            return token[:-len(particle)]
+    return token
+
+
+def normalize_query(query):
+    """
+    '삼성전자 지금 얼마야?', '삼성전자  지금 얼마 ', '삼성전자가 지금 얼마야' 를 같은 문자열로 만듭니다.
+    (소문자화 → 문장부호 제거 → 어절별 조사 제거 → 공백 제거)
+    """
+    text = _PUNCT_PATTERN.sub(" ", str(query or "").lower())
+    return "".join(_strip_particle(token) for token in text.split())
+
+
+def prompt_version(prompt_template, model_name):
+    """프롬프트나 모델이 바뀌면 이전 분석 결과를 쓰지 않도록 하는 식별자."""
+    return hashlib.sha256(f"{model_name}\n{prompt_template}".encode('utf-8')).hexdigest()[:12]
+
+
+class IntentCache:
+    """
+    normalize_query(질문) → intent_json 을 저장하는 SQLite 캐시.
+
+    - TTL(INTENT_CACHE_TTL_HOURS)이 지난 레코드와 prompt_version이 다른 레코드는 사용하지 않습니다.
+    - 레코드가 INTENT_CACHE_MAX_ENTRIES를 넘으면 가장 오래 쓰지 않은 것부터 지웁니다.
+    """
+
+    def __init__(self, path=INTENT_CACHE_PATH, ttl_hours=INTENT_CACHE_TTL_HOURS, max_entries=INTENT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS intents ("
+                " key TEXT PRIMARY KEY, version INTEGER, prompt_version TEXT, query TEXT,"
+                " intent TEXT, created_at TEXT, used_at TEXT, hits INTEGER DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_intents_used_at ON intents (used_at)")
+            cutoff = (datetime.now() - self.ttl).isoformat(timespec='seconds')
+            conn.execute("DELETE FROM intents WHERE created_at < ? OR version != ?", (cutoff, INTENT_CACHE_VERSION))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, query, version):
+        """캐시된 intent_json dict. 없거나 만료되었으면 None."""
+        key = normalize_query(query)
+        if not key:
+            return None
+        now = datetime.now()
+        cutoff = (now - self.ttl).isoformat(timespec='seconds')
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT intent FROM intents WHERE key = ? AND version = ? AND prompt_version = ? AND created_at >= ?",
+                    (key, INTENT_CACHE_VERSION, version, cutoff)
+                ).fetchone()
+                if row is None:
+                    return None
+                conn.execute("UPDATE intents SET used_at = ?, hits = hits + 1 WHERE key = ?",
+                             (now.isoformat(timespec='seconds'), key))
+                conn.commit()
+            return json.loads(row[0])
+        except Exception as e:
+            print(f"⚠️ 질의 의도 캐시 조회 실패: {e}")
+            return None
+
+    def put(self, query, version, intent_json):
+        key = normalize_query(query)
+        if not key:
+            return
+        now = datetime.now().isoformat(timespec='seconds')
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO intents (key, version, prompt_version, query, intent, created_at, used_at, hits)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, 0)",
+                    (key, INTENT_CACHE_VERSION, version, query, json.dumps(intent_json, ensure_ascii=False), now, now)
+                )
+                count = conn.execute("SELECT COUNT(*) FROM intents").fetchone()[0]
+                if count > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM intents WHERE key IN (SELECT key FROM intents ORDER BY used_at ASC LIMIT ?)",
+                        (count - self.max_entries,)
+                    )
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ 질의 의도 캐시 저장 실패: {e}")
+
+
+intent_cache = IntentCache()
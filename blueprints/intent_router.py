@@ -0,0 +1,128 @@
+# blueprints/intent_router.py
+# AskFin 로컬 의도 분류기 - 정형화된 질문(종목 현재가, 지표 조회, 테마 순위)은 Gemini 호출 없이 규칙으로 intent_json을 만듭니다.
+import re
+import threading
+
+# 의도 분석 경로
+INTENT_SOURCE_LOCAL = "local"
+INTENT_SOURCE_CACHE = "cache"
+INTENT_SOURCE_LLM = "llm"
+
+_PUNCT_PATTERN = re.compile(r"[^0-9A-Za-z가-힣&]")
+
+# 기간 표현 (parse_period가 해석할 수 있는 것만)
+_PERIOD_PATTERN = re.compile(r"오늘|어제|이번주|지난주|지난달|(?:지난|최근)?\d+(?:일|개월|년)(?:간|동안)?|최근")
+
+
+def _filler_pattern(words):
+    # 남은 문자열이 허용 단어들만으로 이루어졌는지 확인하는 정규식 (긴 단어 우선)
+    alternation = "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+    return re.compile(f"(?:{alternation})*")
+
+
+# 종목 현재가: '삼성전자 지금 얼마야?', '한화오션 주가 알려줄래', '에코프로비엠 현재 주가'
+_PRICE_WORDS = ("주가", "가격", "시세", "현재가", "얼마")
+_PRICE_FILLER = _filler_pattern([
+    *_PRICE_WORDS, "지금", "현재", "오늘", "알려줘", "알려줄래", "알려주세요", "보여줘", "좀", "어때",
+    "야", "요", "에요", "예요", "인가요", "임", "는", "은", "의", "가", "이",
+])
+
+# 지표 조회: '최근 CPI 지수 알려줘', '환율 얼마야', '코스피 지수'
+_INDICATOR_FILLER = _filler_pattern([
+    "지수", "현재", "지금", "추이", "조회", "얼마", "알려줘", "알려줄래", "알려주세요", "보여줘", "좀", "어때",
+    "야", "요", "는", "은", "의", "가", "이",
+])
+
+# 테마 순위: '가장 많이 오른 테마들 나열해줘', '이번주 하락률 높은 테마 순위'
+_THEME_RANK_WORDS = ("오른", "올랐던", "상승", "내린", "내렸던", "하락", "떨어진", "순위", "랭킹")
+_THEME_FILLER = _filler_pattern([
+    *_THEME_RANK_WORDS, "테마", "테마들", "가장", "제일", "많이", "크게", "높은", "낮은", "률", "수익률",
+    "상위", "하위", "시가총액", "시총", "가중", "기준", "순", "나열해줘", "알려줘", "보여줘", "뭐야", "좀",
+    "는", "은", "가", "이", "들",
+])
+
+
+def _compact(text):
+    return _PUNCT_PATTERN.sub("", text or "")
+
+
+def _extract_period(compact):
+    """첫 번째 기간 표현과 그 표현을 뺀 나머지 문자열."""
+    match = _PERIOD_PATTERN.search(compact)
+    if not match:
+        return None, compact
+    return match.group(0), compact[:match.start()] + compact[match.end():]
+
+
+def _match_stock_price(compact, name_ticker_map):
+    if not name_ticker_map:
+        return None
+    # 앞에서부터 가장 긴 종목명을 찾습니다. ('삼성전자우'가 '삼성전자'보다 우선)
+    for end in range(min(len(compact), 30), 1, -1):
+        name = compact[:end]
+        if name in name_ticker_map:
+            rest = compact[end:]
+            if any(w in rest for w in _PRICE_WORDS) and _PRICE_FILLER.fullmatch(rest):
+                return {"query_type": "single_stock_price", "period": None, "condition": None,
+                        "target": name, "action": "현재가 조회"}
+            return None
+    return None
+
+
+def _match_indicator(compact, indicator_keys):
+    lowered = compact.lower()
+    period, rest = _extract_period(lowered)
+    for key in sorted(indicator_keys, key=len, reverse=True):
+        if key in rest:
+            remainder = rest.replace(key, "", 1)
+            if _INDICATOR_FILLER.fullmatch(remainder):
+                return {"query_type": "indicator_lookup", "period": period, "condition": None,
+                        "target": key, "action": "조회"}
+            return None
+    return None
+
+
+def _match_theme_ranking(compact):
+    if "테마" not in compact:
+        return None
+    period, rest = _extract_period(compact)
+    if not any(w in rest for w in _THEME_RANK_WORDS) or not _THEME_FILLER.fullmatch(rest):
+        return None
+    # execute_theme_ranking은 action 문자열에서 정렬 방향(내린/하락/낮은)과 시가총액 가중 여부를 읽습니다.
+    return {"query_type": "theme_ranking", "period": period, "condition": None, "target": "테마", "action": rest}
+
+
+def classify_locally(user_query, name_ticker_map, indicator_keys):
+    """
+    질문 전체가 알려진 정형 패턴으로만 이루어졌을 때 intent_json을 반환합니다.
+    패턴 밖의 단어가 하나라도 남으면(확신할 수 없으면) None → Gemini로 넘깁니다.
+    """
+    compact = _compact(user_query)
+    if not compact:
+        return None
+    return (_match_indicator(compact, indicator_keys)
+            or _match_stock_price(compact, name_ticker_map)
+            or _match_theme_ranking(compact))
+
+
+class IntentStats:
+    """의도 분석 경로별 처리 건수. (LLM 호출을 얼마나 줄였는지 확인용)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {INTENT_SOURCE_LOCAL: 0, INTENT_SOURCE_CACHE: 0, INTENT_SOURCE_LLM: 0}
+
+    def record(self, source):
+        with self._lock:
+            self._counts[source] = self._counts.get(source, 0) + 1
+
+    def snapshot(self):
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        avoided = total - counts.get(INTENT_SOURCE_LLM, 0)
+        return {"counts": counts, "total": total,
+                "llm_avoided_ratio": round(avoided / total, 4) if total else None}
+
+
+intent_stats = IntentStats()
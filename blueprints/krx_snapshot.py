@@ -0,0 +1,115 @@
+# blueprints/krx_snapshot.py
+# KRX 종목 목록 / 코드↔이름 매핑 디스크 스냅샷
+import os
+import pickle
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import numpy as np
+import FinanceDataReader as fdr
+from pykrx import stock
+
+# 스냅샷 구조가 바뀌면 버전을 올려 기존 파일을 무시하도록 합니다.
+SNAPSHOT_VERSION = 1
+SNAPSHOT_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'krx_listing_snapshot.pkl')
+
+_refresh_lock = threading.Lock()
+_refresh_thread = None
+
+
+def get_latest_business_day():
+    """pykrx로 최신 영업일(YYYYMMDD)을 조회하고, 실패하면 주말만 보정한 날짜를 반환합니다."""
+    try:
+        return stock.get_nearest_business_day_in_a_week()
+    except Exception:
+        today = datetime.now()
+        if today.weekday() == 5:
+            today -= timedelta(days=1)
+        elif today.weekday() == 6:
+            today -= timedelta(days=2)
+        return today.strftime("%Y%m%d")
+
+
+def add_full_code(listing):
+    """yfinance용 'FullCode'(005930.KS / 035720.KQ) 컬럼을 벡터 연산으로 추가합니다."""
+    codes = listing['Code'].astype(str)
+    listing['FullCode'] = np.where(listing['Market'] == 'KOSDAQ', codes + '.KQ', codes + '.KS')
+    return listing
+
+
+def build_krx_snapshot(business_date=None):
+    """
+    FDR 종목 목록 한 번의 호출로 목록, FullCode, 코드↔이름 매핑을 모두 만들어 디스크에 저장합니다.
+    (종목별 get_market_ticker_name 호출 없음)
+    """
+    business_date = business_date or get_latest_business_day()
+    print(f"  - KRX 종목 스냅샷 생성 중... (기준일: {business_date})")
+
+    listing = fdr.StockListing('KRX')
+    if listing is None or listing.empty:
+        raise ValueError("FDR StockListing('KRX')가 빈 데이터를 반환했습니다.")
+    listing = add_full_code(listing.reset_index(drop=True))
+
+    ticker_name_map = dict(zip(listing['Code'].astype(str), listing['Name'].astype(str)))
+    snapshot = {
+        'version': SNAPSHOT_VERSION,
+        'business_date': business_date,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'listing': listing,
+        'ticker_name_map': ticker_name_map,
+        'name_ticker_map': {name: ticker for ticker, name in ticker_name_map.items()},
+    }
+    save_krx_snapshot(snapshot)
+    print(f"  - KRX 종목 스냅샷 저장 완료. 총 {len(listing)}개 종목.")
+    return snapshot
+
+
+def save_krx_snapshot(snapshot):
+    """임시 파일에 쓴 뒤 교체하여, 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 합니다."""
+    os.makedirs(os.path.dirname(SNAPSHOT_PATH), exist_ok=True)
+    tmp_path = f"{SNAPSHOT_PATH}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, SNAPSHOT_PATH)
+
+
+def load_krx_snapshot():
+    """디스크 스냅샷을 읽습니다. 없거나 버전이 다르거나 손상되었으면 None."""
+    if not os.path.exists(SNAPSHOT_PATH):
+        return None
+    try:
+        with open(SNAPSHOT_PATH, 'rb') as f:
+            snapshot = pickle.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            print("⚠️ KRX 종목 스냅샷 버전이 달라 무시합니다.")
+            return None
+        return snapshot
+    except Exception as e:
+        print(f"⚠️ KRX 종목 스냅샷을 읽을 수 없습니다: {e}")
+        return None
+
+
+def refresh_krx_snapshot_async(current_date, on_update):
+    """
+    백그라운드에서 최신 영업일을 확인하고, 스냅샷 기준일과 다를 때만 새로 만듭니다.
+    새 스냅샷이 만들어지면 on_update(snapshot)을 호출합니다.
+    """
+    global _refresh_thread
+
+    def _worker():
+        try:
+            latest_bday = get_latest_business_day()
+            if latest_bday == current_date:
+                print(f"✅ KRX 종목 스냅샷이 이미 최신입니다. (기준일: {latest_bday})")
+                return
+            on_update(build_krx_snapshot(latest_bday))
+        except Exception as e:
+            print(f"⚠️ KRX 종목 스냅샷 백그라운드 갱신 실패 (기존 스냅샷 유지): {e}")
+            traceback.print_exc()
+
+    with _refresh_lock:
+        if _refresh_thread is not None and _refresh_thread.is_alive():
+            return
+        _refresh_thread = threading.Thread(target=_worker, name="krx-snapshot-refresh", daemon=True)
+        _refresh_thread.start()
@@ -0,0 +1,338 @@
+# blueprints/market_panel.py
+# 전 종목 일별 종가/시가 패널 (날짜 × 종목 NumPy 행렬) - 기간 수익률을 두 행의 차로 계산합니다.
+import os
+import threading
+import traceback
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from pykrx import stock
+from pytz import timezone
+
+# 패널 구조가 바뀌면 버전을 올려 기존 파일을 무시하도록 합니다.
+PANEL_VERSION = 1
+PANEL_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'market_panel.npz')
+PANEL_YEARS = 5
+# 장 마감 후 이 시각(KST)이 지나야 당일 데이터를 확정된 것으로 보고 패널에 추가합니다.
+SESSION_CLOSE_HOUR = 16
+# 초기 구축 시 이 일수마다 중간 저장하여, 재시작해도 이어서 구축합니다.
+SAVE_EVERY_DAYS = 50
+
+KST = timezone('Asia/Seoul')
+
+_panel = None
+_panel_loaded = False
+_panel_lock = threading.Lock()
+_update_lock = threading.Lock()
+
+
+class MarketPanel:
+    """
+    KRX 전 종목의 일별 시가/종가와 누적 로그수익률 행렬.
+
+    cumlog[t, j]는 KRX 등락률(권리락/액면분할이 반영된 기준가 대비)을 누적한 값이므로
+    exp(cumlog[e] - cumlog[s])가 곧 s일 종가 → e일 종가의 수정 수익률입니다.
+    """
+
+    def __init__(self, dates, tickers, open_, close, cumlog, updated_at, built_through=None):
+        self.dates = dates
+        self.tickers = tickers
+        self.open = open_
+        self.close = close
+        self.cumlog = cumlog
+        self.updated_at = updated_at
+        # 빠짐없이 반영했다고 확인한 마지막 날짜(휴장일 포함). 구축 중간 저장본은 마지막 봉 날짜에 머뭅니다.
+        if built_through is None:
+            built_through = pd.Timestamp(dates[-1]).date() if len(dates) else datetime.min.date()
+        self.built_through = built_through
+        self.ticker_index = {ticker: i for i, ticker in enumerate(tickers)}
+
+    @property
+    def first_date(self):
+        return pd.Timestamp(self.dates[0])
+
+    @property
+    def last_date(self):
+        return pd.Timestamp(self.dates[-1])
+
+    def is_fresh(self):
+        """가장 최근에 마감된 영업일까지 빠짐없이 반영되었는지 여부. (구축 중간 저장본은 False)"""
+        return self.built_through >= _latest_session_cutoff().date()
+
+    def covers(self, start, end):
+        """[start, end] 구간을 패널만으로 답할 수 있는지 여부."""
+        if len(self.dates) == 0:
+            return False
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        if start < self.first_date:
+            return False
+        return end <= self.last_date or self.is_fresh()
+
+    def _row_range(self, start, end):
+        dates = self.dates
+        s_idx = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start).normalize(), 'D'), side='left'))
+        e_idx = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end).normalize(), 'D'), side='right')) - 1
+        return s_idx, e_idx
+
+    def _first_last_valid(self, col_idx, s_idx, e_idx):
+        """구간 안에서 종목별로 거래가 있는 첫/마지막 행 번호와 거래일 수."""
+        valid = ~np.isnan(self.close[s_idx:e_idx + 1, col_idx])
+        count = valid.sum(axis=0)
+        first = s_idx + valid.argmax(axis=0)
+        last = e_idx - valid[::-1].argmax(axis=0)
+        return first, last, count
+
+    def period_return(self, col_idx, start, end):
+        """
+        종목별 (end 종가 / start 시가 - 1). 구간 내 거래일이 2일 미만이면 NaN.
+        (기존 _fetch_and_analyze_single_stock과 같은 정의)
+        """
+        s_idx, e_idx = self._row_range(start, end)
+        result = np.full(len(col_idx), np.nan)
+        if e_idx <= s_idx:
+            return result
+        first, last, count = self._first_last_valid(col_idx, s_idx, e_idx)
+        open_first = self.open[first, col_idx].astype(np.float64)
+        close_first = self.close[first, col_idx].astype(np.float64)
+        log_gap = self.cumlog[last, col_idx] - self.cumlog[first, col_idx]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ret = np.exp(log_gap) * close_first / open_first - 1
+        ok = (count > 1) & (open_first > 0)
+        result[ok] = ret[ok]
+        return result
+
+    def period_returns(self, codes, event_periods, overall_period):
+        """
+        codes 전체에 대해 이벤트 기간 평균 수익률(%)과 전체 기간 시작 시가/마지막 종가를 한 번에 계산합니다.
+        패널에 없는 종목은 결과에서 빠집니다.
+        """
+        codes = [code for code in codes if code in self.ticker_index]
+        if not codes or not event_periods:
+            return pd.DataFrame(columns=['value', 'start_price', 'end_price'])
+        col_idx = np.array([self.ticker_index[code] for code in codes])
+
+        returns = np.vstack([self.period_return(col_idx, start, end) for start, end in event_periods])
+        with np.errstate(invalid='ignore'):
+            valid_periods = (~np.isnan(returns)).sum(axis=0)
+            average = np.where(valid_periods > 0, np.nansum(returns, axis=0) / np.maximum(valid_periods, 1), np.nan)
+
+        s_idx, e_idx = self._row_range(*overall_period)
+        start_price = np.full(len(codes), np.nan)
+        end_price = np.full(len(codes), np.nan)
+        if e_idx >= s_idx:
+            first, last, count = self._first_last_valid(col_idx, s_idx, e_idx)
+            has_rows = count > 0
+            start_price[has_rows] = self.open[first, col_idx][has_rows]
+            end_price[has_rows] = self.close[last, col_idx][has_rows]
+
+        df = pd.DataFrame({
+            'value': np.round(average * 100, 2),
+            'start_price': start_price,
+            'end_price': end_price,
+        }, index=codes)
+        return df.dropna(subset=['value', 'start_price', 'end_price'])
+
+
+def _latest_session_cutoff():
+    """가장 최근 평일 장 마감 확정 시각(KST, tz 없는 datetime)."""
+    now = datetime.now(KST).replace(tzinfo=None)
+    cutoff = now.replace(hour=SESSION_CLOSE_HOUR, minute=0, second=0, microsecond=0)
+    if now < cutoff:
+        cutoff -= timedelta(days=1)
+    while cutoff.weekday() >= 5:
+        cutoff -= timedelta(days=1)
+    return cutoff
+
+
+def _save_panel(panel):
+    os.makedirs(os.path.dirname(PANEL_PATH), exist_ok=True)
+    tmp_path = f"{PANEL_PATH}.tmp.npz"
+    np.savez(
+        tmp_path,
+        version=np.array(PANEL_VERSION),
+        updated_at=np.array(panel.updated_at.isoformat()),
+        built_through=np.array(panel.built_through.isoformat()),
+        dates=panel.dates,
+        tickers=panel.tickers,
+        open=panel.open,
+        close=panel.close,
+        cumlog=panel.cumlog,
+    )
+    os.replace(tmp_path, PANEL_PATH)
+
+
+def _load_panel_from_disk():
+    if not os.path.exists(PANEL_PATH):
+        return None
+    try:
+        with np.load(PANEL_PATH, allow_pickle=False) as data:
+            if int(data['version']) != PANEL_VERSION:
+                print("⚠️ 시장 패널 버전이 달라 무시합니다.")
+                return None
+            return MarketPanel(
+                dates=data['dates'],
+                tickers=data['tickers'],
+                open_=data['open'],
+                close=data['close'],
+                cumlog=data['cumlog'],
+                updated_at=datetime.fromisoformat(str(data['updated_at'])),
+                # built_through가 없는 예전 파일은 마지막 봉 날짜까지만 확인된 것으로 봅니다.
+                built_through=(datetime.fromisoformat(str(data['built_through'])).date()
+                               if 'built_through' in data.files else None),
+            )
+    except Exception as e:
+        print(f"⚠️ 시장 패널 파일을 읽을 수 없습니다: {e}")
+        return None
+
+
+def get_market_panel():
+    """메모리 패널을 반환합니다. 최초 호출 시 디스크에서 읽고, 없으면 None."""
+    global _panel, _panel_loaded
+    if _panel_loaded:
+        return _panel
+    with _panel_lock:
+        if not _panel_loaded:
+            _panel = _load_panel_from_disk()
+            _panel_loaded = True
+    return _panel
+
+
+def _fetch_market_day(date_str):
+    """하루치 전 종목 시가/종가/등락률."""
+    df = stock.get_market_ohlcv(date_str, market="ALL")
+    if df is None or df.empty:
+        return None
+    df = df[['시가', '종가', '등락률']].copy()
+    df.index = df.index.astype(str)
+    return df
+
+
+def _extend_panel(base, pending):
+    """
+    기존 패널(base, 없으면 None)에 pending[(day, day_df), ...]을 한 번에 덧붙인 새 패널을 만듭니다.
+    신규 상장 종목은 열을 늘리고(이전 날짜는 NaN), 누적 로그수익률은 처음 나타난 날 0에서 시작합니다.
+    """
+    tickers = list(base.tickers) if base is not None else []
+    ticker_index = dict(base.ticker_index) if base is not None else {}
+    for _, day_df in pending:
+        for ticker in day_df.index:
+            if ticker not in ticker_index:
+                ticker_index[ticker] = len(tickers)
+                tickers.append(ticker)
+
+    n_cols, n_rows = len(tickers), len(pending)
+    open_new = np.full((n_rows, n_cols), np.nan, dtype=np.float32)
+    close_new = np.full((n_rows, n_cols), np.nan, dtype=np.float32)
+    cumlog_new = np.full((n_rows, n_cols), np.nan, dtype=np.float64)
+
+    prev = np.full(n_cols, np.nan)
+    if base is not None and len(base.dates):
+        prev[:len(base.tickers)] = base.cumlog[-1]
+
+    for i, (_, day_df) in enumerate(pending):
+        cols = np.array([ticker_index[t] for t in day_df.index])
+        closes = day_df['종가'].to_numpy(dtype=np.float64)
+        traded = closes > 0
+        open_new[i, cols[traded]] = day_df['시가'].to_numpy(dtype=np.float64)[traded]
+        close_new[i, cols[traded]] = closes[traded]
+
+        change = np.where(traded, np.log1p(day_df['등락률'].to_numpy(dtype=np.float64) / 100.0), 0.0)
+        row = prev.copy()
+        has_prev = ~np.isnan(prev[cols])
+        row[cols] = np.where(has_prev, prev[cols] + change, 0.0)
+        cumlog_new[i] = row
+        prev = row
+
+    new_dates = np.array([np.datetime64(pd.Timestamp(day).normalize(), 'D') for day, _ in pending], dtype='datetime64[D]')
+    if base is None or not len(base.dates):
+        dates, open_, close, cumlog = new_dates, open_new, close_new, cumlog_new
+    else:
+        pad = n_cols - len(base.tickers)
+        dates = np.concatenate([base.dates, new_dates])
+        open_ = np.vstack([np.pad(base.open, ((0, 0), (0, pad)), constant_values=np.nan), open_new])
+        close = np.vstack([np.pad(base.close, ((0, 0), (0, pad)), constant_values=np.nan), close_new])
+        cumlog = np.vstack([np.pad(base.cumlog, ((0, 0), (0, pad)), constant_values=np.nan), cumlog_new])
+
+    # 중간 저장본이 최신 패널로 보이지 않도록 갱신 시각/확인 날짜는 마지막 봉 날짜로 둡니다. (완료 시 update_market_panel이 올림)
+    last_day = pd.Timestamp(dates[-1]).to_pydatetime()
+    return MarketPanel(
+        dates=dates,
+        tickers=np.array(tickers, dtype=str),
+        open_=open_,
+        close=close,
+        cumlog=cumlog,
+        updated_at=last_day,
+        built_through=last_day.date(),
+    )
+
+
+def update_market_panel():
+    """
+    [스케줄러 작업] 패널의 마지막 날짜 이후 확정된 영업일만 하루 1회 호출로 받아 덧붙입니다.
+    패널이 없으면 최근 PANEL_YEARS년을 처음부터 구축합니다. (중간 저장으로 재시작 시 이어서 진행)
+    """
+    global _panel, _panel_loaded
+    if not _update_lock.acquire(blocking=False):
+        print("ℹ️ 시장 패널 갱신이 이미 진행 중입니다.")
+        return get_market_panel()
+    try:
+        panel = get_market_panel()
+        now_kst = datetime.now(KST).replace(tzinfo=None)
+        last_complete_day = _latest_session_cutoff().date()
+
+        if panel is not None and len(panel.dates):
+            from_date = (panel.last_date + timedelta(days=1)).date()
+        else:
+            from_date = (now_kst - timedelta(days=365 * PANEL_YEARS)).date()
+
+        if from_date > last_complete_day:
+            print("✅ 시장 패널이 이미 최신입니다.")
+            if panel is not None:
+                panel.updated_at = now_kst
+                panel.built_through = last_complete_day
+            return panel
+
+        business_days = stock.get_previous_business_days(
+            fromdate=from_date.strftime('%Y%m%d'), todate=last_complete_day.strftime('%Y%m%d')
+        )
+        print(f"🔄 시장 패널 갱신 시작: {len(business_days)}개 영업일 추가 예정.")
+
+        base, pending = panel, []
+        complete = True
+        for i, day in enumerate(business_days, start=1):
+            day_df = _fetch_market_day(pd.Timestamp(day).strftime('%Y%m%d'))
+            if day_df is None:
+                # 빠진 날을 건너뛰면 그날 등락률이 누적 수익률에서 영구히 빠지므로, 그 전날까지만 반영하고 다음 실행에서 다시 받습니다.
+                print(f"⚠️ {pd.Timestamp(day).date()} 시세가 비어 있어 그 전날까지만 반영합니다.")
+                complete = False
+                break
+            pending.append((day, day_df))
+            if len(pending) >= SAVE_EVERY_DAYS:
+                base, pending = _extend_panel(base, pending), []
+                _save_panel(base)
+                print(f"  - 시장 패널 중간 저장: {i}/{len(business_days)}일")
+
+        if pending:
+            base = _extend_panel(base, pending)
+        if base is None:
+            print("⚠️ 시장 패널에 추가할 데이터가 없습니다.")
+            return panel
+        if base is panel and not complete:
+            return panel
+
+        new_panel = base
+        if complete:
+            new_panel.updated_at = now_kst
+            new_panel.built_through = last_complete_day
+        _save_panel(new_panel)
+        with _panel_lock:
+            _panel, _panel_loaded = new_panel, True
+        print(f"✅ 시장 패널 갱신 완료: {len(new_panel.dates)}일 × {len(new_panel.tickers)}종목")
+        return new_panel
+    except Exception as e:
+        print(f"❌ 시장 패널 갱신 실패 (기존 패널 유지): {e}")
+        traceback.print_exc()
+        return get_market_panel()
+    finally:
+        _update_lock.release()
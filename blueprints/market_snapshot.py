@@ -0,0 +1,161 @@
+# blueprints/market_snapshot.py
+# 일별 전 종목 스냅샷 - 영업일 하루치 OHLCV + 시가총액 + 투자지표(PER/PBR/DIV...)를 티커 인덱스 한 테이블로 합쳐
+# 메모리와 디스크에 보관합니다. (종목 상세, 재무지표 스크리닝, 거래량/등락 순위가 함께 사용)
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+from pykrx import stock
+from pytz import timezone
+
+from blueprints.singleflight import coalesced
+
+# 테이블 구성이 바뀌면 버전을 올려 저장된 스냅샷을 다시 만들도록 합니다.
+MARKET_SNAPSHOT_VERSION = 1
+MARKET_SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), '..', 'cache', 'market_snapshots')
+# pykrx market="ALL"과 같은 범위
+MARKETS = ("KOSPI", "KOSDAQ", "KONEX")
+OHLCV_COLUMNS = ['시가', '고가', '저가', '종가', '거래량', '거래대금', '등락률']
+FUNDAMENTAL_COLUMNS = ['BPS', 'PER', 'PBR', 'EPS', 'DIV', 'DPS']
+SNAPSHOT_COLUMNS = ['Market', *OHLCV_COLUMNS, '시가총액', '상장주식수', *FUNDAMENTAL_COLUMNS]
+# 디스크/메모리에 남겨 둘 영업일 수
+KEEP_DISK_DAYS = 20
+KEEP_MEMORY_DAYS = 5
+# 장 마감 데이터가 확정되는 시각(KST, 서버 시간대와 무관). 그 전의 당일 스냅샷은 잠정치로 보고 자주 새로 만듭니다.
+CLOSE_FINAL_HOUR = 16
+INTRADAY_TTL_SECONDS = 600
+
+KST = timezone('Asia/Seoul')
+
+_snapshots = OrderedDict()  # date_str → (DataFrame, final, built_at)
+_lock = threading.Lock()
+
+
+def _snapshot_path(date_str):
+    return os.path.join(MARKET_SNAPSHOT_DIR, f"{date_str}.pkl")
+
+
+def _now_kst():
+    return datetime.now(KST).replace(tzinfo=None)
+
+
+def _is_final(date_str):
+    now = _now_kst()
+    return date_str < now.strftime('%Y%m%d') or now.hour >= CLOSE_FINAL_HOUR
+
+
+def _build_snapshot(date_str):
+    """
+    시장별 get_market_ohlcv / get_market_cap / get_market_fundamental 을 티커로 합칩니다.
+    컬럼은 SNAPSHOT_COLUMNS로 고정합니다. (조회에 실패한 데이터의 컬럼은 NaN)
+    (snapshot, complete)를 반환하며, complete는 모든 시장의 세 데이터가 다 있을 때만 True입니다.
+    """
+    frames = []
+    complete = True
+    for market in MARKETS:
+        ohlcv = stock.get_market_ohlcv(date_str, market=market)
+        if ohlcv is None or ohlcv.empty:
+            complete = False
+            continue
+        cap = stock.get_market_cap(date_str, market=market)
+        funda = stock.get_market_fundamental(date_str, market=market)
+        df = ohlcv.copy()
+        if cap is not None and not cap.empty:
+            df = df.join(cap[['시가총액', '상장주식수']], how='left')
+        else:
+            complete = False
+        if funda is not None and not funda.empty:
+            df = df.join(funda[[c for c in funda.columns if c not in df.columns]], how='left')
+        else:
+            complete = False
+        df.insert(0, 'Market', market)
+        frames.append(df)
+    snapshot = pd.concat(frames) if frames else pd.DataFrame()
+    snapshot = snapshot.reindex(columns=SNAPSHOT_COLUMNS)
+    snapshot.index = snapshot.index.astype(str)
+    snapshot.index.name = '티커'
+    return snapshot, complete and not snapshot.empty
+
+
+def _save_snapshot(date_str, df):
+    try:
+        os.makedirs(MARKET_SNAPSHOT_DIR, exist_ok=True)
+        path = _snapshot_path(date_str)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'version': MARKET_SNAPSHOT_VERSION, 'date': date_str, 'data': df}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        # 오래된 날짜 파일 정리
+        saved = sorted(name for name in os.listdir(MARKET_SNAPSHOT_DIR) if name.endswith('.pkl'))
+        for name in saved[:-KEEP_DISK_DAYS]:
+            os.remove(os.path.join(MARKET_SNAPSHOT_DIR, name))
+    except Exception as e:
+        print(f"⚠️ 시장 스냅샷 저장 실패({date_str}): {e}")
+
+
+def _load_snapshot_from_disk(date_str):
+    path = _snapshot_path(date_str)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            saved = pickle.load(f)
+        if saved.get('version') == MARKET_SNAPSHOT_VERSION:
+            return saved['data']
+    except Exception as e:
+        print(f"⚠️ 시장 스냅샷을 읽을 수 없습니다({date_str}): {e}")
+    return None
+
+
+def _remember(date_str, df, final):
+    with _lock:
+        _snapshots[date_str] = (df, final, _now_kst())
+        _snapshots.move_to_end(date_str)
+        while len(_snapshots) > KEEP_MEMORY_DAYS:
+            _snapshots.popitem(last=False)
+
+
+def get_market_snapshot(date_str, force=False):
+    """
+    date_str(YYYYMMDD)의 전 종목 스냅샷(티커 인덱스 DataFrame). 휴장일 등으로 데이터가 없으면 컬럼만 있는 빈 DataFrame.
+    메모리 → 디스크 → pykrx 순으로 찾으며, 반환된 DataFrame은 여러 요청이 공유하므로 수정하지 말고 복사해서 쓰세요.
+    force=True면 저장된 스냅샷을 무시하고 새로 만듭니다. (장 마감 후 스케줄러 작업)
+    """
+    date_str = str(date_str)
+    if not force:
+        with _lock:
+            entry = _snapshots.get(date_str)
+        if entry is not None:
+            df, final, built_at = entry
+            if final or (_now_kst() - built_at).total_seconds() < INTRADAY_TTL_SECONDS:
+                return df
+
+    final = _is_final(date_str)
+    if final and not force:
+        df = _load_snapshot_from_disk(date_str)
+        if df is not None:
+            _remember(date_str, df, final)
+            return df
+
+    # 같은 날짜를 여러 요청이 동시에 만들지 않도록 한 번만 호출합니다.
+    df, complete = coalesced(_build_snapshot, date_str)
+    # 시가총액/투자지표 조회가 비어 있던 스냅샷은 확정하지 않고 INTRADAY_TTL_SECONDS 뒤 다시 만듭니다.
+    final = final and complete
+    if final:
+        _save_snapshot(date_str, df)
+    status = '' if final else (', 장중 잠정치' if complete or df.empty else ', 일부 데이터 누락 - 잠정치')
+    print(f"✅ 시장 스냅샷 생성 완료: {date_str} ({len(df)}개 종목{status})")
+    _remember(date_str, df, final)
+    return df
+
+
+def get_market_snapshot_row(date_str, code):
+    """한 종목의 스냅샷 행(Series). 없으면 None."""
+    df = get_market_snapshot(date_str)
+    if df.empty or code not in df.index:
+        return None
+    return df.loc[code]
@@ -0,0 +1,79 @@
+# blueprints/news_cache.py
+# 기사별 분석 결과(감성 라벨, 기업명 추출 결과) 디스크 캐시 - URL+제목 해시를 키로 SQLite에 저장합니다.
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+
+# 저장 형식이 바뀌면 버전을 올려 기존 레코드를 무시하도록 합니다.
+NEWS_CACHE_VERSION = 1
+NEWS_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'news_analysis.sqlite3')
+# 이 기간보다 오래된 기사 레코드는 열 때 정리합니다.
+NEWS_CACHE_RETENTION_DAYS = 30
+
+
+def article_key(url, title):
+    """기사 URL과 제목으로 만든 캐시 키. (같은 URL이라도 제목이 수정되면 새로 분석)"""
+    return hashlib.sha256(f"{url}\n{title}".encode('utf-8')).hexdigest()
+
+
+class NewsAnalysisCache:
+    """
+    article_key → 분석 결과 dict 를 저장하는 SQLite 캐시.
+
+    레코드 예시:
+        {'body_ok': True, 'finance': True, 'companies': ['삼성전자'],
+         'target_text': '...', 'sentiment': '긍정', 'model_version': 'a1b2c3d4e5f6'}
+
+    sentiment는 model_version이 현재 모델과 같을 때만 유효하며, 호출 측에서 확인합니다.
+    """
+
+    def __init__(self, path=NEWS_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                " key TEXT PRIMARY KEY, url TEXT, version INTEGER, record TEXT, updated_at TEXT)"
+            )
+            cutoff = (datetime.now() - timedelta(days=NEWS_CACHE_RETENTION_DAYS)).isoformat(timespec='seconds')
+            conn.execute("DELETE FROM articles WHERE updated_at < ? OR version != ?", (cutoff, NEWS_CACHE_VERSION))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        """레코드 dict를 반환합니다. 없거나 읽을 수 없으면 None."""
+        try:
+            with self._lock:
+                row = self._connect().execute(
+                    "SELECT record FROM articles WHERE key = ? AND version = ?", (key, NEWS_CACHE_VERSION)
+                ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            print(f"⚠️ 뉴스 분석 캐시 조회 실패: {e}")
+            return None
+
+    def put(self, key, url, record):
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO articles (key, url, version, record, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (key, url, NEWS_CACHE_VERSION, json.dumps(record, ensure_ascii=False),
+                     datetime.now().isoformat(timespec='seconds'))
+                )
+                conn.commit()
+        except Exception as e:
+            print(f"⚠️ 뉴스 분석 캐시 저장 실패: {e}")
+
+
+news_cache = NewsAnalysisCache()
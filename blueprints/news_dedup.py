@@ -0,0 +1,166 @@
+# blueprints/news_dedup.py
+# 유사 중복 기사(통신사 전재 등) 제거 - 글자 n-gram MinHash 서명 + LSH 밴드 인덱스, 갱신 간에도 서명을 유지합니다.
+import os
+import pickle
+import re
+import threading
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# 서명 방식이 바뀌면 버전을 올려 저장된 서명을 무시하도록 합니다.
+NEWS_DEDUP_VERSION = 1
+NEWS_DEDUP_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'news_signatures.pkl')
+
+NUM_PERM = 64
+BANDS = 16                     # 16밴드 × 4행 → 유사도 약 0.5 이상이면 후보로 잡히고, 아래 임계값으로 최종 판정
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 3
+DUPLICATE_THRESHOLD = 0.7      # 추정 자카드 유사도가 이 값 이상이면 같은 기사로 봅니다.
+RETENTION_HOURS = 72
+
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.RandomState(20240601)  # 서명이 재시작 후에도 같도록 고정 시드
+_PERM_A = _rng.randint(1, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+_PERM_B = _rng.randint(0, (1 << 31) - 1, size=NUM_PERM).astype(np.uint64)
+
+_NORMALIZE_PATTERN = re.compile(r"\[[^\]]*\]|[^0-9A-Za-z가-힣]")
+
+
+def _normalize(text):
+    # [속보], [단독] 같은 말머리와 공백/문장부호를 지워 전재 기사끼리 같은 문자열이 되도록 합니다.
+    return _NORMALIZE_PATTERN.sub("", text or "").lower()
+
+
+def signature(text):
+    """text의 MinHash 서명(uint64 배열). 너무 짧아 판단할 수 없으면 None."""
+    normalized = _normalize(text)
+    if len(normalized) < SHINGLE_SIZE + 2:
+        return None
+    shingles = {normalized[i:i + SHINGLE_SIZE] for i in range(len(normalized) - SHINGLE_SIZE + 1)}
+    hashes = np.fromiter((zlib.crc32(s.encode('utf-8')) & 0x7FFFFFFF for s in shingles),
+                         dtype=np.uint64, count=len(shingles))
+    # (a * x + b) mod p 를 순열마다 한 번에 계산한 뒤 최솟값을 취합니다. (31비트 값끼리 곱하므로 uint64 범위 안)
+    permuted = (hashes[None, :] * _PERM_A[:, None] + _PERM_B[:, None]) % _MERSENNE_PRIME
+    return permuted.min(axis=1)
+
+
+def similarity(sig_a, sig_b):
+    """두 서명의 추정 자카드 유사도."""
+    return float(np.mean(sig_a == sig_b))
+
+
+def is_near_duplicate(sig, accepted):
+    """sig가 accepted 서명 중 하나와 유사 중복인지 여부. (한 페이지 분량의 본문 비교용)"""
+    return sig is not None and any(similarity(sig, other) >= DUPLICATE_THRESHOLD for other in accepted)
+
+
+def _band_keys(sig):
+    return [(band, sig[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+
+class NewsDeduplicator:
+    """
+    기사 제목 서명을 기간(RETENTION_HOURS) 동안 보관하는 LSH 인덱스.
+
+    - collapse(items): 같은 목록 안의 유사 중복은 첫 기사만 남기고,
+      이전 갱신에서 본 기사와 같은 기사면 item['canonical'](처음 본 기사의 url/title)을 붙여 분석 결과를 재사용하게 합니다.
+    """
+
+    def __init__(self, path=NEWS_DEDUP_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = None   # id → {'url', 'title', 'sig', 'seen_at'}
+        self._buckets = {}     # (band, band_bytes) → [id, ...]
+        self._next_id = 0
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'rb') as f:
+                    saved = pickle.load(f)
+                if saved.get('version') == NEWS_DEDUP_VERSION:
+                    for entry in saved['entries']:
+                        self._add_entry(entry)
+            except Exception as e:
+                print(f"⚠️ 뉴스 서명 저장소를 읽을 수 없습니다: {e}")
+        self._prune()
+
+    def _add_entry(self, entry):
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = entry
+        for key in _band_keys(entry['sig']):
+            self._buckets.setdefault(key, []).append(entry_id)
+        return entry_id
+
+    def _prune(self):
+        cutoff = datetime.now() - timedelta(hours=RETENTION_HOURS)
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry['seen_at'] < cutoff]
+        if not expired:
+            return
+        for entry_id in expired:
+            del self._entries[entry_id]
+        expired = set(expired)
+        self._buckets = {
+            key: kept for key, ids in self._buckets.items()
+            if (kept := [i for i in ids if i not in expired])
+        }
+
+    def _find(self, sig):
+        candidates = {entry_id for key in _band_keys(sig) for entry_id in self._buckets.get(key, ())}
+        best_id, best_score = None, DUPLICATE_THRESHOLD
+        for entry_id in candidates:
+            score = similarity(sig, self._entries[entry_id]['sig'])
+            if score >= best_score:
+                best_id, best_score = entry_id, score
+        return best_id
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'version': NEWS_DEDUP_VERSION, 'entries': list(self._entries.values())},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️ 뉴스 서명 저장 실패: {e}")
+
+    def collapse(self, items):
+        """유사 중복 기사를 걸러낸 목록을 반환합니다. (원래 순서 유지)"""
+        kept = []
+        used_ids = set()
+        now = datetime.now()
+        with self._lock:
+            self._load()
+            for item in items:
+                sig = signature(item.get("title"))
+                if sig is None:
+                    kept.append(item)
+                    continue
+                entry_id = self._find(sig)
+                if entry_id is None:
+                    used_ids.add(self._add_entry({'url': item["url"], 'title': item["title"], 'sig': sig, 'seen_at': now}))
+                    kept.append(item)
+                    continue
+                if entry_id in used_ids:
+                    continue  # 이번 목록 안에서 이미 같은 기사를 남김
+                used_ids.add(entry_id)
+                entry = self._entries[entry_id]
+                entry['seen_at'] = now
+                if entry['url'] != item["url"]:
+                    item = {**item, "canonical": {"url": entry['url'], "title": entry['title']}}
+                kept.append(item)
+            self._prune()
+            self._save()
+        if len(kept) < len(items):
+            print(f"DEBUG: 유사 중복 기사 {len(items) - len(kept)}개 제외 ({len(items)}개 → {len(kept)}개)")
+        return kept
+
+
+news_deduplicator = NewsDeduplicator()
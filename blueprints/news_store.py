@@ -0,0 +1,207 @@
+# blueprints/news_store.py
+# 뉴스 기사 저장소(SQLite) - 출처별 워터마크로 새 기사만 받아 누적하고, 화면에는 인덱스 조회로 페이지 단위 제공
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+# 테이블 구조가 바뀌면 버전을 올려 기존 파일을 새로 만듭니다.
+NEWS_STORE_VERSION = 2
+NEWS_STORE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'news_store.sqlite3')
+
+# 출처 이름
+SOURCE_MARKET_KR = "market_kr"
+SOURCE_MARKET_INTL = "market_intl"
+
+
+def stock_source(code):
+    """종목별 뉴스 출처 이름 (6자리 코드 기준)."""
+    return f"stock:{code}"
+
+
+def parse_published_at(value):
+    """
+    '20240501102000'(네이버), '2024-05-01T10:20:00Z'(NewsAPI), '2024-05-01 10:20'(스크래핑) 등을
+    정렬 가능한 'YYYY-MM-DDTHH:MM:SS' 문자열로 바꿉니다. 해석할 수 없으면 빈 문자열.
+    """
+    if not value:
+        return ""
+    value = str(value).strip()
+    fmt = '%Y%m%d%H%M%S'[:len(value) - 2] if value.isdigit() and len(value) in (12, 14) else None
+    ts = pd.to_datetime(value, format=fmt, errors='coerce')
+    if pd.isna(ts):
+        return ""
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('Asia/Seoul').tz_localize(None)
+    return ts.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class NewsStore:
+    """
+    articles: (source, url) 당 한 행. published_at 내림차순 인덱스로 페이지 조회.
+        감성 라벨을 아직 못 붙인 기사(모델 warm-up 중/추론 오류)는 sentiment를 NULL로, 분석할 문장을 sentiment_text에 두고
+        모델이 준비되면 backfill 합니다.
+    watermarks: 출처별로 마지막으로 반영한 가장 최신 published_at / article_id 와 마지막 확인 시각.
+    """
+
+    def __init__(self, path=NEWS_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            if conn.execute("PRAGMA user_version").fetchone()[0] != NEWS_STORE_VERSION:
+                conn.executescript(
+                    "DROP TABLE IF EXISTS articles; DROP TABLE IF EXISTS watermarks;"
+                    "CREATE TABLE articles ("
+                    " source TEXT, url TEXT, title TEXT, press TEXT, date TEXT, published_at TEXT,"
+                    " article_id TEXT, sentiment TEXT, sentiment_text TEXT, companies TEXT, ingested_at TEXT,"
+                    " PRIMARY KEY (source, url));"
+                    "CREATE INDEX idx_articles_source_published ON articles (source, published_at DESC, ingested_at DESC);"
+                    "CREATE INDEX idx_articles_pending_sentiment ON articles (ingested_at) WHERE sentiment IS NULL AND sentiment_text IS NOT NULL;"
+                    "CREATE TABLE watermarks ("
+                    " source TEXT PRIMARY KEY, last_published_at TEXT, last_article_id TEXT, checked_at TEXT);"
+                    f"PRAGMA user_version = {NEWS_STORE_VERSION};"
+                )
+            self._conn = conn
+        return self._conn
+
+    def get_watermark(self, source):
+        """{'last_published_at', 'last_article_id', 'checked_at'(datetime)} 또는 None."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT last_published_at, last_article_id, checked_at FROM watermarks WHERE source = ?", (source,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            'last_published_at': row[0] or "",
+            'last_article_id': row[1] or "",
+            'checked_at': datetime.fromisoformat(row[2]) if row[2] else None,
+        }
+
+    def seconds_since_checked(self, source):
+        """마지막으로 출처를 확인한 뒤 지난 초. 확인한 적 없으면 None."""
+        watermark = self.get_watermark(source)
+        if watermark is None or watermark['checked_at'] is None:
+            return None
+        return (datetime.now() - watermark['checked_at']).total_seconds()
+
+    def filter_new(self, source, items):
+        """
+        워터마크 이후(또는 시각을 알 수 없는) 기사 중 아직 저장되지 않은 것만 남깁니다.
+        items의 각 기사에는 'published_at'(parse_published_at 형식)이 있어야 합니다.
+        """
+        items = [item for item in items if item.get("url") and item["url"] != "#"]
+        if not items:
+            return []
+        watermark = self.get_watermark(source)
+        last = watermark['last_published_at'] if watermark else ""
+        candidates = [item for item in items if not item.get("published_at") or item["published_at"] >= last]
+        if not candidates:
+            return []
+        stored = self.stored_urls(source, [item["url"] for item in candidates])
+        return [item for item in candidates if item["url"] not in stored]
+
+    def stored_urls(self, source, urls):
+        """urls 중 이미 저장된 것의 집합."""
+        urls = list(urls)
+        if not urls:
+            return set()
+        with self._lock:
+            placeholders = ",".join("?" * len(urls))
+            return {row[0] for row in self._connect().execute(
+                f"SELECT url FROM articles WHERE source = ? AND url IN ({placeholders})", [source, *urls]
+            )}
+
+    def add_articles(self, source, articles, seen_items=(), pending_items=()):
+        """
+        분석을 마친 기사들을 저장하고 워터마크를 올립니다.
+        seen_items: 이번에 확인했지만 저장하지 않은(걸러진) 기사까지 포함한 목록 - 워터마크 계산에만 사용
+        pending_items: 받았지만 아직 확인하지 못한 기사(처리 개수 제한 등) - 워터마크가 이 기사들을 넘지 않도록 합니다.
+        """
+        now = datetime.now().isoformat(timespec='seconds')
+        rows = [
+            (source, a["url"], a.get("title"), a.get("press"), a.get("date"), a.get("published_at") or "",
+             a.get("article_id") or "", a.get("sentiment"),
+             a.get("sentiment_text") if a.get("sentiment") is None else None,
+             json.dumps(a.get("companies") or [], ensure_ascii=False), now)
+            for a in articles if a.get("url") and a["url"] != "#"
+        ]
+        floor = min((item["published_at"] for item in pending_items if item.get("published_at")), default=None)
+        newest = max(
+            (item for item in [*articles, *seen_items]
+             if item.get("published_at") and (floor is None or item["published_at"] < floor)),
+            key=lambda item: (item["published_at"], str(item.get("article_id") or "")),
+            default=None,
+        )
+        with self._lock:
+            conn = self._connect()
+            if rows:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO articles (source, url, title, press, date, published_at, article_id,"
+                    " sentiment, sentiment_text, companies, ingested_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+                )
+            current = conn.execute(
+                "SELECT last_published_at, last_article_id FROM watermarks WHERE source = ?", (source,)
+            ).fetchone()
+            last_published_at, last_article_id = current if current else ("", "")
+            if newest is not None and newest["published_at"] > (last_published_at or ""):
+                last_published_at, last_article_id = newest["published_at"], str(newest.get("article_id") or "")
+            conn.execute(
+                "INSERT OR REPLACE INTO watermarks (source, last_published_at, last_article_id, checked_at)"
+                " VALUES (?, ?, ?, ?)", (source, last_published_at, last_article_id, now)
+            )
+            conn.commit()
+        return len(rows)
+
+    def pending_sentiments(self, limit=200):
+        """감성 라벨이 아직 없는 기사 [(source, url, sentiment_text), ...] (오래된 것부터)"""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT source, url, sentiment_text FROM articles"
+                " WHERE sentiment IS NULL AND sentiment_text IS NOT NULL ORDER BY ingested_at LIMIT ?", (limit,)
+            ).fetchall()
+
+    def set_sentiments(self, labels):
+        """labels: [(source, url, 라벨), ...] 라벨을 채우고 backfill 대상에서 뺍니다."""
+        if not labels:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany(
+                "UPDATE articles SET sentiment = ?, sentiment_text = NULL WHERE source = ? AND url = ?",
+                [(label, source, url) for source, url, label in labels]
+            )
+            conn.commit()
+
+    def get_articles(self, source, page=1, page_size=10):
+        """최신순 페이지 조회. (articles, 전체 개수)"""
+        page = max(int(page), 1)
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute("SELECT COUNT(*) FROM articles WHERE source = ?", (source,)).fetchone()[0]
+            rows = conn.execute(
+                # 라벨을 기다리는 기사는 화면에 '없음'으로 표시합니다.
+                "SELECT title, press, date, url,"
+                " CASE WHEN sentiment IS NULL AND sentiment_text IS NOT NULL THEN '없음' ELSE sentiment END,"
+                " companies, published_at FROM articles"
+                " WHERE source = ? ORDER BY published_at DESC, ingested_at DESC LIMIT ? OFFSET ?",
+                (source, page_size, (page - 1) * page_size)
+            ).fetchall()
+        articles = [
+            {'title': r[0], 'press': r[1], 'date': r[2], 'url': r[3], 'sentiment': r[4],
+             'companies': json.loads(r[5]) if r[5] else [], 'published_at': r[6]}
+            for r in rows
+        ]
+        return articles, total
+
+
+news_store = NewsStore()
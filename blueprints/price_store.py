@@ -0,0 +1,330 @@
+# blueprints/price_store.py
+# 종목/지표별 일봉(OHLCV) 로컬 저장소 - 마지막 저장일 이후 구간만 네트워크로 가져옵니다.
+import os
+import pickle
+import threading
+import traceback
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+import pandas as pd
+import FinanceDataReader as fdr
+import yfinance as yf
+
+# 저장 형식이 바뀌면 버전을 올려 기존 파일을 무시하도록 합니다.
+PRICE_STORE_VERSION = 1
+PRICE_STORE_DIR = os.path.join(os.path.dirname(__file__), '..', 'cache', 'ohlcv')
+
+# 같은 종목의 마지막 봉(장중 미완성일 수 있음)을 다시 확인하는 최소 간격
+# (직전 확인 때보다 늦은 end를 요청하면 간격과 관계없이 바로 받습니다)
+TAIL_RECHECK_SECONDS = 600
+# 겹치는 날의 종가가 이 비율 이상 다르면 수정주가 반영(분할/배당)으로 보고 전체 구간을 다시 받습니다.
+ADJUSTMENT_TOLERANCE = 1e-3
+# 프로세스 메모리에 올려둘 최대 종목 수 (초과 시 오래 안 쓴 종목부터 내림, 디스크에는 남음)
+MEMORY_ENTRIES = 512
+# yfinance 다종목 일괄 조회 시 한 번에 요청할 종목 수
+BATCH_DOWNLOAD_SIZE = 100
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def _normalize_frame(df):
+    """인덱스를 tz 없는 일자(DatetimeIndex)로 맞추고 MultiIndex 컬럼을 평탄화합니다."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+    df = df.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+        df = df.loc[:, ~df.columns.duplicated()]
+    index = pd.to_datetime(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+    df = df[~df.index.duplicated(keep='last')]
+    return df.sort_index()
+
+
+def _fetch_fdr(symbol, start, end):
+    return fdr.DataReader(symbol, start, end)
+
+
+def _fetch_yf(symbol, start, end, auto_adjust=False):
+    # yfinance의 end는 해당 일자를 포함하지 않으므로 하루를 더합니다.
+    return yf.download(symbol, start=start, end=end + timedelta(days=1),
+                       auto_adjust=auto_adjust, progress=False)
+
+
+# source 이름 → (symbol, start, end) 를 받아 일봉 DataFrame을 돌려주는 함수
+SOURCES = {
+    'fdr': _fetch_fdr,
+    'yf': lambda symbol, start, end: _fetch_yf(symbol, start, end, auto_adjust=False),
+    'yf_adj': lambda symbol, start, end: _fetch_yf(symbol, start, end, auto_adjust=True),
+}
+
+
+def _entry_path(source, symbol):
+    return os.path.join(PRICE_STORE_DIR, source, f"{quote(symbol, safe='')}.pkl")
+
+
+def _key_lock(key):
+    with _key_locks_guard:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def _load_entry(source, symbol):
+    key = (source, symbol)
+    with _memory_lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return _memory[key]
+
+    path = _entry_path(source, symbol)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'rb') as f:
+            entry = pickle.load(f)
+        if entry.get('version') != PRICE_STORE_VERSION:
+            return None
+    except Exception as e:
+        print(f"⚠️ 가격 저장소 파일을 읽을 수 없습니다 ({source}:{symbol}): {e}")
+        return None
+    _remember(key, entry)
+    return entry
+
+
+def _remember(key, entry):
+    with _memory_lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_ENTRIES:
+            _memory.popitem(last=False)
+
+
+def _save_entry(source, symbol, entry):
+    path = _entry_path(source, symbol)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    _remember((source, symbol), entry)
+
+
+def _merge(old, new):
+    if old.empty:
+        return new
+    if new.empty:
+        return old
+    merged = pd.concat([old, new])
+    return merged[~merged.index.duplicated(keep='last')].sort_index()
+
+
+def _adjusted_since_stored(old, tail, anchor_day):
+    """
+    이미 확정된 봉(anchor_day)의 저장 종가와 새로 받은 종가가 다르면 과거 수정주가가 바뀐 것으로 판단합니다.
+    (마지막 봉은 장중 미완성일 수 있어 비교 기준으로 쓰지 않습니다.)
+    """
+    if old.empty or tail.empty or 'Close' not in old.columns or 'Close' not in tail.columns:
+        return False
+    if anchor_day not in old.index or anchor_day not in tail.index:
+        return False
+    stored, fresh = float(old.loc[anchor_day, 'Close']), float(tail.loc[anchor_day, 'Close'])
+    if not stored:
+        return False
+    return abs(fresh - stored) / abs(stored) > ADJUSTMENT_TOLERANCE
+
+
+def _tail_stale(entry, last_day, end, now):
+    """꼬리 구간을 다시 받아야 하는지. 직전 확인이 end까지 덮었을 때만 TAIL_RECHECK_SECONDS 간격을 적용합니다."""
+    if end > entry.get('checked_through', last_day):
+        return True
+    return (now - entry['checked_at']).total_seconds() > TAIL_RECHECK_SECONDS
+
+
+def get_ohlcv(symbol, start, end, source='fdr'):
+    """
+    symbol의 [start, end] 일봉을 반환합니다. (end 포함)
+    저장소에 있는 구간은 로컬에서 읽고, 요청 구간이 저장 범위보다 앞서거나
+    마지막 저장일 이후라면 모자란 구간만 네트워크로 받아 저장소에 덧붙입니다.
+    """
+    fetch = SOURCES[source]
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+
+    with _key_lock((source, symbol)):
+        entry = _load_entry(source, symbol)
+        now = datetime.now()
+        changed = False
+
+        if entry is None:
+            frame = _normalize_frame(fetch(symbol, start, end))
+            entry = {
+                'version': PRICE_STORE_VERSION,
+                'frame': frame,
+                'covered_from': start,
+                'checked_at': now,
+                'checked_through': end,
+            }
+            changed = True
+        else:
+            frame = entry['frame']
+
+            try:
+                # 1) 저장 범위보다 앞선 구간 요청 → 앞부분만 받아서 붙임
+                if start < entry['covered_from']:
+                    head = _normalize_frame(fetch(symbol, start, entry['covered_from'] - timedelta(days=1)))
+                    frame = _merge(head, frame)
+                    entry['covered_from'] = start
+                    changed = True
+
+                # 2) 마지막 저장일 이후 구간 요청 → 직전 확정 봉부터 꼬리만 받음 (마지막 봉은 장중 미완성일 수 있음)
+                last_day = frame.index[-1] if not frame.empty else entry['covered_from']
+                anchor_day = frame.index[-2] if len(frame) >= 2 else last_day
+                if end >= last_day and _tail_stale(entry, last_day, end, now):
+                    tail = _normalize_frame(fetch(symbol, anchor_day, end))
+                    if _adjusted_since_stored(frame, tail, anchor_day):
+                        print(f"🔄 수정주가 변경 감지 ({source}:{symbol}). 저장 구간 전체를 다시 받습니다.")
+                        frame = _normalize_frame(fetch(symbol, entry['covered_from'], end))
+                    else:
+                        frame = _merge(frame, tail)
+                    entry['checked_at'] = now
+                    entry['checked_through'] = max(entry.get('checked_through', last_day), end)
+                    changed = True
+            except Exception as e:
+                # 네트워크 실패 시 저장된 구간만으로 응답합니다.
+                print(f"⚠️ 가격 저장소 증분 조회 실패 ({source}:{symbol}), 저장된 데이터로 응답: {e}")
+
+            entry['frame'] = frame
+
+        if changed:
+            try:
+                _save_entry(source, symbol, entry)
+            except Exception as e:
+                print(f"⚠️ 가격 저장소 저장 실패 ({source}:{symbol}): {e}")
+                traceback.print_exc()
+                _remember((source, symbol), entry)
+
+    if entry['frame'].empty:
+        return pd.DataFrame()
+    return entry['frame'].loc[start:end].copy()
+
+
+def _needs_fetch(entry, start, end, now):
+    """저장소만으로 [start, end]를 답할 수 없으면 네트워크 조회 시작일을, 답할 수 있으면 None을 반환합니다."""
+    if entry is None or start < entry['covered_from']:
+        return start
+    frame = entry['frame']
+    last_day = frame.index[-1] if not frame.empty else entry['covered_from']
+    if end >= last_day and _tail_stale(entry, last_day, end, now):
+        return frame.index[-2] if len(frame) >= 2 else last_day
+    return None
+
+
+def _split_batch(raw, symbols):
+    """yf.download 다종목 결과(컬럼: (Price, Ticker))를 종목별 DataFrame으로 나눕니다."""
+    frames = {}
+    if raw is None or raw.empty:
+        return frames
+    if not isinstance(raw.columns, pd.MultiIndex):
+        if len(symbols) == 1:
+            frames[symbols[0]] = _normalize_frame(raw)
+        return frames
+    tickers = set(raw.columns.get_level_values(1))
+    for symbol in symbols:
+        if symbol in tickers:
+            frame = _normalize_frame(raw.xs(symbol, axis=1, level=1)).dropna(how='all')
+            if not frame.empty:
+                frames[symbol] = frame
+    return frames
+
+
+def _store_fetched(source, symbol, fetched, fetch_from, start, end, now):
+    """일괄 조회로 받은 한 종목의 구간을 저장소 항목에 반영합니다. (get_ohlcv와 같은 수정주가 처리)"""
+    with _key_lock((source, symbol)):
+        entry = _load_entry(source, symbol)
+        if entry is None:
+            entry = {'version': PRICE_STORE_VERSION, 'frame': fetched, 'covered_from': start,
+                     'checked_at': now, 'checked_through': end}
+        else:
+            frame = entry['frame']
+            last_day = frame.index[-1] if not frame.empty else entry['covered_from']
+            confirmed = frame.index[frame.index < fetched.index[-1]] if not frame.empty else frame.index
+            anchor_day = confirmed[-1] if len(confirmed) else fetch_from
+            covered_from = min(entry['covered_from'], start)
+            if _adjusted_since_stored(frame, fetched, anchor_day):
+                # 일괄 조회 구간(fetch_from~)만으로 바꾸면 그 앞의 저장 구간이 사라지므로 get_ohlcv처럼 전체를 다시 받습니다.
+                print(f"🔄 수정주가 변경 감지 ({source}:{symbol}). 저장 구간 전체를 다시 받습니다.")
+                try:
+                    frame = _normalize_frame(SOURCES[source](symbol, covered_from, end))
+                except Exception as e:
+                    print(f"⚠️ 전체 구간 재조회 실패 ({source}:{symbol}), 일괄 조회 구간만 저장합니다: {e}")
+                    frame = fetched
+                    covered_from = fetch_from
+            else:
+                frame = _merge(frame, fetched)
+            entry['frame'] = frame
+            entry['covered_from'] = covered_from
+            entry['checked_at'] = now
+            entry['checked_through'] = max(entry.get('checked_through', last_day), end)
+        try:
+            _save_entry(source, symbol, entry)
+        except Exception as e:
+            print(f"⚠️ 가격 저장소 저장 실패 ({source}:{symbol}): {e}")
+            _remember((source, symbol), entry)
+
+
+def get_ohlcv_many(symbols, start, end, source='yf'):
+    """
+    여러 종목의 [start, end] 일봉을 {symbol: DataFrame}으로 반환합니다. (end 포함)
+    저장소로 답할 수 없는 종목만 모아 yfinance 다종목 조회(BATCH_DOWNLOAD_SIZE개씩)로 한 번에 받고,
+    일괄 조회에서도 받지 못한 종목은 결과에서 빠지므로, 호출 측에서 개별 조회로 보완합니다.
+    """
+    if source not in ('yf', 'yf_adj'):
+        raise ValueError(f"일괄 조회는 yfinance 소스만 지원합니다: {source}")
+    start = pd.Timestamp(start).normalize()
+    end = pd.Timestamp(end).normalize()
+    now = datetime.now()
+    symbols = list(dict.fromkeys(symbols))
+
+    pending = {}
+    for symbol in symbols:
+        fetch_from = _needs_fetch(_load_entry(source, symbol), start, end, now)
+        if fetch_from is not None:
+            pending[symbol] = fetch_from
+
+    if pending:
+        pending_symbols = list(pending)
+        batch_from = min(pending.values())
+        print(f"📦 일괄 조회: {len(pending_symbols)}/{len(symbols)}개 종목 ({batch_from.date()} ~ {end.date()})")
+        for i in range(0, len(pending_symbols), BATCH_DOWNLOAD_SIZE):
+            chunk = pending_symbols[i:i + BATCH_DOWNLOAD_SIZE]
+            try:
+                raw = yf.download(chunk, start=batch_from, end=end + timedelta(days=1),
+                                  auto_adjust=(source == 'yf_adj'), group_by='column',
+                                  progress=False, threads=True)
+            except Exception as e:
+                print(f"⚠️ 일괄 조회 실패, 개별 조회로 대체합니다: {e}")
+                raw = None
+            for symbol, fetched in _split_batch(raw, chunk).items():
+                _store_fetched(source, symbol, fetched, batch_from, start, end, now)
+                pending.pop(symbol)
+
+    results = {}
+    for symbol in symbols:
+        if symbol in pending:
+            continue
+        entry = _load_entry(source, symbol)
+        if entry is not None and not entry['frame'].empty:
+            df = entry['frame'].loc[start:end].copy()
+            if not df.empty:
+                results[symbol] = df
+    return results
@@ -0,0 +1,69 @@
+# blueprints/quant_report_store.py
+# 퀀트 리포트 결과물(artifact) 저장/로드
+import os
+import pickle
+import threading
+from datetime import datetime
+
+# 리포트 구조가 바뀌면 버전을 올려 이전 결과물을 무시하도록 합니다.
+QUANT_REPORT_VERSION = 1
+QUANT_REPORT_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'quant_report.pkl')
+
+_lock = threading.Lock()
+_artifact = None  # 메모리에 올려둔 마지막 정상 결과물
+
+
+def save_quant_report(report_data):
+    """정상 생성된 리포트만 저장합니다. 실패 시 호출하지 않으므로 마지막 정상 결과물이 유지됩니다."""
+    global _artifact
+    artifact = {
+        'version': QUANT_REPORT_VERSION,
+        'generated_at': datetime.now(),
+        'report': report_data,
+    }
+    os.makedirs(os.path.dirname(QUANT_REPORT_PATH), exist_ok=True)
+    tmp_path = f"{QUANT_REPORT_PATH}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, QUANT_REPORT_PATH)
+    with _lock:
+        _artifact = artifact
+    return artifact
+
+
+def load_quant_report():
+    """마지막 정상 결과물을 반환합니다. (메모리 → 디스크 순) 없으면 None."""
+    global _artifact
+    with _lock:
+        if _artifact is not None:
+            return _artifact
+        if not os.path.exists(QUANT_REPORT_PATH):
+            return None
+        try:
+            with open(QUANT_REPORT_PATH, 'rb') as f:
+                artifact = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ 퀀트 리포트 결과물을 읽을 수 없습니다: {e}")
+            return None
+        if artifact.get('version') != QUANT_REPORT_VERSION:
+            print("⚠️ 퀀트 리포트 결과물 버전이 달라 무시합니다.")
+            return None
+        _artifact = artifact
+        return _artifact
+
+
+def get_report_age(artifact):
+    """결과물 생성 후 경과 시간(timedelta)."""
+    return datetime.now() - artifact['generated_at']
+
+
+def format_report_age(artifact):
+    """'3시간 전'과 같은 사람이 읽기 쉬운 경과 시간 문자열."""
+    minutes = int(get_report_age(artifact).total_seconds() // 60)
+    if minutes < 1:
+        return "방금 전"
+    if minutes < 60:
+        return f"{minutes}분 전"
+    if minutes < 60 * 24:
+        return f"{minutes // 60}시간 전"
+    return f"{minutes // (60 * 24)}일 전"
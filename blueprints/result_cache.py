@@ -0,0 +1,158 @@
+# blueprints/result_cache.py
+# 분석 결과 캐시 - 크기 제한(LRU) + TTL, 프로세스 간 공유 가능한 백엔드(SQLite)와 고정 해시 키
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# 저장 형식이 바뀌면 버전을 올려 기존 레코드를 무시하도록 합니다.
+RESULT_CACHE_VERSION = 1
+RESULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'result_cache.sqlite3')
+# 'sqlite'(기본, gunicorn 워커 간 공유) 또는 'memory'(프로세스 내부)
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "sqlite").lower()
+
+
+def stable_key(*parts):
+    """
+    프로세스와 무관하게 항상 같은 캐시 키. (내장 hash()는 프로세스마다 값이 달라 워커 간 페이지네이션 키로 쓸 수 없음)
+    dict는 키 순서와 무관하게 같은 값이 나오도록 정렬해서 직렬화합니다.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+class MemoryBackend:
+    """프로세스 내부 LRU. 네임스페이스마다 최대 max_entries개."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stores = {}  # namespace → OrderedDict(key → (expires_at, value))
+
+    def get(self, namespace, key):
+        now = time.time()
+        with self._lock:
+            store = self._stores.get(namespace)
+            entry = store.get(key) if store is not None else None
+            if entry is None:
+                return None
+            if entry[0] < now:
+                del store[key]
+                return None
+            store.move_to_end(key)
+            return entry[1]
+
+    def set(self, namespace, key, value, ttl, max_entries):
+        with self._lock:
+            store = self._stores.setdefault(namespace, OrderedDict())
+            store[key] = (time.time() + ttl, value)
+            store.move_to_end(key)
+            while len(store) > max_entries:
+                store.popitem(last=False)
+
+
+class SQLiteBackend:
+    """
+    cache/result_cache.sqlite3 에 pickle로 저장하는 LRU. 같은 서버의 여러 워커가 같은 파일을 공유합니다.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT, key TEXT, version INTEGER, value BLOB, expires_at REAL, used_at REAL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_used_at ON entries (namespace, used_at)")
+            conn.execute("DELETE FROM entries WHERE expires_at < ? OR version != ?", (time.time(), RESULT_CACHE_VERSION))
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, namespace, key):
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND version = ? AND expires_at >= ?",
+                (namespace, key, RESULT_CACHE_VERSION, now)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE entries SET used_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key))
+            conn.commit()
+        return pickle.loads(row[0])
+
+    def set(self, namespace, key, value, ttl, max_entries):
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (namespace, key, version, value, expires_at, used_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (namespace, key, RESULT_CACHE_VERSION, blob, now + ttl, now)
+            )
+            conn.execute("DELETE FROM entries WHERE namespace = ? AND expires_at < ?", (namespace, now))
+            count = conn.execute("SELECT COUNT(*) FROM entries WHERE namespace = ?", (namespace,)).fetchone()[0]
+            if count > max_entries:
+                conn.execute(
+                    "DELETE FROM entries WHERE namespace = ? AND key IN ("
+                    " SELECT key FROM entries WHERE namespace = ? ORDER BY used_at ASC LIMIT ?)",
+                    (namespace, namespace, count - max_entries)
+                )
+            conn.commit()
+
+
+def make_backend(kind=RESULT_CACHE_BACKEND):
+    if kind == "memory":
+        return MemoryBackend()
+    return SQLiteBackend()
+
+
+class ResultCache:
+    """
+    네임스페이스 하나에 대한 캐시. 백엔드 오류는 캐시 미스로 처리합니다.
+
+        analysis_cache.get(key)          # 없거나 만료되었으면 None
+        analysis_cache.set(key, value)
+    """
+
+    def __init__(self, namespace, ttl_seconds, max_entries, backend):
+        self.namespace = namespace
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self.backend = backend
+
+    def get(self, key):
+        if not key:
+            return None
+        try:
+            return self.backend.get(self.namespace, key)
+        except Exception as e:
+            print(f"⚠️ 결과 캐시({self.namespace}) 조회 실패: {e}")
+            return None
+
+    def set(self, key, value):
+        try:
+            self.backend.set(self.namespace, key, value, self.ttl, self.max_entries)
+        except Exception as e:
+            print(f"⚠️ 결과 캐시({self.namespace}) 저장 실패: {e}")
+
+
+_backend = make_backend()
+
+# 질의 분석 전체 결과 (페이지네이션용) - cache_key = stable_key(user_query, intent_json)
+analysis_cache = ResultCache("analysis", ttl_seconds=6 * 3600, max_entries=500, backend=_backend)
+# 종목 상세 정보 (/askfin/stock/<code>/profile) - 12시간
+stock_detail_cache = ResultCache("stock_detail", ttl_seconds=12 * 3600, max_entries=1000, backend=_backend)
@@ -0,0 +1,211 @@
+# blueprints/screener.py
+# 재무지표 스크리너 - 일별 시장 스냅샷을 종목 순서가 고정된 NumPy 배열로 만들어 두고,
+# 조건 트리(and/or/not)를 불리언 마스크 연산으로 평가합니다.
+import threading
+
+import numpy as np
+
+from blueprints.market_snapshot import get_market_snapshot
+
+# 'high'/'low' 값은 전 종목(값이 있는 종목) 분포의 이 백분위를 기준으로 합니다.
+HIGH_PERCENTILE = 80
+LOW_PERCENTILE = 20
+
+# 사용자/LLM이 쓰는 지표 이름 → 스크리너 컬럼
+INDICATOR_ALIASES = {
+    "per": "PER", "pbr": "PBR", "eps": "EPS", "bps": "BPS", "dps": "DPS", "roe": "ROE",
+    "div": "DIV", "dividend": "DIV", "dividend_yield": "DIV", "배당수익률": "DIV", "배당": "DIV",
+    "cap": "CAP", "marcap": "CAP", "market_cap": "CAP", "시가총액": "CAP", "시총": "CAP",
+    "close": "CLOSE", "price": "CLOSE", "주가": "CLOSE",
+    "volume": "VOLUME", "거래량": "VOLUME",
+}
+INDICATOR_LABELS = {"DIV": "배당수익률", "CAP": "시가총액", "CLOSE": "주가", "VOLUME": "거래량"}
+SCREEN_COLUMNS = ("PER", "PBR", "DIV", "EPS", "BPS", "DPS", "ROE", "CAP", "CLOSE", "VOLUME")
+# 0이 '값 없음'(적자/자본잠식 등)을 뜻하는 지표
+_ZERO_AS_MISSING = ("PER", "PBR")
+
+_OPERATORS = {
+    "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    "==": np.equal, "=": np.equal, "!=": np.not_equal,
+}
+
+_screener = None
+_lock = threading.Lock()
+
+
+def _level(value):
+    """'high'/'low' 같은 상대 수준 값이면 'high' 또는 'low', 아니면 None."""
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in ("high", "높은", "높음"):
+            return "high"
+        if lowered in ("low", "낮은", "낮음"):
+            return "low"
+    return None
+
+
+def _normalize_tree(condition):
+    # 목록은 and로, {'type': 'compound', 'logic': 'or', 'conditions': [...]} 형식은 {'or': [...]}로 바꿉니다.
+    if isinstance(condition, list):
+        return {"and": condition}
+    if condition.get("type") == "compound":
+        logic = str(condition.get("logic") or condition.get("operator") or "and").lower()
+        return {logic: condition.get("conditions") or []}
+    return condition
+
+
+def resolve_indicator(name):
+    key = str(name or "").strip()
+    return INDICATOR_ALIASES.get(key.lower(), key.upper())
+
+
+def _is_supported_leaf(condition):
+    """스크리너가 평가할 수 있는 잎 조건(업종, 스냅샷 지표 비교)인지 여부. 거시지표/실적/거래량 이벤트 등은 False."""
+    if condition.get("type") == "sector":
+        return True
+    if condition.get("type") not in (None, "fundamental"):
+        return False
+    return resolve_indicator(condition.get("indicator")) in SCREEN_COLUMNS
+
+
+def _sector_map_key(sector_map):
+    # 매번 새로 만든 딕셔너리가 와도 내용(종목 수, 업종이 있는 종목 수)이 같으면 스크리너를 다시 쓰도록 합니다.
+    return len(sector_map), sum(1 for v in sector_map.values() if isinstance(v, str))
+
+
+def is_screen_condition(condition):
+    """스크리너가 처리할 조건(재무지표/업종 조건 또는 그 조합)인지 여부."""
+    if not isinstance(condition, dict):
+        return False
+    if any(k in condition for k in ("and", "or", "not")):
+        return True
+    return condition.get("type") in ("fundamental", "sector", "compound")
+
+
+class Screener:
+    """
+    codes: 종목코드 배열 (모든 컬럼이 같은 순서)
+    columns: 지표명 → float64 배열 (PER, PBR, DIV, EPS, BPS, DPS, ROE, CAP, CLOSE, VOLUME)
+    sectors: 업종명 배열
+    """
+
+    def __init__(self, snapshot, sector_map, date_str):
+        self.date_str = date_str
+        self.snapshot = snapshot
+        self.codes = snapshot.index.astype(str).to_numpy()
+        self.columns = {}
+        for name, source in (("PER", "PER"), ("PBR", "PBR"), ("DIV", "DIV"), ("EPS", "EPS"), ("BPS", "BPS"),
+                             ("DPS", "DPS"), ("CAP", "시가총액"), ("CLOSE", "종가"), ("VOLUME", "거래량")):
+            values = snapshot[source].to_numpy(dtype=np.float64, na_value=np.nan)
+            if name in _ZERO_AS_MISSING:
+                values = np.where(values > 0, values, np.nan)
+            self.columns[name] = values
+        bps = self.columns["BPS"]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.columns["ROE"] = np.where(bps > 0, self.columns["EPS"] / bps * 100, np.nan)
+        # KRX 목록의 업종 값에는 NaN(float)이 섞여 있으므로 문자열만 씁니다.
+        self.sectors = np.array([sector_map.get(code) if isinstance(sector_map.get(code), str) else ""
+                                 for code in self.codes], dtype=object)
+        self.sector_map_key = _sector_map_key(sector_map)
+        self._percentiles = {}
+
+    def _percentile(self, column, q):
+        key = (column, q)
+        if key not in self._percentiles:
+            values = self.columns[column]
+            valid = values[~np.isnan(values)]
+            self._percentiles[key] = float(np.percentile(valid, q)) if valid.size else np.nan
+        return self._percentiles[key]
+
+    def _threshold(self, column, value):
+        """숫자, 'high'/'low', {'percentile': p} 를 실제 기준값으로 바꿉니다."""
+        if isinstance(value, dict) and "percentile" in value:
+            return self._percentile(column, float(value["percentile"]))
+        level = _level(value)
+        if level == "high":
+            return self._percentile(column, HIGH_PERCENTILE)
+        if level == "low":
+            return self._percentile(column, LOW_PERCENTILE)
+        return float(value)
+
+    def _leaf_mask(self, condition):
+        if condition.get("type") == "sector":
+            keyword = str(condition.get("value") or "")
+            return np.array([keyword in sector for sector in self.sectors], dtype=bool)
+
+        column = resolve_indicator(condition.get("indicator"))
+        if column not in self.columns:
+            raise ValueError(f"지원하지 않는 지표입니다: {condition.get('indicator')}")
+        values = self.columns[column]
+        value = condition.get("value")
+        operator = condition.get("operator") or (">=" if _level(value) == "high" else "<=")
+
+        if operator == "between":
+            low, high = (self._threshold(column, v) for v in value)
+            mask = (values >= low) & (values <= high)
+        elif operator in _OPERATORS:
+            with np.errstate(invalid='ignore'):
+                mask = _OPERATORS[operator](values, self._threshold(column, value))
+        else:
+            raise ValueError(f"지원하지 않는 비교 연산자입니다: {operator}")
+        return mask & ~np.isnan(values)
+
+    def _mask(self, condition):
+        # 스크리너가 평가할 수 없는 잎/하위 트리는 None (상위 and/or에서 건너뜀)
+        condition = _normalize_tree(condition)
+        if "and" in condition or "or" in condition:
+            logic = "and" if "and" in condition else "or"
+            masks = [m for m in (self._mask(child) for child in condition[logic]) if m is not None]
+            if not masks:
+                return None
+            return np.logical_and.reduce(masks) if logic == "and" else np.logical_or.reduce(masks)
+        if "not" in condition:
+            child = self._mask(condition["not"])
+            return None if child is None else ~child
+        if not _is_supported_leaf(condition):
+            return None
+        return self._leaf_mask(condition)
+
+    def mask(self, condition):
+        """조건 트리를 전 종목 불리언 마스크로 평가합니다. 평가할 수 없는 잎 조건은 적용하지 않습니다."""
+        result = self._mask(condition)
+        return np.ones(len(self.codes), dtype=bool) if result is None else result
+
+    def screen(self, condition):
+        """조건을 만족하는 종목코드 집합."""
+        return set(self.codes[self.mask(condition)])
+
+    def describe(self, condition):
+        """분석 제목에 붙일 조건 설명. 예) 'PER < 10 그리고 배당수익률 상위 20%'"""
+        condition = _normalize_tree(condition)
+        if "and" in condition:
+            return " 그리고 ".join(self.describe(c) for c in condition["and"])
+        if "or" in condition:
+            return "(" + " 또는 ".join(self.describe(c) for c in condition["or"]) + ")"
+        if "not" in condition:
+            return f"NOT {self.describe(condition['not'])}"
+        if condition.get("type") == "sector":
+            return f"업종: {condition.get('value')}"
+        if not _is_supported_leaf(condition):
+            label = condition.get("name") or condition.get("indicator") or condition.get("type") or "알 수 없는"
+            return f"{label} 조건 미적용"
+        column = resolve_indicator(condition.get("indicator"))
+        value = condition.get("value")
+        if _level(value) == "high":
+            return f"{INDICATOR_LABELS.get(column, column)} 상위 {100 - HIGH_PERCENTILE}%"
+        if _level(value) == "low":
+            return f"{INDICATOR_LABELS.get(column, column)} 하위 {LOW_PERCENTILE}%"
+        return f"{INDICATOR_LABELS.get(column, column)} {condition.get('operator')} {value}"
+
+
+def get_screener(date_str, sector_map):
+    """date_str 스냅샷으로 만든 스크리너. 스냅샷(날짜 변경, 장중 잠정치 갱신)이나 업종 목록이 바뀔 때만 새로 만듭니다."""
+    global _screener
+    snapshot = get_market_snapshot(date_str)
+    if snapshot.empty:
+        raise ValueError(f"{date_str} 시장 스냅샷이 비어 있어 스크리닝할 수 없습니다.")
+    with _lock:
+        if (_screener is None or _screener.snapshot is not snapshot
+                or _screener.sector_map_key != _sector_map_key(sector_map)):
+            _screener = Screener(snapshot, sector_map, date_str)
+        return _screener
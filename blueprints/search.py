@@ -4,6 +4,7 @@ import yfinance as yf
 import pandas as pd
 import joblib
 from datetime import datetime, timedelta # datetime 모듈에서 datetime과 timedelta를 명시적으로 임포트
+from blueprints.krx_snapshot import add_full_code, load_krx_snapshot
 
 # 모델, 인코더, 피처 목록 로드
 model = joblib.load('models/trend_model.pkl')
@@ -23,22 +24,22 @@ try:
         GLOBAL_KRX_LISTING = imported_krx_listing
         # FullCode 컬럼이 없을 경우를 대비 (추가된 코드)
         if 'FullCode' not in GLOBAL_KRX_LISTING.columns:
-             GLOBAL_KRX_LISTING['FullCode'] = GLOBAL_KRX_LISTING.apply(
-                lambda row: f"{row['Code']}.KQ" if row['Market'] == 'KOSDAQ' else f"{row['Code'].zfill(6)}.KS", axis=1
-            )
+            add_full_code(GLOBAL_KRX_LISTING)
         print(f"search.py: GLOBAL_KRX_LISTING (from askfin) loaded. Total {len(GLOBAL_KRX_LISTING)} stocks.")
     else:
-        # 임포트 실패 또는 빈 값일 경우, 직접 FDR로 로드 (폴백)
-        print("search.py: WARN - GLOBAL_KRX_LISTING from askfin is empty/None. Attempting direct FDR load.")
-        temp_krx_listing = fdr.StockListing('KRX')
-        if not temp_krx_listing.empty:
-            temp_krx_listing['FullCode'] = temp_krx_listing.apply(
-                lambda row: f"{row['Code']}.KQ" if row['Market'] == 'KOSDAQ' else f"{row['Code'].zfill(6)}.KS", axis=1
-            )
-            GLOBAL_KRX_LISTING = temp_krx_listing
-            print(f"search.py: Direct FDR StockListing loaded. Total {len(GLOBAL_KRX_LISTING)} stocks.")
+        # askfin 초기화 전이면 디스크 스냅샷을 먼저 사용하고, 없을 때만 직접 FDR로 로드 (폴백)
+        snapshot = load_krx_snapshot()
+        if snapshot is not None:
+            GLOBAL_KRX_LISTING = snapshot['listing']
+            print(f"search.py: KRX snapshot loaded (기준일 {snapshot['business_date']}). Total {len(GLOBAL_KRX_LISTING)} stocks.")
         else:
-            print("search.py: CRITICAL ERROR - Direct FDR StockListing also failed. KRX list is empty.")
+            print("search.py: WARN - GLOBAL_KRX_LISTING from askfin is empty/None. Attempting direct FDR load.")
+            temp_krx_listing = fdr.StockListing('KRX')
+            if not temp_krx_listing.empty:
+                GLOBAL_KRX_LISTING = add_full_code(temp_krx_listing)
+                print(f"search.py: Direct FDR StockListing loaded. Total {len(GLOBAL_KRX_LISTING)} stocks.")
+            else:
+                print("search.py: CRITICAL ERROR - Direct FDR StockListing also failed. KRX list is empty.")
 except Exception as e:
     print(f"search.py: CRITICAL ERROR - Could not load KRX StockListing at all: {e}")
     GLOBAL_KRX_LISTING = pd.DataFrame(columns=['Code', 'Name', 'Market', 'Close', 'Volume', 'Marcap', 'FullCode'])
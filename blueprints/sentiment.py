@@ -0,0 +1,214 @@
+# blueprints/sentiment.py
+# 감성 분석(KoBERT) 모델 지연 로딩 서비스
+import hashlib
+import json
+import os
+import threading
+import time
+import traceback
+
+# 한 번의 forward pass에 넣을 최대 문장 수 (CPU 메모리에 맞춰 조정)
+DEFAULT_BATCH_SIZE = int(os.getenv("SENTIMENT_BATCH_SIZE", "16"))
+
+# scripts/export_sentiment_model.py 가 만드는 int8 동적 양자화 TorchScript 모델 파일명
+QUANTIZED_MODEL_FILE = "model.pt"
+QUANTIZED_META_FILE = "meta.json"
+
+# 모델 로딩에 실패하면 이 시간 동안은 다시 로딩하지 않습니다. (요청마다 전체 로딩/traceback이 반복되지 않도록)
+LOAD_RETRY_SECONDS = int(os.getenv("SENTIMENT_LOAD_RETRY_SECONDS", "1800"))
+
+
+def sentiment_runtime():
+    """SENTIMENT_RUNTIME=transformers 이면 양자화 모델이 있어도 원본 파이프라인을 씁니다. (기본 auto)"""
+    return os.getenv("SENTIMENT_RUNTIME", "auto")
+
+
+class QuantizedSentimentPipeline:
+    """
+    양자화 TorchScript 모델을 transformers pipeline과 같은 방식으로 호출할 수 있게 감싼 객체.
+    pipeline(text) / pipeline([text, ...], batch_size=..., truncation=True) → [{"label": ..., "score": ...}, ...]
+    """
+
+    def __init__(self, export_dir, tokenizer_dir):
+        import torch
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(export_dir, QUANTIZED_META_FILE), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        self._torch = torch
+        self.model = torch.jit.load(os.path.join(export_dir, QUANTIZED_MODEL_FILE), map_location='cpu')
+        self.model.eval()
+        self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_dir, trust_remote_code=True)
+        self.id2label = {int(k): v for k, v in meta['id2label'].items()}
+        self.max_length = int(meta.get('max_length', 256))
+
+    def __call__(self, texts, batch_size=DEFAULT_BATCH_SIZE, truncation=True):
+        torch = self._torch
+        if isinstance(texts, str):
+            texts = [texts]
+        outputs = []
+        with torch.inference_mode():
+            for i in range(0, len(texts), batch_size):
+                encoded = self.tokenizer(
+                    texts[i:i + batch_size], padding=True, truncation=truncation,
+                    max_length=self.max_length, return_tensors='pt'
+                )
+                token_type_ids = encoded.get('token_type_ids')
+                if token_type_ids is None:
+                    token_type_ids = torch.zeros_like(encoded['input_ids'])
+                logits = self.model(encoded['input_ids'], encoded['attention_mask'], token_type_ids)[0]
+                probs = torch.softmax(logits, dim=-1)
+                scores, label_ids = probs.max(dim=-1)
+                outputs.extend(
+                    {"label": self.id2label[int(label_id)], "score": float(score)}
+                    for score, label_id in zip(scores, label_ids)
+                )
+        return outputs
+
+
+class SentimentService:
+    """
+    data_files/saved_model 의 감성 분석 파이프라인을 지연 로딩하는 서비스 객체.
+
+    - warm_up(): 백그라운드 스레드에서 모델 로딩을 시작합니다. (서버 부팅을 막지 않음)
+    - is_ready: 모델이 메모리에 올라왔는지 여부. 준비 전에는 predict()가 None을 반환하므로
+      호출 측은 "없음"으로 대체해 응답을 늦추지 않습니다.
+    - quantized_dir에 양자화 모델(model.pt)이 있으면 그것을 우선 사용하고, 로딩에 실패하면 원본으로 대체합니다.
+    """
+
+    def __init__(self, model_dir, quantized_dir=None, batch_size=DEFAULT_BATCH_SIZE):
+        self.model_dir = model_dir
+        self.quantized_dir = quantized_dir
+        self.batch_size = batch_size
+        self.runtime = None
+        self.load_error = None
+        self._failed_at = None
+        self._pipeline = None
+        self._ready = threading.Event()
+        self._load_lock = threading.Lock()
+        self._thread = None
+        self._model_version = None
+
+    @property
+    def is_ready(self):
+        return self._ready.is_set()
+
+    def _in_retry_backoff(self):
+        return self._failed_at is not None and time.monotonic() - self._failed_at < LOAD_RETRY_SECONDS
+
+    def _use_quantized(self):
+        return (
+            self.quantized_dir is not None
+            and sentiment_runtime() != "transformers"
+            and os.path.exists(os.path.join(self.quantized_dir, QUANTIZED_MODEL_FILE))
+        )
+
+    @property
+    def model_version(self):
+        """
+        사용할 모델 디렉터리 파일 목록(이름/크기/수정 시각)으로 만든 짧은 해시.
+        saved_model을 재학습하거나 양자화 모델로 바꾸면 값이 바뀌므로, 캐시된 감성 결과를 무효화하는 데 씁니다. (모델 로딩 불필요)
+        """
+        if self._model_version is None:
+            digest = hashlib.sha1()
+            active_dir = self.quantized_dir if self._use_quantized() else self.model_dir
+            try:
+                for name in sorted(os.listdir(active_dir)):
+                    stat = os.stat(os.path.join(active_dir, name))
+                    digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode('utf-8'))
+            except OSError:
+                digest.update(b"missing")
+            self._model_version = digest.hexdigest()[:12]
+        return self._model_version
+
+    def warm_up(self):
+        """백그라운드 스레드에서 모델 로딩을 시작합니다. 이미 로딩 중/완료이거나 최근에 실패했으면 아무것도 하지 않습니다."""
+        if self.is_ready or (self._thread is not None and self._thread.is_alive()) or self._in_retry_backoff():
+            return
+        self._thread = threading.Thread(target=self.load, name="sentiment-warmup", daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """
+        모델을 동기적으로 로딩합니다. 여러 스레드에서 동시에 호출되어도 한 번만 로딩됩니다.
+        로딩에 실패하면 LOAD_RETRY_SECONDS 동안은 다시 시도하지 않고 None을 반환합니다. (load_error에 원인)
+        """
+        if self.is_ready:
+            return self._pipeline
+        with self._load_lock:
+            if self.is_ready or self._in_retry_backoff():
+                return self._pipeline
+            if self._use_quantized():
+                try:
+                    print("⚙️ 감성 분석 모델(int8 양자화) 로딩 시작...")
+                    self._pipeline = QuantizedSentimentPipeline(self.quantized_dir, self.model_dir)
+                    self.runtime = "quantized"
+                    self.load_error = None
+                    self._ready.set()
+                    print("✅ 감성 분석 모델(int8 양자화) 로딩 완료.")
+                    return self._pipeline
+                except Exception as e:
+                    print(f"⚠️ 양자화 모델 로딩 실패, 원본 모델로 대체합니다: {e}")
+                    # 원본 모델로 대체하므로 캐시 무효화용 버전도 다시 계산합니다.
+                    self.quantized_dir = None
+                    self._model_version = None
+            try:
+                print("⚙️ 감성 분석 모델 로딩 시작...")
+                # transformers/torch 임포트 자체가 무거우므로 실제 로딩 시점까지 미룹니다.
+                from transformers import pipeline
+                self._pipeline = pipeline(
+                    'sentiment-analysis',
+                    model=self.model_dir,
+                    tokenizer=self.model_dir,
+                    return_all_scores=False,
+                    device=-1
+                )
+                self.runtime = "transformers"
+                self.load_error = None
+                self._failed_at = None
+                self._ready.set()
+                print("✅ 감성 분석 모델 로딩 완료.")
+            except Exception as e:
+                self.load_error = e
+                self._failed_at = time.monotonic()
+                print(f"❌ 감성 분석 모델 로딩 실패 ({LOAD_RETRY_SECONDS}초 뒤 다시 시도): {e}")
+                traceback.print_exc()
+        return self._pipeline
+
+    def predict(self, text, wait=False):
+        """
+        text의 감성 라벨을 반환합니다.
+        모델이 아직 준비되지 않았으면 warm-up을 트리거하고 None을 반환합니다. (wait=True면 로딩을 기다림)
+        """
+        if not self.is_ready:
+            if not wait:
+                self.warm_up()
+                return None
+            self.load()
+            if not self.is_ready:
+                return None
+        return self._pipeline(text)[0]["label"]
+
+    def predict_batch(self, texts, batch_size=None, wait=False):
+        """
+        여러 문장의 감성 라벨을 리스트로 반환합니다. (texts와 같은 순서)
+        batch_size개씩 패딩된 배치로 묶어 추론하므로, 문장마다 predict()를 부르는 것보다 CPU에서 훨씬 빠릅니다.
+        모델이 준비되지 않았으면 predict()와 같이 warm-up을 트리거하고 [None, ...]을 반환합니다.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        if not self.is_ready:
+            if not wait:
+                self.warm_up()
+                return [None] * len(texts)
+            self.load()
+            if not self.is_ready:
+                return [None] * len(texts)
+        outputs = self._pipeline(texts, batch_size=batch_size or self.batch_size, truncation=True)
+        return [output["label"] for output in outputs]
+
+
+def is_warmup_enabled():
+    """SENTIMENT_WARMUP=0 이면 부팅 시 백그라운드 로딩을 생략합니다. (테스트/스크립트용)"""
+    return os.getenv("SENTIMENT_WARMUP", "1") != "0"
@@ -0,0 +1,90 @@
+# blueprints/singleflight.py
+# 동일한 외부 데이터 조회가 여러 스레드에서 동시에 들어오면 한 번만 호출하고 결과를 나눠 받습니다.
+import threading
+from datetime import date, datetime
+
+import pandas as pd
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    key별로 진행 중인 호출을 하나만 유지하는 객체. (결과를 저장해 두는 캐시가 아님)
+
+    - 먼저 들어온 스레드(leader)가 실제 호출을 하고, 같은 key로 뒤따라 들어온 스레드는
+      그 호출이 끝나기를 기다렸다가 같은 결과(또는 같은 예외)를 받습니다.
+    - 호출이 끝나면 key를 바로 지우므로, 이후 요청은 새로 호출합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            # followers끼리도 서로의 수정을 보지 않도록 사본을 한 번 더 복사해 나눠 줍니다.
+            return _copy_result(call.result)
+
+        try:
+            result = fn(*args, **kwargs)
+            # leader의 호출 측이 결과를 수정(inplace 등)하기 전에 followers용 사본을 떠 둡니다.
+            call.result = _copy_result(result)
+            return result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+
+def _copy_result(result):
+    """DataFrame처럼 호출 측에서 수정할 수 있는 결과는 복사해서 나눠 줍니다."""
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return result.copy()
+    return result
+
+
+def _key_part(value):
+    # 일봉 조회 인자는 일 단위로만 의미가 있으므로, 시각까지 포함된 날짜는 일자로 맞춰 같은 요청으로 봅니다.
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return pd.Timestamp(value).strftime('%Y-%m-%d')
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return tuple(_key_part(v) for v in value)
+    return value
+
+
+# askfin.py / app.py 의 시세 조회가 함께 쓰는 기본 인스턴스
+market_data_flight = SingleFlight()
+
+
+def coalesced(fn, *args, **kwargs):
+    """
+    fn(*args, **kwargs)를 호출하되, 같은 함수·인자의 호출이 이미 진행 중이면 그 결과를 함께 받습니다.
+    예) coalesced(fdr.DataReader, code, start, end)
+    """
+    key = (
+        getattr(fn, '__module__', None),
+        getattr(fn, '__qualname__', repr(fn)),
+        tuple(_key_part(a) for a in args),
+        tuple(sorted((k, _key_part(v)) for k, v in kwargs.items())),
+    )
+    return market_data_flight.do(key, fn, *args, **kwargs)
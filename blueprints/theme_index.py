@@ -0,0 +1,243 @@
+# blueprints/theme_index.py
+# 테마별 일간 지수(동일가중/시총가중) 시계열 - 시장 패널로부터 매일 밤 전 테마를 한 번에 계산합니다.
+import json
+import os
+import threading
+import traceback
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from blueprints.krx_snapshot import load_krx_snapshot
+from blueprints.market_panel import get_market_panel
+
+# 지수 구조가 바뀌면 버전을 올려 기존 파일을 무시하도록 합니다.
+THEME_INDEX_VERSION = 1
+THEME_INDEX_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'theme_index.npz')
+THEMES_PATH = os.path.join(os.path.dirname(__file__), '..', 'cache', 'themes.json')
+
+WEIGHTINGS = ('equal', 'cap')
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+_build_lock = threading.Lock()
+
+
+class ThemeIndex:
+    """
+    테마 × 날짜 지수 시계열.
+
+    levels[weighting][t, k]는 k번째 테마 지수의 누적 로그수익률이므로,
+    기간 수익률은 exp(levels[e] - levels[s-1]) - 1 (s-1일 종가 → e일 종가) 로 계산합니다.
+    """
+
+    def __init__(self, dates, themes, members, equal, cap, panel_last_date, updated_at):
+        self.dates = dates
+        self.themes = themes
+        self.members = members
+        self.levels = {'equal': equal, 'cap': cap}
+        self.panel_last_date = panel_last_date
+        self.updated_at = updated_at
+        self.theme_index = {theme: k for k, theme in enumerate(themes)}
+
+    def covers(self, start, end):
+        """[start, end] 구간을 지수만으로 답할 수 있는지 여부. (시작일 전날 종가가 필요)"""
+        if len(self.dates) < 2:
+            return False
+        start, end = pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()
+        if start <= pd.Timestamp(self.dates[0]):
+            return False
+        panel = get_market_panel()
+        last_date = pd.Timestamp(self.dates[-1])
+        return end <= last_date or (panel is not None and panel.last_date == last_date and panel.is_fresh())
+
+    def period_returns(self, start, end, weighting='equal', themes=None):
+        """
+        테마별 기간 수익률(%)을 Series로 반환합니다. (구성 종목이 없어 계산할 수 없는 테마는 제외)
+        themes를 주면 해당 테마만 계산합니다.
+        """
+        levels = self.levels[weighting]
+        s_idx = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(start).normalize(), 'D'), side='left'))
+        e_idx = int(np.searchsorted(self.dates, np.datetime64(pd.Timestamp(end).normalize(), 'D'), side='right')) - 1
+        if s_idx < 1 or e_idx < s_idx:
+            return pd.Series(dtype=float)
+
+        if themes is None:
+            cols = np.arange(len(self.themes))
+        else:
+            cols = np.array([self.theme_index[t] for t in themes if t in self.theme_index], dtype=int)
+        with np.errstate(invalid='ignore'):
+            returns = np.expm1(levels[e_idx, cols] - levels[s_idx - 1, cols]) * 100
+        series = pd.Series(returns, index=self.themes[cols])
+        series = series[self.members[cols] > 0]
+        return series.dropna().round(2)
+
+
+def load_themes():
+    """cache/themes.json → {테마명: [종목코드, ...]}"""
+    with open(THEMES_PATH, 'r', encoding='utf-8') as f:
+        themes_from_file = json.load(f)
+    return {
+        theme: [str(s.get('code')) for s in stocks if s.get('code')]
+        for theme, stocks in themes_from_file.items()
+    }
+
+
+def _daily_returns(panel):
+    """패널의 일간 수정 수익률 행렬과 유효 여부 마스크. (거래 없음/상장 첫날은 무효)"""
+    with np.errstate(invalid='ignore'):
+        returns = np.expm1(np.diff(panel.cumlog, axis=0))
+    valid = ~np.isnan(returns) & ~np.isnan(panel.close[1:])
+    returns[~valid] = 0.0
+    return returns, valid
+
+
+def _cap_weights(panel, listing, valid):
+    """
+    전일 시가총액 근사치 행렬.
+    최신 시가총액(Marcap)에 (전일 수정주가 / 최신 수정주가)를 곱해 과거 시가총액을 추정합니다. (주식 수 불변 가정)
+    """
+    marcap = pd.Series(listing['Marcap'].to_numpy(dtype=np.float64), index=listing['Code'].astype(str))
+    marcap = marcap[~marcap.index.duplicated()]
+    latest_cap = marcap.reindex(panel.tickers).to_numpy()
+
+    # 각 종목의 마지막 유효 누적 로그수익률
+    filled = pd.DataFrame(panel.cumlog).ffill().to_numpy()
+    latest_cumlog = filled[-1]
+    with np.errstate(invalid='ignore', over='ignore'):
+        weights = latest_cap * np.exp(panel.cumlog[:-1] - latest_cumlog)
+    weights[~valid | np.isnan(weights)] = 0.0
+    return weights
+
+
+def _accumulate(numerator, denominator):
+    """테마별 일간 수익률(가중평균)을 누적 로그수익률로 바꿉니다. 구성 종목이 모두 거래 없던 날은 0."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily = np.where(denominator > 0, numerator / denominator, 0.0)
+    levels = np.zeros((daily.shape[0] + 1, daily.shape[1]))
+    levels[1:] = np.cumsum(np.log1p(daily), axis=0)
+    return levels
+
+
+def build_theme_index(panel, themes, listing):
+    """
+    시장 패널과 테마 구성 종목으로 전 테마의 동일가중/시총가중 지수를 한 번에 계산합니다.
+    (테마 × 종목 소속 행렬과의 행렬곱으로 계산하므로 테마 수와 무관하게 한 번의 연산)
+    """
+    theme_names = list(themes.keys())
+    membership = np.zeros((len(panel.tickers), len(theme_names)))
+    for k, theme in enumerate(theme_names):
+        cols = [panel.ticker_index[code] for code in themes[theme] if code in panel.ticker_index]
+        membership[cols, k] = 1.0
+
+    returns, valid = _daily_returns(panel)
+    valid_f = valid.astype(np.float64)
+    equal = _accumulate(returns @ membership, valid_f @ membership)
+
+    weights = _cap_weights(panel, listing, valid)
+    cap = _accumulate((returns * weights) @ membership, weights @ membership)
+
+    return ThemeIndex(
+        dates=panel.dates,
+        themes=np.array(theme_names, dtype=str),
+        members=membership.sum(axis=0).astype(np.int32),
+        equal=equal,
+        cap=cap,
+        panel_last_date=panel.last_date.to_pydatetime(),
+        updated_at=datetime.now(),
+    )
+
+
+def _save_theme_index(index):
+    os.makedirs(os.path.dirname(THEME_INDEX_PATH), exist_ok=True)
+    tmp_path = f"{THEME_INDEX_PATH}.tmp.npz"
+    np.savez(
+        tmp_path,
+        version=np.array(THEME_INDEX_VERSION),
+        updated_at=np.array(index.updated_at.isoformat()),
+        panel_last_date=np.array(index.panel_last_date.isoformat()),
+        dates=index.dates,
+        themes=index.themes,
+        members=index.members,
+        equal=index.levels['equal'],
+        cap=index.levels['cap'],
+    )
+    os.replace(tmp_path, THEME_INDEX_PATH)
+
+
+def _load_theme_index_from_disk():
+    if not os.path.exists(THEME_INDEX_PATH):
+        return None
+    try:
+        with np.load(THEME_INDEX_PATH, allow_pickle=False) as data:
+            if int(data['version']) != THEME_INDEX_VERSION:
+                print("⚠️ 테마 지수 버전이 달라 무시합니다.")
+                return None
+            return ThemeIndex(
+                dates=data['dates'],
+                themes=data['themes'],
+                members=data['members'],
+                equal=data['equal'],
+                cap=data['cap'],
+                panel_last_date=datetime.fromisoformat(str(data['panel_last_date'])),
+                updated_at=datetime.fromisoformat(str(data['updated_at'])),
+            )
+    except Exception as e:
+        print(f"⚠️ 테마 지수 파일을 읽을 수 없습니다: {e}")
+        return None
+
+
+def get_theme_index():
+    """메모리 테마 지수를 반환합니다. 최초 호출 시 디스크에서 읽고, 없으면 None."""
+    global _index, _index_loaded
+    if _index_loaded:
+        return _index
+    with _index_lock:
+        if not _index_loaded:
+            _index = _load_theme_index_from_disk()
+            _index_loaded = True
+    return _index
+
+
+def update_theme_index():
+    """
+    [스케줄러 작업] 시장 패널 갱신 후 전 테마 지수를 다시 계산해 저장합니다.
+    패널의 마지막 날짜가 바뀌지 않았으면 아무것도 하지 않습니다.
+    """
+    global _index, _index_loaded
+    if not _build_lock.acquire(blocking=False):
+        print("ℹ️ 테마 지수 계산이 이미 진행 중입니다.")
+        return get_theme_index()
+    try:
+        panel = get_market_panel()
+        if panel is None or len(panel.dates) < 2:
+            print("⚠️ 시장 패널이 없어 테마 지수를 계산할 수 없습니다.")
+            return get_theme_index()
+
+        current = get_theme_index()
+        if current is not None and pd.Timestamp(current.panel_last_date) == panel.last_date \
+                and os.path.getmtime(THEMES_PATH) <= current.updated_at.timestamp():
+            print("✅ 테마 지수가 이미 최신입니다.")
+            return current
+
+        snapshot = load_krx_snapshot()
+        if snapshot is None:
+            print("⚠️ KRX 종목 스냅샷이 없어 테마 지수를 계산할 수 없습니다.")
+            return current
+
+        themes = load_themes()
+        print(f"🔄 테마 지수 계산 시작: {len(themes)}개 테마 × {len(panel.dates)}일")
+        index = build_theme_index(panel, themes, snapshot['listing'])
+        _save_theme_index(index)
+        with _index_lock:
+            _index, _index_loaded = index, True
+        print(f"✅ 테마 지수 계산 완료: {int((index.members > 0).sum())}/{len(themes)}개 테마")
+        return index
+    except Exception as e:
+        print(f"❌ 테마 지수 계산 실패 (기존 지수 유지): {e}")
+        traceback.print_exc()
+        return get_theme_index()
+    finally:
+        _build_lock.release()
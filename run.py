@@ -1,8 +1,8 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from scipy import stats
+from blueprints.price_store import get_ohlcv
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -67,11 +67,8 @@ class EnhancedStockPredictor:
         for name, symbol in all_symbols.items():
             try:
                 print(f"  - {name.upper()} 수집 중...")
-                data = yf.download(symbol, start=self.start_date, end=self.end_date, 
-                                 progress=False, auto_adjust=False)
-                
-                if isinstance(data.columns, pd.MultiIndex):
-                    data.columns = data.columns.droplevel(1)
+                # 로컬 가격 저장소에서 읽고, 마지막 저장일 이후 구간만 yfinance로 받아옵니다.
+                data = get_ohlcv(symbol, self.start_date, self.end_date, source='yf')
                 
                 if len(data) > 0:
                     self.data[name] = data.fillna(method='ffill')
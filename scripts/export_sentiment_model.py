@@ -0,0 +1,164 @@
+# scripts/export_sentiment_model.py
+# 감성 분석 모델(data_files/saved_model)을 CPU용 int8 동적 양자화 TorchScript 모델로 내보내는 빌드 스크립트
+#
+# 사용법: python scripts/export_sentiment_model.py [--min-agreement 0.97] [--max-accuracy-drop 0.01]
+#  1) 원본 fp32 모델의 Linear 레이어를 int8 동적 양자화한 뒤 TorchScript로 trace 하여 저장합니다.
+#  2) labeled_news.csv 로 원본/양자화 모델의 정답 일치율과 두 모델 간 예측 일치율을 비교합니다. (기준 미달 시 저장하지 않음)
+#  3) 단건/배치 추론 지연 시간을 측정해 meta.json 에 함께 기록합니다.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import pandas as pd
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+
+from blueprints.sentiment import QuantizedSentimentPipeline, QUANTIZED_MODEL_FILE, QUANTIZED_META_FILE  # noqa: E402
+
+DATA_DIR = os.path.join(PROJECT_ROOT, "data_files")
+SAVED_MODEL_DIR = os.path.join(DATA_DIR, "saved_model")
+EXPORT_DIR = os.path.join(DATA_DIR, "saved_model_int8")
+LABELED_PATH = os.path.join(DATA_DIR, "labeled_news.csv")
+MAX_LENGTH = 256
+
+
+class _FloatPipeline:
+    """비교용 원본 fp32 모델. QuantizedSentimentPipeline과 같은 방식으로 토크나이즈/추론합니다."""
+
+    def __init__(self, model, tokenizer):
+        self.model = model
+        self.tokenizer = tokenizer
+
+    def __call__(self, texts, batch_size=16, truncation=True):
+        if isinstance(texts, str):
+            texts = [texts]
+        labels = []
+        with torch.inference_mode():
+            for i in range(0, len(texts), batch_size):
+                encoded = self.tokenizer(texts[i:i + batch_size], padding=True, truncation=truncation,
+                                         max_length=MAX_LENGTH, return_tensors='pt')
+                logits = self.model(**encoded)[0]
+                labels.extend({"label": self.model.config.id2label[int(label_id)]} for label_id in logits.argmax(dim=-1))
+        return labels
+
+
+def load_labeled_news():
+    df = pd.read_csv(LABELED_PATH).dropna(subset=['text', 'label']).reset_index(drop=True)
+    df['label'] = df['label'].str.strip().str.lower()
+    return df
+
+
+def export_quantized(tmp_dir):
+    """원본 모델을 int8 동적 양자화 후 TorchScript로 저장하고, 메타 정보를 반환합니다."""
+    tokenizer = AutoTokenizer.from_pretrained(SAVED_MODEL_DIR, trust_remote_code=True)
+    model = AutoModelForSequenceClassification.from_pretrained(SAVED_MODEL_DIR, torchscript=True)
+    model.eval()
+
+    quantized = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    sample = tokenizer(["코스피가 외국인 매수에 상승 마감했다", "환율 급등"], padding=True,
+                       truncation=True, max_length=MAX_LENGTH, return_tensors='pt')
+    token_type_ids = sample.get('token_type_ids', torch.zeros_like(sample['input_ids']))
+    with torch.inference_mode():
+        traced = torch.jit.trace(quantized, (sample['input_ids'], sample['attention_mask'], token_type_ids),
+                                 strict=False)
+    torch.jit.save(traced, os.path.join(tmp_dir, QUANTIZED_MODEL_FILE))
+
+    meta = {
+        'source_dir': os.path.relpath(SAVED_MODEL_DIR, PROJECT_ROOT),
+        'id2label': {str(k): v for k, v in model.config.id2label.items()},
+        'max_length': MAX_LENGTH,
+        'quantization': 'dynamic int8 (torch.nn.Linear)',
+        'torch_version': torch.__version__,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+    }
+    with open(os.path.join(tmp_dir, QUANTIZED_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    float_model = AutoModelForSequenceClassification.from_pretrained(SAVED_MODEL_DIR)
+    float_model.eval()
+    return meta, _FloatPipeline(float_model, tokenizer)
+
+
+def check_parity(float_pipe, quant_pipe, df):
+    """정답 대비 정확도(원본/양자화)와 두 모델 간 예측 일치율."""
+    texts = df['text'].astype(str).tolist()
+    float_labels = [o['label'] for o in float_pipe(texts)]
+    quant_labels = [o['label'] for o in quant_pipe(texts)]
+    truth = df['label'].tolist()
+    n = len(texts)
+    return {
+        'samples': n,
+        'float_accuracy': round(sum(a == b for a, b in zip(float_labels, truth)) / n, 4),
+        'quantized_accuracy': round(sum(a == b for a, b in zip(quant_labels, truth)) / n, 4),
+        'agreement': round(sum(a == b for a, b in zip(float_labels, quant_labels)) / n, 4),
+    }
+
+
+def benchmark(pipe, texts, batch_size, repeats=20):
+    """배치 하나를 repeats번 추론한 지연 시간 중앙값/p90 (ms)."""
+    pipe(texts[:batch_size], batch_size=batch_size)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        pipe(texts[:batch_size], batch_size=batch_size)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {'median_ms': round(statistics.median(timings), 2),
+            'p90_ms': round(timings[int(len(timings) * 0.9) - 1], 2)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="감성 분석 모델 int8 양자화 내보내기")
+    parser.add_argument('--min-agreement', type=float, default=0.97, help="원본과 양자화 모델 예측 최소 일치율")
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01, help="허용하는 정답 일치율 최대 하락폭")
+    args = parser.parse_args()
+
+    tmp_dir = f"{EXPORT_DIR}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    print("⚙️ int8 동적 양자화 + TorchScript 내보내기...")
+    meta, float_pipe = export_quantized(tmp_dir)
+    # 서버와 같은 로더로 다시 읽어서 검증합니다.
+    quant_pipe = QuantizedSentimentPipeline(tmp_dir, SAVED_MODEL_DIR)
+
+    df = load_labeled_news()
+    print(f"⚙️ 정합성 검사: labeled_news.csv {len(df)}건")
+    parity = check_parity(float_pipe, quant_pipe, df)
+    print(f"   - 정답 일치율: 원본 {parity['float_accuracy']:.2%} / 양자화 {parity['quantized_accuracy']:.2%}")
+    print(f"   - 원본 대비 예측 일치율: {parity['agreement']:.2%}")
+
+    titles = df['text'].astype(str).str.slice(0, 64).tolist()
+    latency = {}
+    for batch_size in (1, 10):
+        latency[f'batch_{batch_size}'] = {
+            'float': benchmark(float_pipe, titles, batch_size),
+            'quantized': benchmark(quant_pipe, titles, batch_size),
+        }
+        f_ms, q_ms = latency[f'batch_{batch_size}']['float']['median_ms'], latency[f'batch_{batch_size}']['quantized']['median_ms']
+        print(f"   - 지연 시간(batch={batch_size}, 중앙값): 원본 {f_ms}ms → 양자화 {q_ms}ms ({f_ms / q_ms:.1f}배)")
+
+    accuracy_drop = parity['float_accuracy'] - parity['quantized_accuracy']
+    if parity['agreement'] < args.min_agreement or accuracy_drop > args.max_accuracy_drop:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"❌ 정합성 기준 미달 (일치율 ≥ {args.min_agreement:.0%}, 정확도 하락 ≤ {args.max_accuracy_drop:.0%}). 저장하지 않습니다.")
+        sys.exit(1)
+
+    meta.update({'parity': parity, 'latency': latency})
+    with open(os.path.join(tmp_dir, QUANTIZED_META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(EXPORT_DIR, ignore_errors=True)
+    os.replace(tmp_dir, EXPORT_DIR)
+    print(f"✅ 양자화 모델 저장 완료: {EXPORT_DIR}")
+
+
+if __name__ == '__main__':
+    main()